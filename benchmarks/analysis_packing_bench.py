@@ -0,0 +1,104 @@
+"""
+Benchmark request packing for LLM analysis against the local fake
+chat-completions server.
+
+Analyzes the same set of synthetic articles one request per chunk
+(ANALYSIS_PACKING off) and with short articles packed several to a request,
+then writes the same articles as a Batch API input file, answers it offline
+with the fake server and ingests the output. Reports requests sent, prompt
+tokens as counted by the fake server and wall time for each.
+
+    python benchmarks/analysis_packing_bench.py --articles 200 --article-chars 1500 4000 12000
+
+Run with the package installed (or src/ on PYTHONPATH); needs aiohttp,
+openai and tiktoken but no API key.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from fake_services import FakeLLMServer
+from ioc_scanner_bench import make_document
+
+
+def make_articles(count: int, sizes: list):
+    from threat_intell2.models.data_models import Article
+
+    return [
+        Article(
+            title=f"Synthetic post {index}",
+            url=f"https://vendor.example/blog/post-{index}/",
+            text=make_document(random.choice(sizes)),
+        )
+        for index in range(count)
+    ]
+
+
+async def run_online(articles, packing: bool) -> dict:
+    from threat_intell2.analyzers import data_analyzer
+    from threat_intell2.utils.metrics import metrics
+
+    data_analyzer.ANALYSIS_PACKING = packing
+    metrics.reset()
+    start = time.perf_counter()
+    analyzed = await data_analyzer.analyze_data_async(articles)
+    counters = metrics.summary()["counters"]
+    return {
+        "seconds": time.perf_counter() - start,
+        "analyzed": len(analyzed),
+        "requests": counters.get("llm_requests", 0),
+        "prompt_tokens": counters.get("llm_prompt_tokens", 0),
+    }
+
+
+def run_batch(articles, llm: FakeLLMServer, workdir: str) -> dict:
+    from threat_intell2.analyzers import data_analyzer
+    from threat_intell2.analyzers.batch_submission import ingest_batch_results, write_batch_file
+
+    data_analyzer.ANALYSIS_PACKING = True
+    start = time.perf_counter()
+    requests_path, count = write_batch_file(articles, workdir)
+    results_path = os.path.join(workdir, "results.jsonl")
+    llm.run_batch(requests_path, results_path)
+    analyzed = [result for _, result in ingest_batch_results(workdir, results_path) if result]
+    return {"seconds": time.perf_counter() - start, "analyzed": len(analyzed), "requests": count, "prompt_tokens": None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--article-chars", type=int, nargs="+", default=[1500, 4000, 12000],
+                        help="Article sizes to draw from")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the fake LLM waits per request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as workdir, FakeLLMServer(latency=args.llm_latency) as llm:
+        # Must happen before threat_intell2.config is imported
+        os.environ.update({
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": llm.base_url,
+            "CACHE_DIR": workdir,
+            "ANALYSIS_CACHE_ENABLED": "0",
+        })
+        articles = make_articles(args.articles, args.article_chars)
+
+        async def online():
+            # One event loop for both runs: the OpenAI async client is bound to it
+            return await run_online(articles, packing=False), await run_online(articles, packing=True)
+
+        unpacked, packed = asyncio.run(online())
+        batch = run_batch(articles, llm, workdir)
+
+    print(f"{'mode':<10} {'requests':>9} {'prompt tokens':>14} {'analyzed':>9} {'seconds':>8}")
+    for name, result in (("unpacked", unpacked), ("packed", packed), ("batch", batch)):
+        tokens = "-" if result["prompt_tokens"] is None else f"{result['prompt_tokens']:.0f}"
+        print(f"{name:<10} {result['requests']:>9.0f} {tokens:>14} {result['analyzed']:>9} {result['seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark the token chunker used for LLM analysis.
+
+Compares the previous implementation (encoder lookup per call, one Python
+loop iteration per token, decode per chunk) with the unified chunker in
+token, sentence and paragraph mode, one text at a time and batched across
+all texts. Also reports the largest chunk actually produced, re-encoded,
+to check that boundary-aligned chunks stay within the limit.
+
+    python benchmarks/chunker_bench.py --sizes 20000 200000 1000000 --texts 20
+
+Needs tiktoken (the encoding is loaded once before timing).
+"""
+import argparse
+import random
+import time
+
+from ioc_scanner_bench import make_document
+from threat_intell2.utils.text_processing import chunk_text, chunk_texts, get_encoding
+
+
+def legacy_chunk_text(text: str, max_tokens: int = 7000) -> list:
+    import tiktoken
+
+    encoding = tiktoken.encoding_for_model("gpt-4")
+    tokens = encoding.encode(text)
+    chunks = []
+    current_chunk = []
+    current_chunk_tokens = 0
+    for token in tokens:
+        if current_chunk_tokens + 1 > max_tokens:
+            chunks.append(encoding.decode(current_chunk))
+            current_chunk = []
+            current_chunk_tokens = 0
+        current_chunk.append(token)
+        current_chunk_tokens += 1
+    if current_chunk:
+        chunks.append(encoding.decode(current_chunk))
+    return chunks
+
+
+def make_text(size: int) -> str:
+    # Sentences of varying length grouped into paragraphs
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = [make_document(random.randint(60, 300)).capitalize() + "." for _ in range(random.randint(2, 8))]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _time(func, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 200000, 1000000], help="Characters per text")
+    parser.add_argument("--texts", type=int, default=20, help="Texts per size")
+    parser.add_argument("--max-tokens", type=int, default=7000)
+    parser.add_argument("--overlap", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    encoding = get_encoding("gpt-4")
+    print(f"{'chars':>8} {'method':<20} {'ms/text':>9} {'chunks':>7} {'max tokens':>11}")
+    for size in args.sizes:
+        texts = [make_text(size) for _ in range(args.texts)]
+        runs = [("legacy", lambda: [legacy_chunk_text(text, args.max_tokens) for text in texts])]
+        for boundary in ("token", "sentence", "paragraph"):
+            runs.append((boundary, lambda boundary=boundary: [
+                chunk_text(text, args.max_tokens, boundary, args.overlap) for text in texts
+            ]))
+            runs.append((f"{boundary} batched", lambda boundary=boundary: chunk_texts(
+                texts, args.max_tokens, boundary, args.overlap
+            )))
+        for name, run in runs:
+            seconds, chunked = _time(run)
+            chunks = [chunk for text_chunks in chunked for chunk in text_chunks]
+            largest = max(len(encoding.encode_ordinary(chunk)) for chunk in chunks)
+            print(f"{size:>8} {name:<20} {seconds / len(texts) * 1000:>9.2f} {len(chunks):>7} {largest:>11}")
+
+
+if __name__ == "__main__":
+    main()
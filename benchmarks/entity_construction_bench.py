@@ -0,0 +1,73 @@
+"""
+Benchmark building IOC models for the entities of a long report.
+
+Compares the previous approach (a validated pydantic IOC per spaCy entity
+and scanner hit, duplicates included) with build_iocs, which keeps one
+unvalidated model per (type, value). The synthetic entity streams repeat
+numbers, places and indicators the way long reports do. Reports time and
+the memory held by the resulting lists (tracemalloc).
+
+    python benchmarks/entity_construction_bench.py --entities 1000 10000 50000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from threat_intell2.models.data_models import IOC
+from threat_intell2.processors.entity_extractor import build_iocs
+
+PLACES = ["China", "Russia", "Iran", "North Korea", "Ukraine", "United States", "Europe", "Israel"]
+
+
+def make_entities(count: int, distinct_ratio: float):
+    distinct = max(1, int(count * distinct_ratio))
+    pool = []
+    for index in range(distinct):
+        kind = random.random()
+        if kind < 0.4:
+            pool.append(("CARDINAL", str(random.randint(1, 500))))
+        elif kind < 0.55:
+            pool.append(("GPE", random.choice(PLACES)))
+        elif kind < 0.65:
+            pool.append(("MONEY", f"${random.randint(1, 900)} million"))
+        elif kind < 0.85:
+            pool.append(("IP_ADDRESS", ".".join(str(random.randint(1, 254)) for _ in range(4))))
+        else:
+            pool.append(("SHA256_HASH", "%064x" % random.getrandbits(256)))
+    # Fresh strings, as spaCy and the scanner produce a new str per occurrence
+    return [(ioc_type, "".join(list(value))) for ioc_type, value in (random.choice(pool) for _ in range(count))]
+
+
+def legacy(pairs):
+    return [IOC(type=ioc_type, value=value) for ioc_type, value in pairs]
+
+
+def measure(func, pairs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(pairs)
+    seconds = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, held, len(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--distinct", type=float, default=0.2, help="Share of distinct (type, value) pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"{'entities':>9} {'method':<10} {'ms':>9} {'KiB held':>10} {'models':>8}")
+    for count in args.entities:
+        pairs = make_entities(count, args.distinct)
+        for name, func in (("legacy", legacy), ("build_iocs", build_iocs)):
+            seconds, held, models = measure(func, pairs)
+            print(f"{count:>9} {name:<10} {seconds * 1000:>9.1f} {held / 1024:>10.0f} {models:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark threat-actor merging and IOC linking in extract_entities.
+
+Compares the previous approach (a linear scan over all actors per entity
+and an actors x names x IOCs loop for linking) with the normalized-name
+index and Aho-Corasick linking, on synthetic documents of growing size.
+Near-linear scaling shows up as a roughly constant time per entity.
+
+    python benchmarks/entity_linking_bench.py --sizes 250 500 1000 2000 4000
+"""
+import argparse
+import random
+import string
+import time
+
+from threat_intell2.models.data_models import IOC, ThreatActor
+from threat_intell2.processors.entity_extractor import link_iocs_to_actors
+
+
+def _word(length: int) -> str:
+    return "".join(random.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_entities(count: int):
+    # Roughly one distinct actor per four mentions, with case variants
+    actor_names = [_word(random.randint(5, 10)).capitalize() for _ in range(max(1, count // 4))]
+    mentions = []
+    for _ in range(count):
+        name = random.choice(actor_names)
+        mentions.append(name.upper() if random.random() < 0.1 else name)
+    iocs = []
+    for _ in range(count):
+        if random.random() < 0.05:
+            value = f"{random.choice(actor_names).lower()}-{_word(4)}.com"
+        else:
+            value = f"{_word(8)}.{random.choice(['com', 'net', 'org'])}"
+        iocs.append(IOC(type="DOMAIN", value=value))
+    return mentions, iocs
+
+
+def legacy(mentions, iocs):
+    threat_actors = []
+    for text in mentions:
+        existing_actor = next((actor for actor in threat_actors if text.lower() in [name.lower() for name in actor.names]), None)
+        if existing_actor:
+            if text not in existing_actor.names:
+                existing_actor.names.append(text)
+        else:
+            threat_actors.append(ThreatActor(names=[text]))
+    for threat_actor in threat_actors:
+        threat_actor.related_iocs = [ioc.value for ioc in iocs if any(name.lower() in ioc.value.lower() for name in threat_actor.names)]
+    return threat_actors
+
+
+def indexed(mentions, iocs):
+    threat_actors = []
+    actors_by_name = {}
+    for text in mentions:
+        existing_actor = actors_by_name.get(text.lower())
+        if existing_actor:
+            if text not in existing_actor.names:
+                existing_actor.names.append(text)
+        else:
+            threat_actor = ThreatActor(names=[text])
+            threat_actors.append(threat_actor)
+            actors_by_name[text.lower()] = threat_actor
+    link_iocs_to_actors(threat_actors, iocs)
+    return threat_actors
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"{'entities':>9} {'legacy s':>10} {'indexed s':>10} {'us/entity':>10} {'speedup':>8}")
+    for size in args.sizes:
+        mentions, iocs = make_entities(size)
+        legacy_time, legacy_actors = _time(legacy, mentions, iocs)
+        indexed_time, indexed_actors = _time(indexed, mentions, iocs)
+        assert [a.related_iocs for a in legacy_actors] == [a.related_iocs for a in indexed_actors]
+        print(
+            f"{size:>9} {legacy_time:>10.4f} {indexed_time:>10.4f} "
+            f"{indexed_time / size * 1e6:>10.1f} {legacy_time / indexed_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
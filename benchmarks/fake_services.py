@@ -0,0 +1,188 @@
+"""
+Local stand-ins for the network dependencies of the pipeline.
+
+- CorpusServer serves recorded (or synthetic) article HTML behind listing
+  pages laid out like the vendor blogs web_scraping expects.
+- FakeLLMServer answers OpenAI chat-completions requests with a canned
+  analysis after a configurable delay (one per article for packed
+  requests), and can answer a Batch API input file offline.
+
+Both run an aiohttp application on 127.0.0.1 in a background thread with
+its own event loop, so they do not compete with the code being measured.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+from html import escape
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+class BackgroundServer:
+    def __init__(self, app: web.Application):
+        self.app = app
+        self.port: Optional[int] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _start(self) -> int:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    def start(self) -> "BackgroundServer":
+        self._thread.start()
+        self.port = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self) -> None:
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def article_html(title: str, body: str) -> str:
+    paragraphs = "".join(f"<p>{escape(p)}</p>" for p in body.split("\n\n") if p.strip())
+    return (
+        f"<html><head><title>{escape(title)}</title></head><body>"
+        f"<nav><a href='/'>Home</a></nav><article><h1>{escape(title)}</h1>{paragraphs}</article>"
+        f"</body></html>"
+    )
+
+
+def load_corpus(directory: str) -> List[str]:
+    """Read recorded article pages (*.html) from `directory`, sorted by name."""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+    return pages
+
+
+class CorpusServer(BackgroundServer):
+    """
+    Serves `pages` as /site<N>/blog/<index> with `per_site` articles linked
+    from each /site<N>/blog/ listing page.
+    """
+
+    def __init__(self, pages: List[str], per_site: int):
+        self.pages = pages
+        self.per_site = per_site
+        self.sites = max(1, -(-len(pages) // per_site))
+        self.bytes_served = 0
+        app = web.Application()
+        app.router.add_get("/site{site}/blog/", self._listing)
+        app.router.add_get("/site{site}/blog/{index}", self._article)
+        super().__init__(app)
+
+    def listing_urls(self) -> List[str]:
+        return [f"{self.base_url}/site{site}/blog/" for site in range(self.sites)]
+
+    async def _listing(self, request: web.Request) -> web.Response:
+        site = int(request.match_info["site"])
+        first = site * self.per_site
+        links = "".join(
+            f"<li><a href='/site{site}/blog/{index}'>Article {index}</a></li>"
+            for index in range(first, min(first + self.per_site, len(self.pages)))
+        )
+        body = f"<html><body><a href='/about'>About</a><ul>{links}</ul></body></html>"
+        self.bytes_served += len(body)
+        return web.Response(text=body, content_type="text/html")
+
+    async def _article(self, request: web.Request) -> web.Response:
+        index = int(request.match_info["index"])
+        if index >= len(self.pages):
+            raise web.HTTPNotFound()
+        self.bytes_served += len(self.pages[index])
+        return web.Response(text=self.pages[index], content_type="text/html")
+
+
+class FakeLLMServer(BackgroundServer):
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint."""
+
+    def __init__(self, latency: float = 0.0, content: Optional[Dict[str, str]] = None):
+        self.latency = latency
+        self.requests = 0
+        self.content = content or {
+            "Executive_Summary": "Synthetic summary of the analyzed text.",
+            "Threat_Actors": "APT29, FIN7",
+            "TTPs": "Spearphishing Attachment, Command and Scripting Interpreter",
+            "IOCs": "198.51.100.7, evil.example",
+            "Global_Impact": "Limited to the benchmark corpus.",
+            "Recommendations": "Patch promptly, Monitor egress traffic",
+        }
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self._completions)
+        super().__init__(app)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def build_content(self, payload: dict) -> str:
+        prompt = payload["messages"][-1]["content"] if payload.get("messages") else ""
+        numbers = re.findall(r"^### ARTICLE (\d+)$", prompt, re.MULTILINE)
+        if numbers:
+            return json.dumps({number: self.content for number in numbers})
+        return json.dumps(self.content)
+
+    def completion(self, payload: dict) -> dict:
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        content = self.build_content(payload)
+        return {
+            "id": f"chatcmpl-bench-{self.requests}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": payload.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_chars // 4 + len(content) // 4,
+            },
+        }
+
+    def run_batch(self, requests_path: str, results_path: str) -> int:
+        """Answer every request of a Batch API input file into an output file, as the Batch API would."""
+        count = 0
+        with open(requests_path) as requests, open(results_path, "w") as results:
+            for line in requests:
+                request = json.loads(line)
+                self.requests += 1
+                count += 1
+                results.write(json.dumps({
+                    "id": f"batch-req-{count}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": self.completion(request["body"])},
+                    "error": None,
+                }) + "\n")
+        return count
+
+    async def _completions(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(self.completion(payload))
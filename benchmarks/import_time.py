@@ -0,0 +1,73 @@
+"""
+Import-time budget check.
+
+Imports threat_intell2.main in a fresh interpreter and fails if it takes
+longer than the budget. Heavy resources (spaCy pipeline, torch, tiktoken
+encoders, OpenAI clients) must only be loaded on first use.
+
+    python benchmarks/import_time.py --budget 1.0
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["spacy", "torch", "tiktoken", "openai"]
+
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import threat_intell2.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "loaded = [m for m in {heavy!r} if m in sys.modules]\n"
+    "print(elapsed)\n"
+    "print(','.join(loaded))\n"
+)
+
+
+def measure(runs: int) -> tuple:
+    env = dict(os.environ)
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = src_dir + os.pathsep + env.get("PYTHONPATH", "")
+    # The key check is deferred to first client use; make sure importing does not depend on it
+    env.pop("OPENAI_API_KEY", None)
+
+    timings = []
+    loaded = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.splitlines()
+        wall = time.perf_counter() - start
+        timings.append((float(output[0]), wall))
+        loaded = output[1] if len(output) > 1 else ""
+    return timings, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum import time in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    timings, loaded = measure(args.runs)
+    best_import = min(t[0] for t in timings)
+    best_wall = min(t[1] for t in timings)
+    print(f"import threat_intell2.main: {best_import:.3f}s (interpreter wall {best_wall:.3f}s, best of {args.runs})")
+    failed = False
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {loaded}")
+        failed = True
+    if best_import > args.budget:
+        print(f"FAIL: import time exceeds budget of {args.budget:.3f}s")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark the regex IOC scanner against the spaCy Matcher path it replaced.
+
+The legacy path tokenizes with spaCy, runs the token-regex Matcher for
+IPs/hashes/CVEs and checks `like_url`/`like_email` on every token. By
+default it uses a blank English tokenizer, which is a lower bound on its
+cost; pass --model to include a full pipeline as extract_entities used to.
+
+    python benchmarks/ioc_scanner_bench.py --docs 200 --size 20000
+"""
+import argparse
+import random
+import string
+import time
+
+from threat_intell2.processors.ioc_scanner import scan_iocs
+
+WORDS = (
+    "the threat actor deployed a loader that contacted its command and control server "
+    "after gaining initial access through a phishing email targeting finance staff"
+).split()
+
+
+def _hex(n: int) -> str:
+    return "".join(random.choice("0123456789abcdef") for _ in range(n))
+
+
+def _indicator() -> str:
+    octets = ".".join(str(random.randint(1, 254)) for _ in range(4))
+    domain = "".join(random.choice(string.ascii_lowercase) for _ in range(8)) + ".com"
+    return random.choice([
+        octets,
+        octets.replace(".", "[.]", 1),  # defanged
+        _hex(32), _hex(40), _hex(64),
+        f"CVE-20{random.randint(10, 24)}-{random.randint(1000, 99999)}",
+        f"https://{domain}/payload",
+        f"hxxp://{domain.replace('.', '[.]')}/gate.php",
+        f"admin@{domain}",
+        domain,
+    ])
+
+
+def make_document(size: int, ioc_ratio: float = 0.02) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = _indicator() if random.random() < ioc_ratio else random.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def legacy_matcher(nlp):
+    from spacy.matcher import Matcher
+
+    matcher = Matcher(nlp.vocab)
+    matcher.add("IP_ADDRESS", [[{"TEXT": {"REGEX": r"\b(?:\d{1,3}\.){3}\d{1,3}\b"}}]])
+    matcher.add("MD5_HASH", [[{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{32}\b"}}]])
+    matcher.add("SHA1_HASH", [[{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{40}\b"}}]])
+    matcher.add("SHA256_HASH", [[{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{64}\b"}}]])
+    matcher.add("CVE", [[{"TEXT": {"REGEX": r"CVE-\d{4}-\d{4,7}"}}]])
+    return matcher
+
+
+def run_legacy(nlp, matcher, docs):
+    found = 0
+    for text in docs:
+        doc = nlp(text)
+        found += len(matcher(doc))
+        found += sum(1 for token in doc if token.like_url or token.like_email)
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--size", type=int, default=20000, help="Characters per document")
+    parser.add_argument("--model", default=None, help="spaCy pipeline for the legacy path (default: blank 'en')")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    docs = [make_document(args.size) for _ in range(args.docs)]
+    total_mb = sum(len(d) for d in docs) / 1e6
+
+    start = time.perf_counter()
+    scanner_found = sum(len(scan_iocs(text)) for text in docs)
+    scanner_time = time.perf_counter() - start
+    print(f"regex scanner:  {scanner_time:.3f}s  {total_mb / scanner_time:.1f} MB/s  {scanner_found} IOCs")
+
+    try:
+        import spacy
+    except ImportError:
+        print("spaCy not installed; skipping legacy Matcher path")
+        return
+    nlp = spacy.load(args.model) if args.model else spacy.blank("en")
+    nlp.max_length = max(nlp.max_length, args.size + 1)
+    matcher = legacy_matcher(nlp)
+    start = time.perf_counter()
+    legacy_found = run_legacy(nlp, matcher, docs)
+    legacy_time = time.perf_counter() - start
+    print(f"spaCy Matcher:  {legacy_time:.3f}s  {total_mb / legacy_time:.1f} MB/s  {legacy_found} IOCs")
+    print(f"speedup: {legacy_time / scanner_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
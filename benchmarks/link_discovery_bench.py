@@ -0,0 +1,113 @@
+"""
+Benchmark article link discovery on listing pages.
+
+Compares the previous approach (BeautifulSoup with html.parser over the
+whole page, keeping every link containing /blog/ or /research/) with the
+regex anchor scan and per-source link rules, on synthetic listing pages
+with navigation, tag and category links mixed in. Also times parsing an
+RSS feed and a sitemap with the same number of entries.
+
+    python benchmarks/link_discovery_bench.py --sizes 100 1000 5000
+"""
+import argparse
+import random
+import time
+from urllib.parse import urljoin
+
+from threat_intell2.config import DEFAULT_LINK_RULES
+from threat_intell2.scrapers.link_discovery import build_rules, parse_anchors, parse_feed, select_links
+
+BASE_URL = "https://vendor.example/blog/category/research/"
+
+
+def make_listing(posts: int) -> str:
+    cards = []
+    for index in range(posts):
+        cards.append(
+            f"<div class='card'><a href='/blog/post-{index}/'><img src='/img/{index}.png'></a>"
+            f"<h2><a href='/blog/post-{index}/#comments'>Post {index}</a></h2>"
+            f"<a href='/blog/tag/tag-{random.randint(0, 50)}/'>tag</a>"
+            f"<a href='/blog/author/author-{random.randint(0, 10)}/'>author</a>"
+            f"<p>{'Lorem ipsum dolor sit amet. ' * 8}</p></div>"
+        )
+    navigation = "".join(f"<li><a href='/blog/category/c{i}/'>Category {i}</a></li>" for i in range(30))
+    return (
+        "<html><head><script>var nav = '<a href=\"/blog/x\">';</script></head><body>"
+        f"<nav><ul>{navigation}</ul></nav><main>{''.join(cards)}</main>"
+        "<footer><a href='/research/'>Research</a><a href='/careers'>Careers</a></footer></body></html>"
+    )
+
+
+def make_feed(posts: int) -> str:
+    items = "".join(
+        f"<item><title>Post {index}</title><link>https://vendor.example/blog/post-{index}/</link>"
+        f"<pubDate>Mon, 0{1 + index % 9} Jan 2024 00:00:00 GMT</pubDate></item>"
+        for index in range(posts)
+    )
+    return f"<?xml version='1.0'?><rss version='2.0'><channel>{items}</channel></rss>"
+
+
+def make_sitemap(posts: int) -> str:
+    urls = "".join(
+        f"<url><loc>https://vendor.example/blog/post-{index}/</loc><lastmod>2024-01-0{1 + index % 9}</lastmod></url>"
+        for index in range(posts)
+    )
+    return f"<?xml version='1.0'?><urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>{urls}</urlset>"
+
+
+def legacy(html: str, limit: int):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    links = [urljoin(BASE_URL, a.get("href")) for a in soup.find_all("a") if a.get("href")]
+    return [link for link in links if "/blog/" in link or "/research/" in link][:limit]
+
+
+def current(html: str, limit: int):
+    anchors = parse_anchors(html, BASE_URL).links
+    return select_links(anchors, build_rules(BASE_URL, {}, DEFAULT_LINK_RULES), BASE_URL, limit)
+
+
+def _time(func, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--limit", type=int, default=20, help="Articles kept per listing page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    try:
+        import bs4  # noqa: F401
+        have_bs4 = True
+    except ImportError:
+        have_bs4 = False
+        print("beautifulsoup4 is not installed; skipping the legacy parser")
+
+    print(f"{'posts':>6} {'KB':>7} {'legacy ms':>10} {'anchors ms':>11} {'rss ms':>8} {'sitemap ms':>11} {'junk legacy':>12}")
+    for size in args.sizes:
+        html = make_listing(size)
+        anchors_time, links = _time(current, html, args.limit)
+        assert all("/tag/" not in link and "/author/" not in link for link in links)
+        rss_time, _ = _time(parse_feed, make_feed(size), "https://vendor.example/feed/")
+        sitemap_time, _ = _time(parse_feed, make_sitemap(size), "https://vendor.example/sitemap.xml")
+        legacy_time, junk = float("nan"), "-"
+        if have_bs4:
+            legacy_time, legacy_links = _time(legacy, html, args.limit)
+            junk = sum(1 for link in legacy_links if "/post-" not in link)
+        print(
+            f"{size:>6} {len(html) / 1024:>7.0f} {legacy_time * 1000:>10.1f} {anchors_time * 1000:>11.1f} "
+            f"{rss_time * 1000:>8.1f} {sitemap_time * 1000:>11.1f} {junk:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Offline end-to-end pipeline benchmark.
+
+Replays an HTML corpus through a local HTTP server and points
+data_analyzer at a local fake chat-completions server, then reports
+per-stage latency and throughput for web_scraping, preprocess_data,
+extract_entities, analyze_data and report generation across corpus sizes.
+No network access or OpenAI key is needed.
+
+    python benchmarks/pipeline_bench.py --sizes 10 50 200 --llm-latency 0.5
+    python benchmarks/pipeline_bench.py --corpus recorded_pages/ --json results.json
+
+Without --corpus, synthetic articles with embedded IOCs are generated.
+Entity extraction needs an installed spaCy model; pass --skip-nlp otherwise.
+Run with the package installed (or src/ on PYTHONPATH).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fake_services import CorpusServer, FakeLLMServer, article_html, load_corpus
+from ioc_scanner_bench import make_document
+
+STAGES = ["web_scraping", "preprocess_data", "extract_entities", "validate_data", "analyze_data", "report"]
+
+
+def synthetic_corpus(size: int, article_chars: int) -> list:
+    pages = []
+    for index in range(size):
+        paragraphs = "\n\n".join(make_document(article_chars // 4) for _ in range(4))
+        pages.append(article_html(f"Synthetic threat report {index}", paragraphs))
+    return pages
+
+
+def configure_environment(per_site: int, llm_url: str, workdir: str) -> None:
+    # Must run before threat_intell2.config is imported
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": llm_url,
+        "ARTICLES_PER_WEBSITE": str(per_site),
+        "RATE_LIMIT": "1000000",
+        "PER_HOST_CONCURRENCY": "20",
+        "CACHE_DIR": workdir,
+        "ANALYSIS_CACHE_ENABLED": "0",
+        "INCREMENTAL_CRAWL": "0",
+        "CRAWL_PERSIST": "0",
+        "HTTP_CACHE_BACKEND": "memory",  # Every run downloads the corpus
+    })
+
+
+async def run_once(urls, skip_nlp: bool, report_dir: str) -> dict:
+    from threat_intell2.analyzers.data_analyzer import analyze_data_async
+    from threat_intell2.processors.data_preprocessor import preprocess_data
+    from threat_intell2.processors.data_validator import validate_data
+    from threat_intell2.reporting.report_generator import build_threat_report, generate_report, save_report
+    from threat_intell2.scrapers.web_scraper import web_scraping
+
+    timings = {}
+
+    def timed(name, count, start):
+        elapsed = time.perf_counter() - start
+        timings[name] = {"seconds": elapsed, "items": count, "items_per_second": count / elapsed if elapsed else 0.0}
+
+    start = time.perf_counter()
+    articles = await web_scraping(urls)
+    timed("web_scraping", len(articles), start)
+
+    start = time.perf_counter()
+    articles = preprocess_data(articles)
+    timed("preprocess_data", len(articles), start)
+
+    if not skip_nlp:
+        from threat_intell2.processors.entity_extractor import extract_entities, get_nlp
+
+        get_nlp()  # Exclude model loading from the stage timing
+        start = time.perf_counter()
+        articles = extract_entities(articles)
+        timed("extract_entities", len(articles), start)
+
+    start = time.perf_counter()
+    articles = validate_data(articles)
+    timed("validate_data", len(articles), start)
+
+    start = time.perf_counter()
+    analyzed = await analyze_data_async(articles)
+    timed("analyze_data", len(analyzed), start)
+
+    start = time.perf_counter()
+    generate_report(analyzed, "benchmark")
+    save_report(build_threat_report(articles, analyzed), os.path.join(report_dir, "report.json"))
+    timed("report", len(articles), start)
+    return timings
+
+
+async def run_sizes(args, recorded, llm: FakeLLMServer, workdir: str) -> list:
+    results = []
+    for size in args.sizes:
+        if recorded is not None:
+            pages = (recorded * (size // max(1, len(recorded)) + 1))[:size]
+        else:
+            pages = synthetic_corpus(size, args.article_chars)
+        with CorpusServer(pages, args.per_site) as corpus:
+            requests_before = llm.requests
+            timings = await run_once(corpus.listing_urls(), args.skip_nlp, workdir)
+            results.append({
+                "size": size,
+                "bytes_served": corpus.bytes_served,
+                "llm_requests": llm.requests - requests_before,
+                "stages": timings,
+            })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--corpus", help="Directory of recorded article pages (*.html)")
+    parser.add_argument("--article-chars", type=int, default=8000, help="Size of synthetic articles")
+    parser.add_argument("--per-site", type=int, default=10, help="Articles linked from each listing page")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the fake LLM waits per request")
+    parser.add_argument("--skip-nlp", action="store_true", help="Skip spaCy entity extraction")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    recorded = load_corpus(args.corpus) if args.corpus else None
+
+    with tempfile.TemporaryDirectory() as workdir, FakeLLMServer(latency=args.llm_latency) as llm:
+        configure_environment(args.per_site, llm.base_url, workdir)
+        # One event loop for every size: the OpenAI async client is created once and bound to it
+        results = asyncio.run(run_sizes(args, recorded, llm, workdir))
+
+    print(f"{'size':>6} {'stage':<18} {'seconds':>9} {'items':>6} {'items/s':>9} {'ms/item':>9}")
+    for result in results:
+        for stage in STAGES:
+            timing = result["stages"].get(stage)
+            if timing is None:
+                continue
+            per_item = timing["seconds"] / timing["items"] * 1000 if timing["items"] else 0.0
+            print(
+                f"{result['size']:>6} {stage:<18} {timing['seconds']:>9.3f} {timing['items']:>6} "
+                f"{timing['items_per_second']:>9.1f} {per_item:>9.1f}"
+            )
+        print(f"{'':>6} {'llm requests':<18} {result['llm_requests']:>9}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark peak memory of the batch stages with and without the article text store.
+
+Each configuration runs in a fresh interpreter (TEXT_STORE is read at import)
+that creates synthetic articles one at a time, as the scraper does, then runs
+deduplication, the relevance prefilter and report writing over the whole
+list. Reports peak RSS (ru_maxrss) and wall time; with the store enabled the
+peak should stay roughly flat as the crawl grows.
+
+    python benchmarks/text_store_bench.py --articles 1000 5000 --chars 40000
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+WORDS = (
+    "the attackers deployed ransomware through a phishing campaign exploiting a vulnerability in "
+    "exposed servers while researchers observed lateral movement credential theft and data exfiltration "
+    "across networks of several organizations in the region during the quarter"
+).split()
+
+
+def make_text(chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = random.choice(WORDS) if random.random() < 0.9 else "%08x" % random.getrandbits(32)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def run_child(count: int, chars: int, output_dir: str) -> None:
+    from threat_intell2.models.data_models import Article
+    from threat_intell2.processors.data_preprocessor import preprocess_data
+    from threat_intell2.processors.relevance_filter import triage_articles
+    from threat_intell2.reporting.report_generator import build_threat_report, save_report
+    from threat_intell2.utils.text_store import spill_text
+
+    random.seed(0)
+    start = time.perf_counter()
+    articles = [
+        spill_text(Article(title=f"Article {index}", text=make_text(chars), url=f"https://example.com/{index}"))
+        for index in range(count)
+    ]
+    articles = triage_articles(preprocess_data(articles))
+    save_report(build_threat_report(articles, []), os.path.join(output_dir, "report.json"))
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mib = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(f"{peak_mib:.1f} {seconds:.2f}")
+
+
+def measure(count: int, chars: int, spill: bool):
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, TEXT_STORE="1" if spill else "0", CACHE_DIR=directory)
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", str(count), str(chars), directory],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout.split()
+    return float(output[-2]), float(output[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--chars", type=int, default=40000, help="Characters per article")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        count, chars, directory = args.child
+        run_child(int(count), int(chars), directory)
+        return
+    print(f"{'articles':>9} {'text store':<11} {'peak MiB':>9} {'seconds':>8}")
+    for count in args.articles:
+        for spill in (False, True):
+            peak, seconds = measure(count, args.chars, spill)
+            print(f"{count:>9} {'on' if spill else 'off':<11} {peak:>9.1f} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ..utils.logging_config import logger
+
+
+def make_cache_key(model: str, prompt_template: str, chunk: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, prompt_template, chunk):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") hash differently
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed, content-addressed cache of chunk analyses.
+
+    Entries older than `max_age` seconds are treated as misses. `evict()`
+    purges them and then removes the least recently used entries until at
+    most `max_entries` entries and `max_bytes` bytes of analyses are stored.
+    Access times are kept in memory and written in one batch by `evict()`
+    or `close()`, so cache hits do not write to the database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 50000,
+        max_age: Optional[float] = None,
+        enabled: bool = True,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_accessed ON analyses(accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or (self.max_age is not None and now - row[1] > self.max_age):
+                # Expired entries are left for evict() to purge
+                self.misses += 1
+                return None
+            self._accessed[key] = now
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            conn.commit()
+            self._accessed.pop(key, None)
+
+    def _flush_accessed(self, conn: sqlite3.Connection) -> None:
+        if self._accessed:
+            conn.executemany(
+                "UPDATE analyses SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            conn.commit()
+            self._accessed.clear()
+
+    def evict(self) -> int:
+        """Apply age-, count- and size-based eviction, returning the number of removed entries."""
+        with self._lock:
+            conn = self._connection()
+            self._flush_accessed(conn)
+            removed = 0
+            if self.max_age is not None:
+                removed += conn.execute(
+                    "DELETE FROM analyses WHERE created_at < ?", (time.time() - self.max_age,)
+                ).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM analyses WHERE key IN "
+                    "(SELECT key FROM analyses ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+            if self.max_bytes is not None:
+                excess = conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM analyses"
+                ).fetchone()[0] - self.max_bytes
+                if excess > 0:
+                    evicted = []
+                    for key, size in conn.execute(
+                        "SELECT key, LENGTH(CAST(value AS BLOB)) FROM analyses ORDER BY accessed_at ASC"
+                    ):
+                        if excess <= 0:
+                            break
+                        evicted.append((key,))
+                        excess -= size
+                    removed += conn.executemany("DELETE FROM analyses WHERE key = ?", evicted).rowcount
+            conn.commit()
+        if removed:
+            logger.info(f"Analysis cache evicted {removed} entries")
+        return removed
+
+    def invalidate(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM analyses")
+            conn.commit()
+        logger.info("Analysis cache invalidated")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_accessed(self._conn)
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..config import ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_MAX_BYTES, ANALYSIS_CACHE_MAX_AGE
+
+    parser = argparse.ArgumentParser(description="Inspect or reset the LLM analysis cache.")
+    parser.add_argument("--invalidate", action="store_true", help="Remove every cached analysis")
+    parser.add_argument("--evict", action="store_true", help="Apply age-, count- and size-based eviction")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(
+        ANALYSIS_CACHE_PATH,
+        max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+        max_age=ANALYSIS_CACHE_MAX_AGE,
+        max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+    )
+    if args.invalidate:
+        cache.invalidate()
+    if args.evict:
+        cache.evict()
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
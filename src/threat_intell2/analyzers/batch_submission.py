@@ -0,0 +1,232 @@
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..checkpoint import RunCheckpoint
+from ..config import DEFAULT_MODEL
+from ..models.data_models import Article
+from ..utils import json_codec
+from ..utils.logging_config import logger
+from ..utils.text_processing import chunk_texts
+from ..utils.text_store import article_text
+from .data_analyzer import (
+    MAX_COMPLETION_TOKENS,
+    TEXT_GROUP_SIZE,
+    _cache_analysis,
+    analysis_cache,
+    build_messages,
+    build_packed_messages,
+    chunk_cache_key,
+    combine_article_analyses,
+    get_client,
+    packed_cache_key,
+    packed_max_tokens,
+    parse_analysis_content,
+    parse_packed_content,
+    plan_analysis,
+)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+REQUESTS_FILE = "batch_requests.jsonl"
+MANIFEST_FILE = "batch_manifest.json"
+RESULTS_FILE = "batch_results.jsonl"
+SUBMISSION_FILE = "batch_submission.json"
+
+RUNNING_STATES = ("validating", "in_progress", "finalizing", "cancelling")
+
+
+def _request_line(custom_id: str, messages: List[Dict[str, str]], max_tokens: int) -> bytes:
+    return json_codec.dumps({
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": DEFAULT_MODEL, "messages": messages, "temperature": 0, "max_tokens": max_tokens},
+    }) + b"\n"
+
+
+def _chunked(articles: List[Article]) -> Iterator[Tuple[Article, List[str]]]:
+    # Chunked a group at a time, so texts spilled to the text store are not all loaded at once
+    for start in range(0, len(articles), TEXT_GROUP_SIZE):
+        group = articles[start:start + TEXT_GROUP_SIZE]
+        yield from zip(group, chunk_texts([article_text(article) for article in group]))
+
+
+def write_batch_file(articles: List[Article], directory: str) -> Tuple[str, int]:
+    """
+    Write the analysis requests for `articles` (packed and chunked exactly as
+    online analysis would send them) to an OpenAI Batch API input file in
+    `directory`, with a manifest mapping every request back to its articles.
+    Cached analyses are kept in the manifest instead of being requested.
+    Returns the input file's path and the number of requests in it.
+    """
+    cached, packs, singles = plan_analysis(articles)
+    manifest: Dict[str, Dict[str, Any]] = {
+        str(article.url): {"url": str(article.url), "title": article.title, "parts": []} for article in articles
+    }
+    for url, analysis in cached.items():
+        manifest[url]["parts"].append({"analysis": analysis})
+
+    requests_path = os.path.join(directory, REQUESTS_FILE)
+    count = 0
+    with open(requests_path + ".tmp", "wb") as f:
+        for pack in packs:
+            custom_id = f"request-{count}"
+            messages = build_packed_messages([article_text(article) for article in pack])
+            f.write(_request_line(custom_id, messages, packed_max_tokens(len(pack))))
+            count += 1
+            for slot, article in enumerate(pack):
+                manifest[str(article.url)]["parts"].append({
+                    "request": custom_id, "slot": slot, "size": len(pack),
+                    "cache_key": packed_cache_key(article_text(article)),
+                })
+        for article, chunks in _chunked(singles):
+            for chunk in chunks:
+                key = chunk_cache_key(chunk)
+                analysis = analysis_cache.get(key)
+                if analysis is not None:
+                    manifest[str(article.url)]["parts"].append({"analysis": analysis})
+                    continue
+                custom_id = f"request-{count}"
+                f.write(_request_line(custom_id, build_messages(chunk), MAX_COMPLETION_TOKENS))
+                count += 1
+                manifest[str(article.url)]["parts"].append({"request": custom_id, "cache_key": key})
+    os.replace(requests_path + ".tmp", requests_path)
+    with open(os.path.join(directory, MANIFEST_FILE), "wb") as f:
+        f.write(json_codec.dumps(list(manifest.values())))
+    logger.info(f"Wrote {count} batch requests for {len(articles)} articles to {requests_path}")
+    return requests_path, count
+
+
+def read_batch_results(path: str) -> Dict[str, str]:
+    """Response content by request id for the successful requests of a Batch API output file."""
+    contents = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json_codec.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logger.warning(
+                    f"Batch request {record.get('custom_id')} failed: "
+                    f"{record.get('error') or response.get('status_code')}"
+                )
+                continue
+            contents[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return contents
+
+
+def ingest_batch_results(directory: str, results_path: Optional[str] = None) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Rebuild per-article analyses from a Batch API output file and the
+    manifest written alongside the requests, caching every parsed analysis
+    as online requests do. Returns `(url, analysis)` pairs in article order;
+    the analysis is None when none of an article's requests succeeded.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), "rb") as f:
+        manifest = json_codec.loads(f.read())
+    contents = read_batch_results(results_path or os.path.join(directory, RESULTS_FILE))
+    packed: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+    results = []
+    for entry in manifest:
+        analyses = []
+        for part in entry["parts"]:
+            if "analysis" in part:
+                analyses.append(part["analysis"])
+                continue
+            content = contents.get(part["request"])
+            if content is None:
+                continue
+            if "slot" in part:
+                if part["request"] not in packed:
+                    packed[part["request"]] = parse_packed_content(content, part["size"])
+                analysis = packed[part["request"]][part["slot"]]
+                if analysis is None:
+                    continue
+                analysis_cache.set(part["cache_key"], analysis)
+            else:
+                analysis = parse_analysis_content(content)
+                _cache_analysis(part["cache_key"], content, analysis)
+            analyses.append(analysis)
+        result = None
+        if analyses:
+            result = {"title": entry["title"], "url": entry["url"], "analysis": combine_article_analyses(analyses)}
+        results.append((entry["url"], result))
+    return results
+
+
+def ingest_into_checkpoint(checkpoint: RunCheckpoint, results_path: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Record the batch analyses as the run's analyze_data stage, so resuming the
+    run writes the report. Articles left without an analysis are analyzed
+    online on resume. Returns `(analyzed, missing)` article counts.
+    """
+    analyzed = missing = 0
+    for url, result in ingest_batch_results(checkpoint.directory, results_path):
+        if result is None:
+            missing += 1
+            continue
+        checkpoint.append("analyze_data", {"url": url, "result": result})
+        analyzed += 1
+    checkpoint.mark_completed("analyze_data")
+    logger.info(f"Ingested batch analyses for run {checkpoint.run_id}: {analyzed} articles, {missing} missing")
+    return analyzed, missing
+
+
+def submit_batch(directory: str) -> str:
+    """Upload the run's request file and create a Batch API job for it, returning the batch id."""
+    client = get_client()
+    with open(os.path.join(directory, REQUESTS_FILE), "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window="24h")
+    with open(os.path.join(directory, SUBMISSION_FILE), "wb") as f:
+        f.write(json_codec.dumps({"batch_id": batch.id, "input_file_id": input_file.id}))
+    logger.info(f"Submitted batch {batch.id}")
+    return batch.id
+
+
+def fetch_batch_results(directory: str) -> Optional[str]:
+    """
+    Download the output of the run's submitted batch once it has stopped
+    running, returning the results file path, or None while it is still running.
+    """
+    with open(os.path.join(directory, SUBMISSION_FILE), "rb") as f:
+        batch_id = json_codec.loads(f.read())["batch_id"]
+    client = get_client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status in RUNNING_STATES:
+        logger.info(f"Batch {batch_id} is {batch.status}")
+        return None
+    if not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch_id} ended with status {batch.status} and no output")
+    if batch.status != "completed":
+        # Expired or cancelled batches still return the requests that finished
+        logger.warning(f"Batch {batch_id} ended with status {batch.status}; using its partial output")
+    path = os.path.join(directory, RESULTS_FILE)
+    with open(path, "wb") as f:
+        f.write(client.files.content(batch.output_file_id).content)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the analysis of a checkpointed run through the Batch API.")
+    parser.add_argument("--run", default="latest", help="Run id (default: the latest checkpointed run)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("submit", help="Upload the run's batch requests and create a batch")
+    commands.add_parser("fetch", help="Download the batch output once it has finished")
+    ingest_parser = commands.add_parser("ingest", help="Record the batch output as the run's analyses")
+    ingest_parser.add_argument("--results", help="Batch output file (default: the one downloaded by fetch)")
+    args = parser.parse_args()
+
+    run_id = RunCheckpoint.latest() if args.run == "latest" else args.run
+    if run_id is None or not RunCheckpoint.exists(run_id):
+        parser.error(f"no checkpoint for run {args.run}")
+    run_checkpoint = RunCheckpoint(run_id)
+    if args.command == "submit":
+        print(submit_batch(run_checkpoint.directory))
+    elif args.command == "fetch":
+        print(fetch_batch_results(run_checkpoint.directory) or "still running")
+    else:
+        ingest_into_checkpoint(run_checkpoint, args.results)
+        print(f"Resume with: python -m threat_intell2.main --resume {run_id}")
@@ -1,52 +1,140 @@
-from typing import List, Dict, Any
+import asyncio
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from ..utils.logging_config import logger
-from ..utils.text_processing import chunk_text
-from openai import OpenAI
-from openai import OpenAIError
-from ..config import OPENAI_API_KEY, DEFAULT_MODEL
+from ..utils.metrics import metrics
+from ..utils.text_processing import chunk_text, chunk_texts, count_tokens_batch
+from ..utils.text_store import article_text
+from ..config import (
+    require_openai_api_key,
+    OPENAI_BASE_URL,
+    DEFAULT_MODEL,
+    ANALYSIS_CONCURRENCY,
+    ANALYSIS_CACHE_ENABLED,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_MAX_BYTES,
+    ANALYSIS_CACHE_MAX_AGE,
+    ANALYSIS_PACKING,
+    MAX_TOKENS_PER_CHUNK,
+    PACK_MAX_ARTICLES,
+    PACK_MAX_ARTICLE_TOKENS,
+    PACK_RESPONSE_TOKENS,
+)
+from .analysis_cache import AnalysisCache, make_cache_key
 import json
 from ..models.data_models import Article
 from ..models.data_models import ThreatLandscapeItem
-from ..processors.entity_extractor import extract_entities
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 import re
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# The openai package is imported and the clients built on first request, so
+# importing this module neither pays for the SDK nor requires an API key.
+@lru_cache(maxsize=None)
+def get_client():
+    from openai import OpenAI
 
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(3))
-def analyze_chunk(chunk):
+    return OpenAI(api_key=require_openai_api_key(), base_url=OPENAI_BASE_URL)
+
+@lru_cache(maxsize=None)
+def get_async_client():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=require_openai_api_key(), base_url=OPENAI_BASE_URL)
+
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_PATH,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    max_age=ANALYSIS_CACHE_MAX_AGE,
+    max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+    enabled=ANALYSIS_CACHE_ENABLED,
+)
+
+ANALYSIS_KEYS = ['Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations']
+MAX_COMPLETION_TOKENS = 1000
+TEXT_GROUP_SIZE = 64  # Articles whose texts are tokenized together when planning
+
+SYSTEM_PROMPT = "You are a cybersecurity analyst specializing in threat intelligence. Your task is to analyze the given text and provide a structured JSON response."
+
+def build_messages(chunk: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            "Analyze the following text and provide a JSON response with these keys: "
+            "'Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations'. "
+            "Ensure all values are strings, and use empty strings for any sections without relevant information. "
+            "Format lists as comma-separated strings within quotes. "
+            "Your response should be a valid JSON object.\n\n"
+            f"Text to analyze:\n{chunk}"
+        )}
+    ]
+
+# Prompt with a placeholder for the chunk; part of the cache key so prompt changes invalidate entries
+PROMPT_TEMPLATE = json.dumps(build_messages("{chunk}"))
+
+# Article delimiter lines inside an article's own text are defused so they cannot split it
+_DELIMITER_RE = re.compile(r"^###(?= (?:END )?ARTICLE\b)", re.MULTILINE)
+
+def build_packed_messages(texts: List[str]) -> List[Dict[str, str]]:
+    """Messages asking for a separate analysis of each of several short articles."""
+    sections = "\n\n".join(
+        f"### ARTICLE {number}\n{_DELIMITER_RE.sub('##', text)}\n### END ARTICLE {number}"
+        for number, text in enumerate(texts, 1)
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"Analyze each of the following {len(texts)} articles separately. Each article starts with a line "
+            "'### ARTICLE <n>' and ends with a line '### END ARTICLE <n>'. "
+            "Provide a JSON response that maps each article number, as a string, to an object with these keys: "
+            "'Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations'. "
+            "Only use information from the article itself for its object. "
+            "Ensure all values are strings, and use empty strings for any sections without relevant information. "
+            "Format lists as comma-separated strings within quotes. "
+            "Your response should be a valid JSON object.\n\n"
+            f"Articles to analyze:\n{sections}"
+        )}
+    ]
+
+PACKED_PROMPT_TEMPLATE = json.dumps(build_packed_messages(["{article}"]))
+
+def packed_max_tokens(count: int) -> int:
+    return max(MAX_COMPLETION_TOKENS, PACK_RESPONSE_TOKENS * count)
+
+def chunk_cache_key(chunk: str) -> str:
+    return make_cache_key(DEFAULT_MODEL, PROMPT_TEMPLATE, chunk)
+
+def packed_cache_key(text: str) -> str:
+    return make_cache_key(DEFAULT_MODEL, PACKED_PROMPT_TEMPLATE, text)
+
+def _cache_analysis(key: str, content: str, analysis: Dict[str, Any]) -> None:
+    # Only well-formed responses are cached so malformed ones get retried on the next run
+    try:
+        json.loads(content)
+    except (TypeError, ValueError):
+        return
+    analysis_cache.set(key, analysis)
+
+def _normalize_analysis(parsed_content: Dict[str, Any]) -> Dict[str, Any]:
+    # Ensure all keys are present
+    for key in ANALYSIS_KEYS:
+        if key not in parsed_content:
+            parsed_content[key] = ""
+    return {
+        'Executive_Summary': parsed_content.get('Executive_Summary', ''),
+        'Threat_Actors': parsed_content.get('Threat_Actors', '').split(', '),
+        'TTPs': parsed_content.get('TTPs', '').split(', '),
+        'IOCs': parsed_content.get('IOCs', '').split(', '),
+        'Global_Impact': parsed_content.get('Global_Impact', ''),
+        'Recommendations': parsed_content.get('Recommendations', '').split(', ')
+    }
+
+def parse_analysis_content(content: str) -> Dict[str, Any]:
     try:
-        response = client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a cybersecurity analyst specializing in threat intelligence. Your task is to analyze the given text and provide a structured JSON response."},
-                {"role": "user", "content": (
-                    "Analyze the following text and provide a JSON response with these keys: "
-                    "'Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations'. "
-                    "Ensure all values are strings, and use empty strings for any sections without relevant information. "
-                    "Format lists as comma-separated strings within quotes. "
-                    "Your response should be a valid JSON object.\n\n"
-                    f"Text to analyze:\n{chunk}"
-                )}
-            ],
-            temperature=0,
-            max_tokens=1000
-        )
-        content = response.choices[0].message.content
         # Attempt to parse JSON immediately to catch any issues
         parsed_content = json.loads(content)
-        # Ensure all keys are present
-        for key in ['Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations']:
-            if key not in parsed_content:
-                parsed_content[key] = ""
-        return {
-            'Executive_Summary': parsed_content.get('Executive_Summary', ''),
-            'Threat_Actors': parsed_content.get('Threat_Actors', '').split(', '),
-            'TTPs': parsed_content.get('TTPs', '').split(', '),
-            'IOCs': parsed_content.get('IOCs', '').split(', '),
-            'Global_Impact': parsed_content.get('Global_Impact', ''),
-            'Recommendations': parsed_content.get('Recommendations', '').split(', ')
-        }
+        return _normalize_analysis(parsed_content)
     except json.JSONDecodeError as json_err:
         logger.error(f"Invalid JSON response from OpenAI: {str(json_err)}")
         logger.debug(f"Raw response: {content}")
@@ -58,10 +146,114 @@ def analyze_chunk(chunk):
             'Global_Impact': '',
             'Recommendations': []
         }
+
+def parse_packed_content(content: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """Per-article analyses of a packed response; None for articles missing or malformed in it."""
+    try:
+        parsed_content = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as json_err:
+        logger.error(f"Invalid JSON response from OpenAI for a packed request: {str(json_err)}")
+        logger.debug(f"Raw response: {content}")
+        return [None] * count
+    if not isinstance(parsed_content, dict):
+        return [None] * count
+    analyses = []
+    for number in range(1, count + 1):
+        item = parsed_content.get(str(number))
+        try:
+            analyses.append(_normalize_analysis(item) if isinstance(item, dict) else None)
+        except AttributeError:
+            # A section that is not a string
+            analyses.append(None)
+    return analyses
+
+def _record_retry(retry_state) -> None:
+    metrics.incr("llm_retries")
+
+def _record_usage(response, started: float) -> None:
+    metrics.incr("llm_requests")
+    metrics.observe("llm_latency_seconds", time.perf_counter() - started)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.incr("llm_prompt_tokens", usage.prompt_tokens or 0)
+        metrics.incr("llm_completion_tokens", usage.completion_tokens or 0)
+
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(3), before_sleep=_record_retry)
+def request_completion(messages: List[Dict[str, str]], max_tokens: int = MAX_COMPLETION_TOKENS) -> str:
+    from openai import OpenAIError
+
+    try:
+        started = time.perf_counter()
+        response = get_client().chat.completions.create(
+            model=DEFAULT_MODEL,
+            messages=messages,
+            temperature=0,
+            max_tokens=max_tokens
+        )
+        _record_usage(response, started)
+        return response.choices[0].message.content
+    except OpenAIError as e:
+        logger.error(f"OpenAI API error: {str(e)}")
+        metrics.incr("llm_errors")
+        raise
+
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(3), before_sleep=_record_retry)
+async def request_completion_async(messages: List[Dict[str, str]], max_tokens: int = MAX_COMPLETION_TOKENS) -> str:
+    from openai import OpenAIError
+
+    try:
+        started = time.perf_counter()
+        response = await get_async_client().chat.completions.create(
+            model=DEFAULT_MODEL,
+            messages=messages,
+            temperature=0,
+            max_tokens=max_tokens
+        )
+        _record_usage(response, started)
+        return response.choices[0].message.content
     except OpenAIError as e:
         logger.error(f"OpenAI API error: {str(e)}")
+        metrics.incr("llm_errors")
         raise
 
+def request_analysis(chunk: str) -> str:
+    return request_completion(build_messages(chunk))
+
+async def request_analysis_async(chunk: str) -> str:
+    return await request_completion_async(build_messages(chunk))
+
+def analyze_chunk(chunk):
+    key = chunk_cache_key(chunk)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    content = request_analysis(chunk)
+    analysis = parse_analysis_content(content)
+    _cache_analysis(key, content, analysis)
+    return analysis
+
+async def analyze_chunk_async(chunk):
+    key = chunk_cache_key(chunk)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    content = await request_analysis_async(chunk)
+    analysis = parse_analysis_content(content)
+    _cache_analysis(key, content, analysis)
+    return analysis
+
+def log_cache_stats() -> None:
+    if not analysis_cache.enabled:
+        return
+    analysis_cache.evict()
+    stats = analysis_cache.stats()
+    metrics.set_counter("llm_cache_hits", stats["hits"])
+    metrics.set_counter("llm_cache_misses", stats["misses"])
+    logger.info(
+        f"Analysis cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries"
+    )
+
 def salvage_analysis(analysis_str: str) -> Dict[str, Any]:
     salvaged = {}
     keys = ['Executive_Summary', 'Threat_Actors', 'TTPs', 'IOCs', 'Global_Impact', 'Recommendations']
@@ -107,7 +299,7 @@ def analyze_data(articles: List[Article]) -> List[Dict[str, Any]]:
     all_analyses = []
 
     for article in articles:
-        chunks = chunk_text(article.text)
+        chunks = chunk_text(article_text(article))
         article_analysis = []
         for chunk in chunks:
             try:
@@ -124,5 +316,168 @@ def analyze_data(articles: List[Article]) -> List[Dict[str, Any]]:
                 "analysis": combined_analysis
             })
 
+    log_cache_stats()
+    logger.info("END: Data Analysis completed successfully.")
+    return all_analyses
+
+def article_result(article: Article, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "title": article.title,
+        "url": str(article.url),
+        "analysis": combine_article_analyses(analyses)
+    }
+
+def pack_articles(
+    sized: List[Tuple[int, Article]],
+    budget: int = MAX_TOKENS_PER_CHUNK,
+    max_articles: int = PACK_MAX_ARTICLES,
+) -> List[List[Article]]:
+    """
+    Group `(cost, article)` pairs into packs whose costs add up to at most
+    `budget`, first-fit in order of decreasing cost.
+    """
+    packs: List[Tuple[List[int], List[Article]]] = []
+    for cost, article in sorted(sized, key=lambda item: -item[0]):
+        for used, pack in packs:
+            if used[0] + cost <= budget and len(pack) < max_articles:
+                used[0] += cost
+                pack.append(article)
+                break
+        else:
+            packs.append(([cost], [article]))
+    return [pack for _, pack in packs]
+
+def plan_analysis(articles: List[Article]) -> Tuple[Dict[str, Dict[str, Any]], List[List[Article]], List[Article]]:
+    """
+    Split `articles` into `(cached, packs, singles)`: cached analyses of short
+    articles by URL, packs of short articles analyzed in one request each,
+    and articles analyzed on their own, chunk by chunk.
+
+    An article costs its text tokens plus PACK_RESPONSE_TOKENS of reserved
+    output, so a pack's prompt and completion together stay within the
+    envelope of a single-chunk request.
+    """
+    if not ANALYSIS_PACKING:
+        return {}, [], list(articles)
+    cached, short, singles = {}, [], []
+    # Counted in groups, so texts spilled to the text store are loaded a group at a time
+    for start in range(0, len(articles), TEXT_GROUP_SIZE):
+        group = articles[start:start + TEXT_GROUP_SIZE]
+        texts = [article_text(article) for article in group]
+        for article, text, tokens in zip(group, texts, count_tokens_batch(texts)):
+            if tokens > PACK_MAX_ARTICLE_TOKENS:
+                singles.append(article)
+                continue
+            analysis = analysis_cache.get(packed_cache_key(text))
+            if analysis is not None:
+                cached[str(article.url)] = analysis
+            else:
+                short.append((tokens + PACK_RESPONSE_TOKENS, article))
+    packs = []
+    for pack in pack_articles(short):
+        if len(pack) > 1:
+            packs.append(pack)
+        else:
+            singles.extend(pack)
+    return cached, packs, singles
+
+async def analyze_pack_async(pack: List[Article], semaphore: asyncio.Semaphore) -> List[Optional[Dict[str, Any]]]:
+    """
+    Analyze several short articles in one request. Articles the response
+    does not cover are analyzed again on their own.
+    """
+    async with semaphore:
+        try:
+            content = await request_completion_async(
+                build_packed_messages([article_text(article) for article in pack]), packed_max_tokens(len(pack))
+            )
+            analyses = parse_packed_content(content, len(pack))
+        except Exception as e:
+            logger.error(f"Error analyzing a pack of {len(pack)} articles: {str(e)}")
+            analyses = [None] * len(pack)
+    metrics.incr("llm_packed_requests")
+    metrics.incr("llm_packed_articles", len(pack))
+
+    async def finish(article: Article, analysis: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if analysis is None:
+            metrics.incr("llm_pack_fallbacks")
+            return await analyze_article_async(article, semaphore)
+        analysis_cache.set(packed_cache_key(article_text(article)), analysis)
+        return article_result(article, [analysis])
+
+    return list(await asyncio.gather(*[finish(article, analysis) for article, analysis in zip(pack, analyses)]))
+
+async def _analyze_chunk_limited(article: Article, chunk: str, semaphore: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    async with semaphore:
+        try:
+            return await analyze_chunk_async(chunk)
+        except Exception as e:
+            logger.error(f"Error analyzing chunk from article {article.title}: {str(e)}")
+            return None
+
+async def analyze_article_async(
+    article: Article, semaphore: asyncio.Semaphore, chunks: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    if chunks is None:
+        chunks = chunk_text(article_text(article))
+    with metrics.article(article.url, "analyze_data", cpu=False):
+        results = await asyncio.gather(*[_analyze_chunk_limited(article, chunk, semaphore) for chunk in chunks])
+    # gather keeps chunk order, so the combined analysis matches the sequential path
+    article_analysis = [analysis for analysis in results if analysis is not None]
+    if not article_analysis:
+        return None
+    return article_result(article, article_analysis)
+
+async def analyze_data_async(
+    articles: List[Article],
+    concurrency: int = ANALYSIS_CONCURRENCY,
+    on_result: Optional[Callable[[Article, Optional[Dict[str, Any]]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Concurrent counterpart of analyze_data: chunks of all articles are analyzed
+    in parallel, with at most `concurrency` requests in flight, and short
+    articles are packed several to a request (see plan_analysis). `on_result`
+    is called with each article and its analysis (or None) as soon as it is done.
+    """
+    logger.info("START: Data Analysis")
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    cached, packs, singles = plan_analysis(articles)
+    if packs:
+        logger.info(f"Packed {sum(len(pack) for pack in packs)} short articles into {len(packs)} requests")
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def record(article: Article, result: Optional[Dict[str, Any]]) -> None:
+        results[str(article.url)] = result
+        if on_result is not None:
+            on_result(article, result)
+
+    async def analyze(article: Article, chunks: List[str]) -> None:
+        record(article, await analyze_article_async(article, semaphore, chunks))
+
+    async def analyze_pack(pack: List[Article]) -> None:
+        for article, result in zip(pack, await analyze_pack_async(pack, semaphore)):
+            record(article, result)
+
+    for article in articles:
+        if str(article.url) in cached:
+            record(article, article_result(article, [cached[str(article.url)]]))
+    if any(article.text_ref and not article.text for article in singles):
+        # Texts on disk are loaded and chunked an article at a time as slots free up,
+        # so only the articles in flight hold their text and chunks in memory
+        article_slots = asyncio.Semaphore(max(1, concurrency) * 2)
+
+        async def analyze_spilled(article: Article) -> None:
+            async with article_slots:
+                await analyze(article, chunk_text(article_text(article)))
+
+        jobs = [analyze_spilled(article) for article in singles]
+    else:
+        # All single articles are chunked with one batched encoding call
+        chunked = chunk_texts([article.text for article in singles]) if singles else []
+        jobs = [analyze(article, chunks) for article, chunks in zip(singles, chunked)]
+    await asyncio.gather(*jobs, *[analyze_pack(pack) for pack in packs])
+    # Reported in input order whichever way each article was analyzed
+    all_analyses = [results[str(article.url)] for article in articles if results.get(str(article.url))]
+    log_cache_stats()
     logger.info("END: Data Analysis completed successfully.")
     return all_analyses
@@ -0,0 +1,163 @@
+import inspect
+import os
+import shutil
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from .config import CHECKPOINT_BATCH_SIZE, CHECKPOINT_DIR
+from .models.data_models import Article
+from .utils import json_codec
+from .utils.logging_config import logger
+from .utils.metrics import metrics
+
+
+class RunCheckpoint:
+    """
+    Per-run directory of stage outputs, one NDJSON record per article.
+
+    A stage's file is complete once its `.done` marker exists; a stage that
+    records units as it goes (see `append`) keeps whatever it finished before
+    an interruption, so a resumed run only redoes the missing units.
+    """
+
+    def __init__(self, run_id: str, root: str = CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.directory = os.path.join(root, run_id)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def exists(run_id: str, root: str = CHECKPOINT_DIR) -> bool:
+        return os.path.isdir(os.path.join(root, run_id))
+
+    @staticmethod
+    def latest(root: str = CHECKPOINT_DIR) -> Optional[str]:
+        if not os.path.isdir(root):
+            return None
+        runs = sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+        return runs[-1] if runs else None
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.ndjson")
+
+    def completed(self, stage: str) -> bool:
+        return os.path.exists(self._path(stage) + ".done")
+
+    def load(self, stage: str) -> List[Dict[str, Any]]:
+        path = self._path(stage)
+        if not os.path.exists(path):
+            return []
+        records = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    records.append(json_codec.loads(line))
+                except ValueError:
+                    # A line cut short by a crash; the unit is simply redone
+                    logger.warning(f"Skipping truncated checkpoint record in {path}")
+        return records
+
+    def append(self, stage: str, record: Dict[str, Any]) -> None:
+        with self._lock, open(self._path(stage), "a+b") as f:
+            line = json_codec.dumps(record) + b"\n"
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Start a new line after a record cut short by a crash
+                    line = b"\n" + line
+            f.write(line)
+
+    def save(self, stage: str, records: List[Dict[str, Any]]) -> None:
+        """Write a finished stage's output in one go and mark it complete."""
+        path = self._path(stage)
+        with open(path + ".tmp", "wb") as f:
+            for record in records:
+                f.write(json_codec.dumps(record) + b"\n")
+        os.replace(path + ".tmp", path)
+        self.mark_completed(stage)
+
+    def mark_completed(self, stage: str) -> None:
+        open(self._path(stage) + ".done", "wb").close()
+
+    def remove(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+async def checkpointed_stage(
+    checkpoint: Optional[RunCheckpoint],
+    stage: str,
+    run: Callable[[], Union[List[Article], Awaitable[List[Article]]]],
+) -> List[Article]:
+    """
+    Run a stage that produces articles under `metrics.stage`, or load its
+    output from `checkpoint` when a previous attempt of the run completed it.
+    """
+    if checkpoint is not None and checkpoint.completed(stage):
+        articles = [Article.model_validate(record) for record in checkpoint.load(stage)]
+        logger.info(f"Loaded {len(articles)} articles for {stage} from checkpoint {checkpoint.run_id}")
+        return articles
+    with metrics.stage(stage):
+        result = run()
+        articles = await result if inspect.isawaitable(result) else result
+    if checkpoint is not None:
+        checkpoint.save(stage, [article.model_dump(mode="json") for article in articles])
+    return articles
+
+
+def checkpointed_article_stage(
+    checkpoint: Optional[RunCheckpoint],
+    stage: str,
+    articles: List[Article],
+    process: Callable[[List[Article]], List[Article]],
+    batch_size: int = CHECKPOINT_BATCH_SIZE,
+) -> List[Article]:
+    """
+    Run a stage that processes articles independently (e.g. entity
+    extraction) in batches of `batch_size`, recording each batch's output
+    as it completes. On resume only articles without a record are processed.
+    """
+    if checkpoint is None:
+        with metrics.stage(stage):
+            return process(articles)
+    done = {record["url"]: Article.model_validate(record) for record in checkpoint.load(stage)}
+    remaining = [article for article in articles if str(article.url) not in done]
+    if done:
+        logger.info(f"Loaded {len(done)} articles for {stage} from checkpoint {checkpoint.run_id}, {len(remaining)} remaining")
+    with metrics.stage(stage):
+        for start in range(0, len(remaining), max(1, batch_size)):
+            for article in process(remaining[start:start + batch_size]):
+                done[str(article.url)] = article
+                checkpoint.append(stage, article.model_dump(mode="json"))
+    checkpoint.mark_completed(stage)
+    return [done[str(article.url)] for article in articles if str(article.url) in done]
+
+
+async def checkpointed_analysis(
+    checkpoint: Optional[RunCheckpoint],
+    articles: List[Article],
+    analyze: Callable[..., Awaitable[List[Dict[str, Any]]]],
+) -> List[Dict[str, Any]]:
+    """
+    Run `analyze` (analyze_data_async) recording each article's analysis as
+    soon as it finishes. On resume only articles without a recorded
+    analysis are sent to the LLM again.
+    """
+    stage = "analyze_data"
+    if checkpoint is None:
+        with metrics.stage(stage):
+            return await analyze(articles)
+    done = {record["url"]: record["result"] for record in checkpoint.load(stage)}
+    remaining = [article for article in articles if str(article.url) not in done]
+    if done:
+        logger.info(f"Loaded {len(done)} analyses from checkpoint {checkpoint.run_id}, {len(remaining)} remaining")
+
+    def record(article: Article, result: Optional[Dict[str, Any]]) -> None:
+        # Failed analyses are not recorded, so a resumed run retries them
+        if result is not None:
+            done[str(article.url)] = result
+            checkpoint.append(stage, {"url": str(article.url), "result": result})
+
+    with metrics.stage(stage):
+        await analyze(remaining, on_result=record)
+    checkpoint.mark_completed(stage)
+    return [done[str(article.url)] for article in articles if done.get(str(article.url))]
@@ -6,6 +6,7 @@ load_dotenv()
 
 # OpenAI API configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # Override to point at a proxy or a local stand-in
 DEFAULT_MODEL = "gpt-4"
 
 # Scraping configuration
@@ -15,7 +16,7 @@ HEADERS = {
 
 
 # Number of articles to scrape per website
-ARTICLES_PER_WEBSITE = 5  # Adjust this number as needed
+ARTICLES_PER_WEBSITE = int(os.getenv('ARTICLES_PER_WEBSITE', 5))  # Adjust this number as needed
 
 # Websites to scrape
 WEBSITES = [
@@ -25,8 +26,63 @@ WEBSITES = [
     "https://www.microsoft.com/en-us/security/blog/topic/threat-intelligence/"
 ]
 
+# Additional listing pages, one URL per line ("#" starts a comment)
+WEBSITES_FILE = os.getenv('WEBSITES_FILE')
+if WEBSITES_FILE:
+    with open(WEBSITES_FILE) as websites_file:
+        WEBSITES = WEBSITES + [
+            line.split('#', 1)[0].strip() for line in websites_file if line.split('#', 1)[0].strip()
+        ]
+
+# Article link discovery: "auto" uses configured or advertised RSS/Atom feeds and sitemaps,
+# falling back to anchors on the listing page; "html" only parses listing page anchors
+LINK_DISCOVERY = os.getenv('LINK_DISCOVERY', 'auto')
+SITEMAP_MAX_CHILDREN = 3  # Nested sitemaps followed from a sitemap index
+
+# Link filtering rules: regexes a link must match ("include", any of) or must not match ("exclude").
+# Entries in SOURCE_LINK_RULES override the defaults per listing URL and may also list "feeds"/"sitemaps"
+# and crawl settings: "priority" (higher is crawled first), "max_articles" and "max_depth".
+DEFAULT_LINK_RULES = {
+    "include": [r"/blog/", r"/research/"],
+    "exclude": [
+        r"/(category|tag|topic|author|page)/",
+        r"[?&](page|s|share|replytocom)=",
+        r"\.(pdf|zip|png|jpe?g|gif|svg)$",
+        r"/(feed|rss)/?$",
+    ],
+}
+SOURCE_LINK_RULES = {
+    "https://www.crowdstrike.com/blog/category/threat-intel-research/": {
+        "include": [r"crowdstrike\.com/(en-us/)?blog/[^/]+/?$"],
+    },
+    "https://www.wiz.io/blog/tag/research": {
+        "include": [r"wiz\.io/blog/[^/]+/?$"],
+    },
+    "https://www.mandiant.com/resources/blog": {
+        "include": [r"/resources/blog/[^/]+/?$", r"cloud\.google\.com/blog/topics/threat-intelligence/[^/]+/?$"],
+        "same_host": False,  # Newer posts are published on cloud.google.com
+    },
+    "https://www.microsoft.com/en-us/security/blog/topic/threat-intelligence/": {
+        "include": [r"/security/blog/\d{4}/\d{2}/\d{2}/"],
+    },
+}
+
+# Pipeline mode: "batch" runs the stages one after another, "streaming" overlaps them,
+# "workers" shards sources across worker processes through a job queue
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', 'batch')
+PIPELINE_QUEUE_SIZE = 10  # Articles buffered between streaming stages
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', min(4, os.cpu_count() or 1)))
+WORKER_LEASE_SECONDS = 600  # A claimed job is handed out again if its worker stops renewing it this long
+WORKER_MAX_ATTEMPTS = 3
+
 # Concurrency settings
-SEMAPHORE_LIMIT = 5
+SEMAPHORE_LIMIT = 20  # Concurrent HTTP fetches across all hosts
+PER_HOST_CONCURRENCY = int(os.getenv('PER_HOST_CONCURRENCY', 2))  # Concurrent HTTP fetches per host
+KEEPALIVE_TIMEOUT = 30  # Seconds an idle pooled connection is kept open
+REQUEST_TIMEOUT = 60  # Seconds per HTTP request
+EXTRACTION_EXECUTOR = os.getenv('EXTRACTION_EXECUTOR', 'process')  # "process" or "thread" pool for Goose
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', min(4, os.cpu_count() or 1)))
+ANALYSIS_CONCURRENCY = int(os.getenv('ANALYSIS_CONCURRENCY', 8))  # Concurrent OpenAI requests
 
 # Logging configuration
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -35,16 +91,138 @@ LOG_MAX_BYTES = 5 * 1024 * 1024  # 5 MB
 LOG_BACKUP_COUNT = 2
 
 # Rate limiting
-RATE_LIMIT = 1  # Requests per second
+RATE_LIMIT = float(os.getenv('RATE_LIMIT', 1))  # Requests per second, per host
+RATE_LIMIT_BURST = 2  # Requests a host may receive back to back before RATE_LIMIT applies
 MAX_RETRIES = 3
-RETRY_DELAY = 5
+RETRY_DELAY = 5  # Seconds before the first retry when no Retry-After is given; doubles per attempt
+MAX_RETRY_AFTER = int(os.getenv('MAX_RETRY_AFTER', 120))  # Longer Retry-After requests give up on the URL instead
+
+# Crawl frontier
+CRAWL_WORKERS = SEMAPHORE_LIMIT  # Listing pages and articles fetched concurrently
+CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', 2))  # Pagination pages followed past each listing page
+CRAWL_HOST_DELAY = float(os.getenv('CRAWL_HOST_DELAY', 0))  # Extra fixed gap between requests to one host; RATE_LIMIT and RATE_LIMIT_BURST already pace each host
+CRAWL_PERSIST = os.getenv('CRAWL_PERSIST', '1') == '1'  # Keep the frontier on disk so interrupted crawls resume
+CRAWL_RESUME_MAX_AGE = int(os.getenv('CRAWL_RESUME_MAX_AGE', 6 * 3600))  # Older interrupted crawls start over
+PAGINATION_PATTERN = r"(?:/page/|[?&](?:page|paged)=)(\d+)"  # Group 1 is the page number
 
 # Text processing
 MAX_TOKENS_PER_CHUNK = 7000
+CHUNK_BOUNDARY = os.getenv('CHUNK_BOUNDARY', 'sentence')  # Where chunks may be cut: "token", "sentence" or "paragraph"
+CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', 0))  # Tokens repeated at the start of the next chunk
+
+# LLM analysis: set to pack short articles several to a request, within MAX_TOKENS_PER_CHUNK (opt-in: changes the prompt and its cache keys)
+ANALYSIS_PACKING = os.getenv('ANALYSIS_PACKING', '0') == '1'
+PACK_MAX_ARTICLES = int(os.getenv('PACK_MAX_ARTICLES', 8))  # Articles per packed request
+PACK_MAX_ARTICLE_TOKENS = 2000  # Longer articles are analyzed on their own
+PACK_RESPONSE_TOKENS = 350  # Completion tokens reserved per packed article
+# "online" sends analysis requests during the run; "batch" writes them to an OpenAI Batch API input
+# file in the run's checkpoint directory and stops, see analyzers/batch_submission.py
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'online')
+
+# Near-duplicate detection (MinHash + LSH over word shingles)
+NEAR_DUPLICATE_DETECTION = os.getenv('NEAR_DUPLICATE_DETECTION', '1') == '1'
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard similarity above which articles count as duplicates
+SHINGLE_SIZE = 5  # Words per shingle
+MINHASH_SIZE = 64  # Signature length; must be divisible by LSH_BANDS
+LSH_BANDS = 16
+NEAR_DUPLICATE_INDEX_PATH = os.getenv('NEAR_DUPLICATE_INDEX_PATH')  # Set to also match articles from earlier runs
+NEAR_DUPLICATE_INDEX_MAX_ENTRIES = 100000  # Newest articles kept in a persistent index
+NEAR_DUPLICATE_INDEX_MAX_AGE = 90 * 24 * 3600  # Seconds an article stays in a persistent index; None keeps it
+
+# Entity extraction
+SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 16))  # 0 processes articles one at a time
+SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))  # Worker processes used by nlp.pipe
+SPACY_TTP_LABELS = ('EVENT', 'WORK_OF_ART', 'LAW')  # spaCy entity labels recorded as TTPs
+SPACY_IOC_LABELS = ('PRODUCT', 'GPE', 'LOC', 'FAC', 'MONEY', 'CARDINAL')  # spaCy entity labels recorded as IOCs
+
+# Relevance prefilter: articles scoring below RELEVANCE_THRESHOLD (0-1) are not sent to the LLM
+RELEVANCE_FILTER = os.getenv('RELEVANCE_FILTER', '1') == '1'
+RELEVANCE_THRESHOLD = float(os.getenv('RELEVANCE_THRESHOLD', 0.3))
+RELEVANCE_MODEL_PATH = os.getenv('RELEVANCE_MODEL_PATH')  # Trained weights, see processors/relevance_filter.py
+THREAT_KEYWORDS = [
+    "malware", "ransomware", "phishing", "exploit", "exploited", "exploitation", "vulnerability",
+    "vulnerabilities", "zero-day", "0-day", "backdoor", "trojan", "botnet", "loader", "infostealer",
+    "stealer", "spyware", "wiper", "rootkit", "implant", "payload", "dropper", "c2", "command and control",
+    "threat actor", "threat actors", "apt", "campaign", "intrusion", "breach", "compromise", "compromised",
+    "exfiltration", "lateral movement", "persistence", "privilege escalation", "credential", "credentials",
+    "attacker", "attackers", "adversary", "ioc", "iocs", "indicators of compromise", "mitre att&ck", "ttps",
+]
+NON_THREAT_KEYWORDS = [
+    "webinar", "register now", "register today", "join us", "we're hiring", "we are hiring", "careers",
+    "job opening", "apply now", "press release", "announcing", "announces", "now available",
+    "general availability", "product update", "customer story", "award", "pricing", "free trial",
+    "request a demo", "partner program", "conference", "booth",
+]
+# Logistic weights over the prefilter's features, used when no RELEVANCE_MODEL_PATH is set
+RELEVANCE_WEIGHTS = {
+    "bias": -2.0,
+    "keyword_density": 1.5,  # log(1 + threat keywords per 1000 words)
+    "marketing_density": -1.5,  # log(1 + non-threat keywords per 1000 words)
+    "ioc_density": 1.2,  # log(1 + IPs and hashes per 1000 words)
+    "cves": 0.8,  # log(1 + distinct CVEs)
+    "ttps": 0.2,  # log(1 + extracted TTPs)
+    "actors": 0.1,  # log(1 + extracted actors)
+    "title_keyword": 1.5,  # 1 if the title mentions a threat keyword
+}
 
 # Validate configuration
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_KEY environment variable is not set")
+def require_openai_api_key() -> str:
+    # Checked when an OpenAI client is first needed, so scrape-only runs work without a key
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_KEY environment variable is not set")
+    return OPENAI_API_KEY
 
 # Outputs configuration
-OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), 'outputs')
\ No newline at end of file
+OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), 'outputs')
+METRICS_PROMETHEUS = os.getenv('METRICS_PROMETHEUS', '0') == '1'  # Also write metrics in Prometheus text format
+REPORT_FORMAT = os.getenv('REPORT_FORMAT', 'json')  # "json" or "ndjson" (one article per line)
+REPORT_COMPRESSION = os.getenv('REPORT_COMPRESSION') or None  # None, "gzip" or "zstd"
+REPORT_INCLUDE_TEXT = os.getenv('REPORT_INCLUDE_TEXT', '1') == '1'  # Include raw article text in the report
+
+# Per-stage checkpoints of batch runs, resumable with `--resume <run-id>`
+CHECKPOINTS_ENABLED = os.getenv('CHECKPOINTS_ENABLED', '1') == '1'
+CHECKPOINT_DIR = os.path.join(OUTPUTS_DIR, 'runs')
+CHECKPOINT_BATCH_SIZE = 64  # Articles per recorded unit in stages checkpointed per article
+
+# Historical report store (indexed actors, IOCs, TTPs and CVEs across runs)
+REPORT_STORE_ENABLED = os.getenv('REPORT_STORE_ENABLED', '1') == '1'
+REPORT_STORE_PATH = os.getenv('REPORT_STORE_PATH', os.path.join(OUTPUTS_DIR, 'report_store.sqlite'))
+
+# Local caches
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache'))
+
+# Incremental crawling: skip articles unchanged since the previous run
+INCREMENTAL_CRAWL = os.getenv('INCREMENTAL_CRAWL', '0') == '1'
+SEEN_STORE_PATH = os.path.join(CACHE_DIR, 'seen_articles.sqlite')
+CRAWL_FRONTIER_PATH = os.path.join(CACHE_DIR, 'crawl_frontier.sqlite')
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(CACHE_DIR, 'job_queue.sqlite'))  # Shared by workers
+
+# LLM analysis cache
+ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', '1') == '1'
+ANALYSIS_CACHE_PATH = os.path.join(CACHE_DIR, 'analysis_cache.sqlite')
+ANALYSIS_CACHE_MAX_ENTRIES = 50000  # Count of cached analyses; least recently used are evicted first
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # Stored analysis JSON
+ANALYSIS_CACHE_MAX_AGE = 30 * 24 * 3600  # Seconds; None disables age-based eviction
+
+# HTTP response cache for the scraper (aiohttp-client-cache): "sqlite", "filesystem" (one file per
+# response under HTTP_CACHE_PATH) or "memory" (kept for a single run only)
+HTTP_CACHE_BACKEND = os.getenv('HTTP_CACHE_BACKEND', 'sqlite')
+HTTP_CACHE_PATH = os.getenv(
+    'HTTP_CACHE_PATH', os.path.join(CACHE_DIR, 'http_cache.sqlite' if HTTP_CACHE_BACKEND == 'sqlite' else 'http_cache')
+)
+# Seconds a response stays fresh: -1 never expires, 0 disables caching
+HTTP_CACHE_EXPIRE_AFTER = int(os.getenv('HTTP_CACHE_EXPIRE_AFTER', 7 * 24 * 3600))  # Article pages
+HTTP_CACHE_LISTING_EXPIRE_AFTER = int(os.getenv('HTTP_CACHE_LISTING_EXPIRE_AFTER', 3600))  # Listing pages, feeds, sitemaps
+# URL glob -> seconds; the first matching pattern overrides the defaults above
+HTTP_CACHE_URLS_EXPIRE_AFTER = {
+    # "*://www.mandiant.com/resources/blog/*": 30 * 24 * 3600,
+}
+HTTP_CACHE_COMPRESSION = os.getenv('HTTP_CACHE_COMPRESSION', '1') == '1'  # zlib-compress stored responses
+HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # Oldest responses evicted past this; 0 = no limit
+
+# Article text store: with TEXT_STORE=1 article bodies are written to disk as they are scraped and
+# articles keep only a digest, so memory stays flat on large crawls. Workers sharing a job queue
+# must share TEXT_STORE_DIR.
+TEXT_STORE_ENABLED = os.getenv('TEXT_STORE', '0') == '1'
+TEXT_STORE_DIR = os.getenv('TEXT_STORE_DIR', os.path.join(CACHE_DIR, 'texts'))
+TEXT_STORE_MAX_AGE = 30 * 24 * 3600  # Seconds since last use before a stored text is pruned
@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job(NamedTuple):
+    id: int
+    run_id: str
+    position: int
+    url: str
+    attempts: int
+
+
+class JobQueue:
+    """
+    Durable SQLite job queue shared by worker processes.
+
+    A run is a set of jobs, one per source. Workers claim jobs atomically and
+    hold them under a lease renewed by `heartbeat()`; a job whose lease
+    expires (the worker died) is handed out again, up to `max_attempts`
+    times. Results are stored with the job so a merge step can rebuild the
+    run's output in source order. Any process or node that can open the
+    database file can take part, as long as its filesystem supports SQLite
+    locking.
+    """
+
+    def __init__(self, path: str, lease: float = 600.0, max_attempts: int = 3):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: claims use explicit BEGIN IMMEDIATE transactions
+            self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, position INTEGER NOT NULL, url TEXT NOT NULL, "
+                "state TEXT NOT NULL, worker TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "error TEXT, created_at REAL NOT NULL, finished_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_run ON jobs(run_id, state, position)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "job_id INTEGER NOT NULL REFERENCES jobs(id), kind TEXT NOT NULL, ordinal INTEGER NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_job ON results(job_id, kind, ordinal)")
+        return self._conn
+
+    def create_run(self, urls: List[str], run_id: Optional[str] = None) -> str:
+        run_id = run_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO jobs (run_id, position, url, state, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, position, url, PENDING, now) for position, url in enumerate(urls)],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return run_id
+
+    def latest_run(self) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT run_id FROM jobs ORDER BY created_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, run_id: str, worker: str) -> Optional[Job]:
+        """Claim the next pending job of `run_id` (or one whose lease expired), if any."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases whose attempts are used up will never finish
+                conn.execute(
+                    "UPDATE jobs SET state = ?, error = 'lease expired' "
+                    "WHERE run_id = ? AND state = ? AND lease_until < ? AND attempts >= ?",
+                    (FAILED, run_id, CLAIMED, now, self.max_attempts),
+                )
+                row = conn.execute(
+                    "SELECT id, position, url, attempts FROM jobs WHERE run_id = ? "
+                    "AND (state = ? OR (state = ? AND lease_until < ?)) ORDER BY position LIMIT 1",
+                    (run_id, PENDING, CLAIMED, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, position, url, attempts = row
+                conn.execute(
+                    "UPDATE jobs SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (CLAIMED, worker, now + self.lease, job_id),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return Job(job_id, run_id, position, url, attempts + 1)
+
+    def heartbeat(self, job: Job, worker: str) -> bool:
+        """Extend the lease on `job`; False if another worker has taken it over."""
+        with self._lock:
+            return bool(self._connection().execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = ?",
+                (time.time() + self.lease, job.id, worker, CLAIMED),
+            ).rowcount)
+
+    def complete(self, job: Job, worker: str, results: Dict[str, List[Any]]) -> bool:
+        """
+        Store `results` (lists of JSON-serializable items by kind) and mark
+        `job` done. Returns False, storing nothing, if the lease was lost.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                owned = conn.execute(
+                    "UPDATE jobs SET state = ?, finished_at = ?, error = NULL WHERE id = ? AND worker = ? AND state = ?",
+                    (DONE, time.time(), job.id, worker, CLAIMED),
+                ).rowcount
+                if owned:
+                    conn.executemany(
+                        "INSERT INTO results (job_id, kind, ordinal, data) VALUES (?, ?, ?, ?)",
+                        [
+                            (job.id, kind, ordinal, json.dumps(item, default=str))
+                            for kind, items in results.items()
+                            for ordinal, item in enumerate(items)
+                        ],
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return bool(owned)
+
+    def fail(self, job: Job, worker: str, error: str) -> None:
+        """Release `job` for another attempt, or mark it failed once attempts are used up."""
+        state = FAILED if job.attempts >= self.max_attempts else PENDING
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET state = ?, error = ?, lease_until = NULL WHERE id = ? AND worker = ? AND state = ?",
+                (state, error[:1000], job.id, worker, CLAIMED),
+            )
+
+    def status(self, run_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def results(self, run_id: str, kind: str) -> Iterator[Tuple[Tuple[int, int], Any]]:
+        """Stored results of `kind` for finished jobs as `((job position, ordinal), item)`, in order."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT j.position, r.ordinal, r.data FROM results r JOIN jobs j ON j.id = r.job_id "
+                "WHERE j.run_id = ? AND j.state = ? AND r.kind = ? ORDER BY j.position, r.ordinal",
+                (run_id, DONE, kind),
+            ).fetchall()
+        for position, ordinal, data in rows:
+            yield (position, ordinal), json.loads(data)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
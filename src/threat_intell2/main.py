@@ -1,102 +1,170 @@
+import argparse
 import asyncio
 from datetime import datetime
-import uuid
-from threat_intell2.scrapers.web_scraper import web_scraping
+from threat_intell2.scrapers.web_scraper import record_seen_articles, web_scraping
 from threat_intell2.processors.data_preprocessor import preprocess_data
 from threat_intell2.processors.entity_extractor import extract_entities
 from threat_intell2.processors.data_validator import validate_data
-from threat_intell2.analyzers.data_analyzer import analyze_data
-from threat_intell2.reporting.report_generator import generate_report
-from threat_intell2.config import WEBSITES, OUTPUTS_DIR
+from threat_intell2.processors.relevance_filter import is_relevant, triage_articles
+from threat_intell2.analyzers.data_analyzer import analyze_data_async
+from threat_intell2.analyzers.batch_submission import write_batch_file
+from threat_intell2.reporting.report_generator import generate_report, build_threat_report, save_report
+from threat_intell2.reporting.report_store import ReportStore
+from threat_intell2.pipeline import run_streaming_pipeline
+from threat_intell2.workers import run_sharded_pipeline
+from threat_intell2.checkpoint import RunCheckpoint, checkpointed_analysis, checkpointed_article_stage, checkpointed_stage
+from threat_intell2.config import (
+    WEBSITES, OUTPUTS_DIR, PIPELINE_MODE, METRICS_PROMETHEUS, REPORT_STORE_ENABLED, REPORT_STORE_PATH, CHECKPOINTS_ENABLED,
+    ANALYSIS_MODE, TEXT_STORE_ENABLED
+)
 from threat_intell2.utils.logging_config import logger, setup_file_logging
-from threat_intell2.models.data_models import ThreatIntelligenceReport, Analysis, ThreatItem, RecommendationItem
+from threat_intell2.utils.metrics import metrics
+from threat_intell2.utils.text_store import text_store
 import os
-import json
 
-async def main():
-    try:
-        log_file = os.path.join(OUTPUTS_DIR, "threat_intel.log")
-        setup_file_logging(log_file)
-        logger.info("Starting threat intelligence gathering process...")
+async def run_batch_pipeline(urls, checkpoint=None):
+    # Each stage is loaded from the checkpoint instead of rerun when a previous attempt completed it
+    # Web scraping
+    articles = await checkpointed_stage(checkpoint, "web_scraping", lambda: web_scraping(urls))
+    logger.info(f"Scraped {len(articles)} articles")
+
+    # Data preprocessing
+    preprocessed_data = await checkpointed_stage(checkpoint, "preprocess_data", lambda: preprocess_data(articles))
+    logger.info("Data preprocessing completed")
+
+    # Entity extraction
+    extracted_entities = checkpointed_article_stage(checkpoint, "extract_entities", preprocessed_data, extract_entities)
+    logger.info("Entity extraction completed")
 
-        # Web scraping
-        articles = await web_scraping(WEBSITES)
-        logger.info(f"Scraped {len(articles)} articles")
+    # Data validation
+    validated_data = await checkpointed_stage(checkpoint, "validate_data", lambda: validate_data(extracted_entities))
+    logger.info("Data validation completed")
 
-        # Data preprocessing
-        preprocessed_data = preprocess_data(articles)
-        logger.info("Data preprocessing completed")
+    # Relevance prefilter: cheap enough to rerun on resume, so it is not checkpointed
+    with metrics.stage("relevance_filter"):
+        relevant_data = triage_articles(validated_data)
 
-        # Entity extraction
-        extracted_entities = extract_entities(preprocessed_data)
-        logger.info("Entity extraction completed")
+    # Data analysis
+    if ANALYSIS_MODE == "batch" and not checkpoint.completed("analyze_data"):
+        # Analysis happens offline: the run stops here until the batch results are ingested
+        write_batch_file(relevant_data, checkpoint.directory)
+        return validated_data, None, []
+    analyzed_data = await checkpointed_analysis(checkpoint, relevant_data, analyze_data_async)
+    logger.info("Data analysis completed")
 
-        # Data validation
-        validated_data = validate_data(extracted_entities)
-        logger.info("Data validation completed")
+    return validated_data, analyzed_data, [str(article.url) for article in articles]
 
-        # Data analysis
-        analyzed_data = analyze_data(validated_data)
-        logger.info("Data analysis completed")
+def write_run_metrics(timestamp: str) -> None:
+    summary_path = os.path.join(OUTPUTS_DIR, f"run_summary_{timestamp}.json")
+    metrics.write_summary(summary_path)
+    logger.info(f"Run summary saved to {summary_path}")
+    if METRICS_PROMETHEUS:
+        metrics.write_prometheus(os.path.join(OUTPUTS_DIR, f"metrics_{timestamp}.prom"))
 
-        # Report generation
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def store_report(threat_report) -> None:
+    # Indexing failures must not lose a report that is already on disk
+    store = ReportStore(REPORT_STORE_PATH)
+    try:
+        store.ingest(threat_report)
+    except Exception as e:
+        logger.error(f"Failed to index report in the report store: {str(e)}")
+    finally:
+        store.close()
+
+def write_outputs(validated_data, analyzed_data, timestamp: str, scraped_urls=()) -> str:
+    # Report generation
+    with metrics.stage("report"):
         report = generate_report(analyzed_data, timestamp)
         logger.info("Report generation completed")
 
-        # Aggregate analysis data into Analysis model
-        executive_summary = " ".join(
-            [item["analysis"]["Executive_Summary"] for item in analyzed_data if "analysis" in item]
-        )
-        threat_landscape = {}
-        emerging_threats = []
-        global_impact = ""
-        recommendations = []
-
-        for item in analyzed_data:
-            analysis = item.get("analysis", {})
-            # Assuming 'Threat_Actors' is a list of strings
-            for actor in analysis.get("Threat_Actors", []):
-                if actor not in threat_landscape:
-                    threat_landscape[actor] = {"description": ""}
-            # Assuming 'TTPs' is a list of strings
-            emerging_threats.extend([ThreatItem(description=ttp) for ttp in analysis.get("TTPs", [])])
-            global_impact += analysis.get("Global_Impact", " ") + " "
-            recommendations.extend([RecommendationItem(description=rec) for rec in analysis.get("Recommendations", [])])
-
-        # Remove duplicates
-        emerging_threats = list({threat.description: threat for threat in emerging_threats}.values())
-        recommendations = list({rec.description: rec for rec in recommendations}.values())
-        global_impact = global_impact.strip()
-
-        analysis_instance = Analysis(
-            executive_summary=executive_summary,
-            threat_landscape=threat_landscape,
-            emerging_threats=emerging_threats,
-            global_impact=global_impact,
-            recommendations=recommendations
-        )
-
         # Create ThreatIntelligenceReport instance
-        threat_report = ThreatIntelligenceReport(
-            id=str(uuid.uuid4()),  # Generate a unique UUID
-            timestamp=datetime.now(),
-            articles=validated_data,
-            analysis=analysis_instance,
-            version="0.1.0",
-            generated_by="threat-intell2"
-        )
-
-        # Save the report using Pydantic's .json() method
+        threat_report = build_threat_report(validated_data, analyzed_data)
+
+        # Stream the report to disk article by article
         report_filename = f"threat_intel_report_{timestamp}.json"
-        report_path = os.path.join(OUTPUTS_DIR, report_filename)
-        with open(report_path, "w") as f:
-            json.dump(threat_report.dict(), f, indent=2, default=str)
-        logger.info(f"Report saved to {report_path}")
+        report_path = save_report(threat_report, os.path.join(OUTPUTS_DIR, report_filename))
+    logger.info(f"Report saved to {report_path}")
+
+    if REPORT_STORE_ENABLED:
+        with metrics.stage("report_store"):
+            store_report(threat_report)
+
+    # Every scraped article counts as seen (including duplicates and invalid articles the pipeline dropped),
+    # except relevant articles whose analysis failed: those are retried next run
+    analyzed_urls = {analysis["url"] for analysis in analyzed_data}
+    failed_urls = {str(article.url) for article in validated_data if is_relevant(article)} - analyzed_urls
+    seen_urls = set(scraped_urls) | analyzed_urls | {str(article.url) for article in validated_data}
+    record_seen_articles(sorted(seen_urls - failed_urls))
+    return report_path
+
+async def main(resume=None):
+    # The run id doubles as the report timestamp, so a resumed run writes the report it would have written
+    timestamp = resume or datetime.now().strftime("%Y%m%d_%H%M%S")
+    metrics.reset()
+    try:
+        log_file = os.path.join(OUTPUTS_DIR, "threat_intel.log")
+        setup_file_logging(log_file)
+        logger.info("Starting threat intelligence gathering process...")
+
+        checkpoint = None
+        if resume:
+            if not RunCheckpoint.exists(resume):
+                raise ValueError(f"No checkpoint found for run {resume}")
+            logger.info(f"Resuming run {resume}")
+        if PIPELINE_MODE == "batch" and (CHECKPOINTS_ENABLED or resume):
+            checkpoint = RunCheckpoint(timestamp)
+        elif resume:
+            logger.warning(f"Checkpoints are only written in batch mode; rerunning in {PIPELINE_MODE} mode")
+        if ANALYSIS_MODE == "batch" and checkpoint is None:
+            raise ValueError("ANALYSIS_MODE=batch requires PIPELINE_MODE=batch with checkpoints enabled")
+
+        if PIPELINE_MODE == "streaming":
+            with metrics.stage("streaming_pipeline"):
+                validated_data, analyzed_data, scraped_urls = await run_streaming_pipeline(WEBSITES)
+        elif PIPELINE_MODE == "workers":
+            with metrics.stage("worker_pipeline"):
+                validated_data, analyzed_data, scraped_urls = await run_sharded_pipeline(WEBSITES)
+        else:
+            validated_data, analyzed_data, scraped_urls = await run_batch_pipeline(WEBSITES, checkpoint)
+        if analyzed_data is None:
+            logger.info(
+                f"Analysis requests for run {timestamp} written to {checkpoint.directory}. Submit them with "
+                f"`python -m threat_intell2.analyzers.batch_submission --run {timestamp} submit`, then `fetch` "
+                f"and `ingest` the results and finish with `--resume {timestamp}`"
+            )
+            return
+        metrics.set_counter("articles_validated", len(validated_data))
+        metrics.set_counter("articles_analyzed", len(analyzed_data))
+
+        write_outputs(validated_data, analyzed_data, timestamp, scraped_urls)
+        if checkpoint is not None:
+            # The report is written; the checkpoints are no longer needed
+            checkpoint.remove()
+        if TEXT_STORE_ENABLED:
+            text_store.prune()
 
         logger.info("Threat intelligence gathering process completed successfully")
     except Exception as e:
         logger.error(f"An error occurred during execution: {str(e)}")
+    finally:
+        try:
+            write_run_metrics(timestamp)
+        except Exception as e:
+            logger.error(f"Failed to write run metrics: {str(e)}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gather and analyze threat intelligence.")
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Resume an interrupted batch run from its checkpoints (the run id or 'latest')",
+    )
+    args = parser.parse_args(argv)
+    if args.resume == "latest":
+        args.resume = RunCheckpoint.latest()
+        if args.resume is None:
+            parser.error("no checkpointed runs to resume")
+    return args
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args().resume))
@@ -34,10 +34,17 @@ class ThreatActor(BaseModel):
     related_iocs: List[str] = []
 
 
+class RelevanceDecision(BaseModel):
+    score: float
+    relevant: bool
+    features: Dict[str, float] = {}
+
+
 class Article(BaseModel):
     title: str
     url: HttpUrl
     text: str
+    text_ref: Optional[str] = None  # Digest in the article text store when `text` was spilled to disk
     summary: Optional[str] = None
     published_date: Optional[datetime] = None
     author: Optional[str] = None
@@ -48,6 +55,7 @@ class Article(BaseModel):
     risk_score: Optional[float] = Field(default=None, ge=0, le=100)
     related_articles: List[str] = []
     tags: List[str] = []
+    relevance: Optional[RelevanceDecision] = None  # Set by the relevance prefilter; not relevant means not analyzed
 
     def dict(self, *args, **kwargs):
         d = super().dict(*args, **kwargs)
@@ -0,0 +1,152 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .analyzers.data_analyzer import analyze_article_async, log_cache_stats
+from .config import ANALYSIS_CONCURRENCY, CRAWL_PERSIST, PIPELINE_QUEUE_SIZE, SPACY_BATCH_SIZE
+from .models.data_models import Article
+from .processors.data_preprocessor import open_duplicate_index, preprocess_data
+from .processors.data_validator import validate_data
+from .processors.entity_extractor import extract_entities
+from .processors.relevance_filter import is_relevant, triage_articles
+from .scrapers.web_scraper import web_scraping_stream
+from .utils.logging_config import logger
+from .utils.metrics import metrics
+
+# Items on the inter-stage queues are (position, article) tuples; None marks the end of the stream.
+_END = None
+
+
+def _drain(queue: asyncio.Queue, first, limit: int) -> Tuple[list, bool]:
+    # Collect whatever is already queued (up to `limit`) so spaCy gets a batch instead of single docs
+    items = [first]
+    finished = False
+    while len(items) < limit:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if item is _END:
+            finished = True
+            break
+        items.append(item)
+    return items, finished
+
+
+def _process_batch(articles: List[Article], seen_urls: set, duplicate_index) -> List[Article]:
+    # Stage times accumulate over batches; they overlap with scraping and analysis
+    with metrics.stage("preprocess_data"):
+        preprocessed = preprocess_data(articles, seen_urls=seen_urls, duplicate_index=duplicate_index)
+    with metrics.stage("extract_entities"):
+        extracted = extract_entities(preprocessed)
+    with metrics.stage("validate_data"):
+        validated = validate_data(extracted)
+    with metrics.stage("relevance_filter"):
+        # Decisions are recorded on the articles; the analysis workers skip the irrelevant ones
+        triage_articles(validated)
+    return validated
+
+
+async def _nlp_stage(
+    scraped: asyncio.Queue,
+    validated: asyncio.Queue,
+    executor: ThreadPoolExecutor,
+    workers: int,
+    scraped_urls: List[str],
+) -> None:
+    loop = asyncio.get_running_loop()
+    seen_urls = set()
+    duplicate_index = open_duplicate_index()
+    try:
+        finished = False
+        while not finished:
+            first = await scraped.get()
+            if first is _END:
+                break
+            batch, finished = _drain(scraped, first, max(1, SPACY_BATCH_SIZE))
+            positions = {id(article): position for position, article in batch}
+            scraped_urls.extend(str(article.url) for _, article in batch)
+            # preprocess, extract and validate run off the event loop so downloads and LLM calls keep going
+            kept = await loop.run_in_executor(
+                executor, _process_batch, [article for _, article in batch], seen_urls, duplicate_index
+            )
+            for article in kept:
+                await validated.put((positions[id(article)], article))
+    finally:
+        if duplicate_index is not None:
+            duplicate_index.close()
+    # Not in `finally`: a cancelled stage must not block on a full queue nobody reads any more
+    for _ in range(workers):
+        await validated.put(_END)
+
+
+async def _analysis_worker(
+    validated: asyncio.Queue,
+    semaphore: asyncio.Semaphore,
+    results: List[Tuple[Any, Article, Optional[Dict[str, Any]]]],
+) -> None:
+    while True:
+        item = await validated.get()
+        if item is _END:
+            return
+        position, article = item
+        analysis = await analyze_article_async(article, semaphore) if is_relevant(article) else None
+        results.append((position, article, analysis))
+
+
+async def _run_stages(*stages) -> None:
+    """
+    Run the stage coroutines concurrently. The first stage to fail cancels
+    the others, since they would otherwise wait forever on queues it no
+    longer feeds or drains, and its exception is raised.
+    """
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
+async def run_streaming_pipeline(
+    urls: List[str],
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    concurrency: int = ANALYSIS_CONCURRENCY,
+    persist_frontier: bool = CRAWL_PERSIST,
+) -> Tuple[List[Article], List[Dict[str, Any]], List[str]]:
+    """
+    Run scraping, preprocessing, entity extraction, validation and analysis
+    as overlapping stages connected by bounded queues.
+
+    Returns `(validated_articles, analyzed_data, scraped_urls)` in the same
+    order the batch pipeline produces them. Duplicates are dropped in arrival order, so when
+    several sources carry the same article or near-copies of it, the copy
+    that is kept may differ from the one batch mode keeps. If any stage
+    fails, the others are cancelled and the error is raised.
+    """
+    logger.info("START: Streaming pipeline")
+    scraped: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    validated: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    workers = max(1, concurrency)
+    results: List[Tuple[Any, Article, Optional[Dict[str, Any]]]] = []
+    scraped_urls: List[str] = []
+
+    # A single worker thread: the spaCy pipeline is shared and not meant to be called concurrently
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp") as executor:
+        await _run_stages(
+            web_scraping_stream(urls, scraped, persist_frontier),
+            _nlp_stage(scraped, validated, executor, workers, scraped_urls),
+            *[_analysis_worker(validated, semaphore, results) for _ in range(workers)],
+        )
+
+    results.sort(key=lambda result: result[0])
+    validated_articles = [article for _, article, _ in results]
+    analyzed_data = [analysis for _, _, analysis in results if analysis]
+    log_cache_stats()
+    logger.info(f"END: Streaming pipeline completed with {len(validated_articles)} articles.")
+    return validated_articles, analyzed_data, scraped_urls
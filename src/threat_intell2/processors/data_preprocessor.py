@@ -1,20 +1,54 @@
-from typing import List
+from typing import List, Optional, Set
 from ..models.data_models import Article
 from ..utils.logging_config import logger
+from ..utils.text_store import article_text
+from ..config import NEAR_DUPLICATE_DETECTION, NEAR_DUPLICATE_INDEX_PATH
+from .deduplicator import NearDuplicateIndex, canonicalize_url, minhash_signature
 
-def preprocess_data(articles: List[Article]) -> List[Article]:
+def open_duplicate_index() -> Optional[NearDuplicateIndex]:
+    if not NEAR_DUPLICATE_DETECTION:
+        return None
+    return NearDuplicateIndex(NEAR_DUPLICATE_INDEX_PATH)
+
+def preprocess_data(
+    articles: List[Article],
+    seen_urls: Optional[Set] = None,
+    duplicate_index: Optional[NearDuplicateIndex] = None,
+) -> List[Article]:
+    """
+    Drop articles whose canonical URL was already seen and, with near-duplicate
+    detection enabled, articles whose text is a near-copy of an earlier one.
+    Pass a shared `seen_urls` set and `duplicate_index` to de-duplicate across
+    several calls, e.g. when articles arrive one at a time.
+    """
     logger.info("START: Data Preprocessing")
+    owns_index = duplicate_index is None
+    if owns_index:
+        duplicate_index = open_duplicate_index()
     try:
         preprocessed_articles = []
-        seen_urls = set()
+        if seen_urls is None:
+            seen_urls = set()
         for article in articles:
-            if article.url in seen_urls:
+            canonical_url = canonicalize_url(article.url)
+            if canonical_url in seen_urls:
                 logger.debug(f"Duplicate URL found and skipped: {article.url}")
                 continue
-            seen_urls.add(article.url)
+            seen_urls.add(canonical_url)
+            if duplicate_index is not None:
+                signature = minhash_signature(article_text(article))
+                if signature is not None:
+                    original_url = duplicate_index.find_duplicate(signature, canonical_url)
+                    if original_url:
+                        logger.info(f"Near-duplicate of {original_url} skipped: {article.url}")
+                        continue
+                    duplicate_index.add(canonical_url, signature)
             preprocessed_articles.append(article)
         logger.info("END: Data Preprocessing completed successfully.")
         return preprocessed_articles
     except Exception as e:
         logger.error(f"ERROR: Data Preprocessing failed - {e}")
-        return articles
\ No newline at end of file
+        return articles
+    finally:
+        if owns_index and duplicate_index is not None:
+            duplicate_index.close()
@@ -7,7 +7,7 @@ def validate_data(articles: List[Article]) -> List[Article]:
     try:
         validated_articles = []
         for article in articles:
-            if article.title and article.text and article.url:
+            if article.title and (article.text or article.text_ref) and article.url:
                 validated_articles.append(article)
             else:
                 logger.warning(f"Article missing required fields and skipped: {article}")
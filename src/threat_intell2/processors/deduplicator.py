@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from array import array
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ..config import (
+    LSH_BANDS,
+    MINHASH_SIZE,
+    NEAR_DUPLICATE_INDEX_MAX_AGE,
+    NEAR_DUPLICATE_INDEX_MAX_ENTRIES,
+    NEAR_DUPLICATE_THRESHOLD,
+    SHINGLE_SIZE,
+)
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "mkt_tok", "ref", "ref_src", "cmpid", "campaign", "source", "trk", "igshid",
+}
+
+_WORD_RE = re.compile(r"\w+")
+_MAX_HASH = (1 << 64) - 1
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so syndicated or tracked copies of the same page compare
+    equal: lowercase scheme and host, no `www.`, default port, fragment,
+    tracking parameters or trailing slash, and sorted query parameters.
+    """
+    parts = urlsplit(str(url).strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def minhash_signature(text: str, size: int = MINHASH_SIZE, shingle_size: int = SHINGLE_SIZE) -> Optional[array]:
+    """
+    One-permutation MinHash over word shingles: each shingle is hashed once,
+    the hash picks one of `size` bins and the bin keeps its minimum. This is
+    linear in the text length. Returns None for texts too short to compare.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        return None
+    signature = array("Q", [_MAX_HASH] * size)
+    for i in range(len(words) - shingle_size + 1):
+        value = _hash64(" ".join(words[i:i + shingle_size]).encode("utf-8"))
+        bin_index = value % size
+        value //= size
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+    return signature
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    compared = equal = 0
+    for a, b in zip(first, second):
+        if a == _MAX_HASH and b == _MAX_HASH:
+            continue  # Bin empty in both: carries no information
+        compared += 1
+        equal += a == b
+    return equal / compared if compared else 0.0
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+
+    Signatures are split into `bands`; documents sharing any band bucket are
+    candidates and are confirmed by estimated similarity. Backed by SQLite,
+    in memory by default or in a file to detect duplicates across runs.
+    Documents are keyed by canonical URL, so re-indexing a page replaces its
+    entry and a page never matches itself. A file-backed index drops entries
+    older than `max_age` seconds and keeps at most `max_entries` of the
+    newest.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+        bands: int = LSH_BANDS,
+        max_entries: Optional[int] = NEAR_DUPLICATE_INDEX_MAX_ENTRIES,
+        max_age: Optional[float] = NEAR_DUPLICATE_INDEX_MAX_AGE,
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.max_entries = max_entries
+        self.max_age = max_age
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, signature BLOB NOT NULL, created_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(signatures)")}
+        if "created_at" not in columns:
+            # Index files written before entries were dated; their rows are the first to be pruned
+            self._conn.execute("ALTER TABLE signatures ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_signatures_url ON signatures(url)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_signatures_created ON signatures(created_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bands (bucket INTEGER NOT NULL, doc_id INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_bucket ON bands(bucket)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bands_doc ON bands(doc_id)")
+        self._conn.commit()
+        if path:
+            self.prune()
+
+    def _buckets(self, signature: array) -> List[int]:
+        rows = len(signature) // self.bands
+        buckets = []
+        for band in range(self.bands):
+            chunk = signature[band * rows:(band + 1) * rows]
+            # Signed 64-bit so it fits an SQLite INTEGER
+            buckets.append(_hash64(band.to_bytes(2, "big") + chunk.tobytes()) - (1 << 63))
+        return buckets
+
+    def find_duplicate(self, signature: array, url: Optional[str] = None) -> Optional[str]:
+        """
+        Return the URL of an indexed near-duplicate of `signature`, if any.
+        Entries for `url` itself are ignored, so re-processing a page does
+        not flag it as a copy of its earlier run.
+        """
+        own_url = canonicalize_url(url) if url is not None else None
+        buckets = self._buckets(signature)
+        placeholders = ",".join("?" * len(buckets))
+        candidates = self._conn.execute(
+            f"SELECT DISTINCT s.url, s.signature FROM bands b JOIN signatures s ON s.id = b.doc_id "
+            f"WHERE b.bucket IN ({placeholders})",
+            buckets,
+        ).fetchall()
+        for candidate_url, blob in candidates:
+            if own_url is not None and canonicalize_url(candidate_url) == own_url:
+                continue
+            if estimate_similarity(signature, array("Q", blob)) >= self.threshold:
+                return candidate_url
+        return None
+
+    def _delete(self, where: str, params) -> int:
+        self._conn.execute(f"DELETE FROM bands WHERE doc_id IN (SELECT id FROM signatures WHERE {where})", params)
+        return self._conn.execute(f"DELETE FROM signatures WHERE {where}", params).rowcount
+
+    def add(self, url: str, signature: array) -> None:
+        """Index `signature` under the canonical form of `url`, replacing any earlier entry for it."""
+        canonical_url = canonicalize_url(url)
+        self._delete("url = ?", (canonical_url,))
+        cursor = self._conn.execute(
+            "INSERT INTO signatures (url, signature, created_at) VALUES (?, ?, ?)",
+            (canonical_url, signature.tobytes(), time.time()),
+        )
+        self._conn.executemany(
+            "INSERT INTO bands (bucket, doc_id) VALUES (?, ?)",
+            [(bucket, cursor.lastrowid) for bucket in self._buckets(signature)],
+        )
+        self._conn.commit()
+
+    def prune(self) -> int:
+        """Drop entries past `max_age` and the oldest beyond `max_entries`, returning how many were removed."""
+        removed = 0
+        if self.max_age is not None:
+            removed += self._delete("created_at < ?", (time.time() - self.max_age,))
+        if self.max_entries is not None:
+            count = self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+            if count > self.max_entries:
+                removed += self._delete(
+                    "id IN (SELECT id FROM signatures ORDER BY created_at ASC, id ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        self._conn.commit()
+        return removed
+
+    def close(self) -> None:
+        self._conn.close()
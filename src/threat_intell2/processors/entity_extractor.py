@@ -1,12 +1,24 @@
-import spacy
-import torch
-from typing import List
+import sys
+import time
+from collections import defaultdict
+from itertools import chain
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 from ..utils.logging_config import logger
+from ..utils.metrics import metrics
+from ..utils.text_store import article_text
 from ..models.data_models import Article, ThreatActor, TTP, IOC
-from spacy.matcher import Matcher
-import tiktoken
+from ..config import SPACY_BATCH_SIZE, SPACY_N_PROCESS, SPACY_IOC_LABELS, SPACY_TTP_LABELS
+from .ioc_scanner import scan_iocs
+from ..utils.aho_corasick import AhoCorasick
+
+# spaCy and torch are imported on first use so that importing this
+# module (and threat_intell2.main) stays cheap for stages that never need them.
 
 def load_spacy_model():
+    import spacy
+    import torch
+
     models = ["en_core_web_trf", "en_core_web_lg", "en_core_web_sm"]
     for model in models:
         try:
@@ -38,111 +50,147 @@ def load_spacy_model():
     
     raise ValueError("No suitable spaCy model could be loaded. Please install at least en_core_web_sm manually.")
 
-nlp = load_spacy_model()
-matcher = Matcher(nlp.vocab)
-
-# Define patterns for IP addresses, file hashes, etc.
-ip_pattern = [{"TEXT": {"REGEX": r"\b(?:\d{1,3}\.){3}\d{1,3}\b"}}]
-md5_pattern = [{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{32}\b"}}]
-sha1_pattern = [{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{40}\b"}}]
-sha256_pattern = [{"TEXT": {"REGEX": r"\b[a-fA-F0-9]{64}\b"}}]
-cve_pattern = [{"TEXT": {"REGEX": r"CVE-\d{4}-\d{4,7}"}}]
-
-matcher.add("IP_ADDRESS", [ip_pattern])
-matcher.add("MD5_HASH", [md5_pattern])
-matcher.add("SHA1_HASH", [sha1_pattern])
-matcher.add("SHA256_HASH", [sha256_pattern])
-matcher.add("CVE", [cve_pattern])
-
-def chunk_text(text: str, max_tokens: int = 3000) -> list[str]:
-    encoding = tiktoken.get_encoding('cl100k_base')
-    tokens = encoding.encode(text)
-    chunks = []
-    current_chunk = []
-    current_length = 0
-    
-    for token in tokens:
-        if current_length + 1 > max_tokens:
-            chunks.append(encoding.decode(current_chunk))
-            current_chunk = []
-            current_length = 0
-        current_chunk.append(token)
-        current_length += 1
-    
-    if current_chunk:
-        chunks.append(encoding.decode(current_chunk))
+@lru_cache(maxsize=None)
+def get_nlp():
+    return load_spacy_model()
+
+def link_iocs_to_actors(threat_actors: List[ThreatActor], iocs: List[IOC]) -> None:
+    """
+    Set each actor's `related_iocs` to the IOC values that contain one of its
+    names (case-insensitive). All names go into a single Aho-Corasick
+    automaton, so every IOC value is scanned once instead of once per name.
+    """
+    names = []
+    owners = []
+    for actor_index, threat_actor in enumerate(threat_actors):
+        threat_actor.related_iocs = []
+        for name in threat_actor.names:
+            names.append(name.lower())
+            owners.append(actor_index)
+    if not names:
+        return
+    automaton = AhoCorasick(names)
+    for ioc in iocs:
+        matched_actors = {owners[name_index] for name_index in automaton.matches(ioc.value.lower())}
+        for actor_index in sorted(matched_actors):
+            threat_actors[actor_index].related_iocs.append(ioc.value)
+
+def build_iocs(pairs: Iterable[Tuple[str, str]]) -> List[IOC]:
+    """
+    IOC models for `(type, value)` pairs, keeping the first occurrence of
+    each pair. Types and values are interned, so labels and values repeated
+    across articles share one string, and the models are built without
+    validation: both fields are plain strings from spaCy or the IOC scanner.
+    """
+    unique = dict.fromkeys((sys.intern(ioc_type), sys.intern(value)) for ioc_type, value in pairs)
+    return [IOC.model_construct(type=ioc_type, value=value) for ioc_type, value in unique]
+
+def process_doc(article: Article, doc) -> Article:
+    # Extract threat actors
+    threat_actors = []
+    # Lowercased name -> actor, replacing a scan over every actor per entity
+    actors_by_name = {}
+    # WORK_OF_ART/LAW entities grouped by the start of their sentence
+    techniques_by_sentence = defaultdict(list)
+    for e in doc.ents:
+        if e.label_ in ['WORK_OF_ART', 'LAW']:
+            techniques_by_sentence[e.sent.start].append(e.text)
+    for ent in doc.ents:
+        if ent.label_ in ['ORG', 'PERSON', 'NORP']:
+            normalized_name = ent.text.lower()
+            existing_actor = actors_by_name.get(normalized_name)
+            if existing_actor:
+                if ent.text not in existing_actor.names:
+                    existing_actor.names.append(ent.text)
+            else:
+                threat_actor = ThreatActor.model_construct(
+                    names=[ent.text],
+                    description=f"Extracted from article: {article.title}",
+                )
+                sentence = ent.sent
+                threat_actor.targets = [e.text for e in sentence.ents if e.label_ in ['GPE', 'ORG', 'PRODUCT'] and e.text.lower() != normalized_name]
+                threat_actor.tactics = [e.text for e in sentence.ents if e.label_ in ['EVENT', 'WORK_OF_ART']]
+                threat_actor.techniques = list(techniques_by_sentence.get(sentence.start, []))
+                
+                context = sentence.text
+                threat_actor.summary = f"Potential threat actor '{ent.text}' identified in the context: '{context}'"
+                
+                # Extract motivation (if available)
+                motivation_keywords = ['motivated by', 'aims to', 'goal is', 'objective is', 'intends to', 'purpose is']
+                for keyword in motivation_keywords:
+                    if keyword in sentence.text.lower():
+                        threat_actor.motivation = sentence.text
+                        break
+                
+                threat_actors.append(threat_actor)
+                actors_by_name[normalized_name] = threat_actor
+
+    # Extract TTPs
+    ttps = [TTP.model_construct(tactic=ent.label_, technique=ent.text) for ent in doc.ents if ent.label_ in SPACY_TTP_LABELS]
     
-    return chunks
+    # Extract IOCs, one per (type, value): long reports repeat the same numbers, places and indicators
+    # many times. Technical indicators (IPs, hashes, CVEs, domains, URLs, emails) come from the raw text,
+    # which also catches defanged and tokenizer-split values
+    iocs = build_iocs(chain(
+        ((ent.label_, ent.text) for ent in doc.ents if ent.label_ in SPACY_IOC_LABELS),
+        scan_iocs(doc.text),
+    ))
 
-def extract_entities(articles: List[Article]) -> List[Article]:
-    logger.info("START: Entity Extraction")
-    for article in articles:
-        try:
-            doc = nlp(article.text)
-            
-            # Extract threat actors
-            threat_actors = []
-            for ent in doc.ents:
-                if ent.label_ in ['ORG', 'PERSON', 'NORP']:
-                    existing_actor = next((actor for actor in threat_actors if ent.text.lower() in [name.lower() for name in actor.names]), None)
-                    if existing_actor:
-                        if ent.text not in existing_actor.names:
-                            existing_actor.names.append(ent.text)
-                    else:
-                        threat_actor = ThreatActor(
-                            names=[ent.text],
-                            description=f"Extracted from article: {article.title}",
-                        )
-                        sentence = ent.sent
-                        threat_actor.targets = [e.text for e in sentence.ents if e.label_ in ['GPE', 'ORG', 'PRODUCT'] and e.text.lower() != ent.text.lower()]
-                        threat_actor.tactics = [e.text for e in sentence.ents if e.label_ in ['EVENT', 'WORK_OF_ART']]
-                        threat_actor.techniques = [e.text for e in doc.ents if e.label_ in ['WORK_OF_ART', 'LAW'] and e.sent == sentence]
-                        
-                        context = sentence.text
-                        threat_actor.summary = f"Potential threat actor '{ent.text}' identified in the context: '{context}'"
-                        
-                        # Extract motivation (if available)
-                        motivation_keywords = ['motivated by', 'aims to', 'goal is', 'objective is', 'intends to', 'purpose is']
-                        for keyword in motivation_keywords:
-                            if keyword in sentence.text.lower():
-                                threat_actor.motivation = sentence.text
-                                break
-                        
-                        threat_actors.append(threat_actor)
-
-            # Extract TTPs
-            ttps = [TTP(tactic=ent.label_, technique=ent.text) for ent in doc.ents if ent.label_ in ['EVENT', 'WORK_OF_ART', 'LAW']]
-            
-            # Extract IOCs
-            iocs = [IOC(type=ent.label_, value=ent.text) for ent in doc.ents if ent.label_ in ['PRODUCT', 'GPE', 'LOC', 'FAC', 'MONEY', 'CARDINAL']]
-            
-            # Add more sophisticated IOC extraction
-            matches = matcher(doc)
-            for match_id, start, end in matches:
-                span = doc[start:end]
-                ioc_type = nlp.vocab.strings[match_id]
-                iocs.append(IOC(type=ioc_type, value=span.text))
-
-            for token in doc:
-                if token.like_url:
-                    iocs.append(IOC(type="URL", value=token.text))
-                elif token.like_email:
-                    iocs.append(IOC(type="Email", value=token.text))
-
-            # Link IOCs to threat actors
-            for threat_actor in threat_actors:
-                threat_actor.related_iocs = [ioc.value for ioc in iocs if any(name.lower() in ioc.value.lower() for name in threat_actor.names)]
-
-            article.threat_actors = threat_actors
-            article.ttps = ttps
-            article.iocs = iocs
+    # Link IOCs to threat actors
+    link_iocs_to_actors(threat_actors, iocs)
+
+    article.threat_actors = threat_actors
+    article.ttps = ttps
+    article.iocs = iocs
+    return article
 
+def _clear_entities(article: Article) -> None:
+    # Initialize empty lists if processing fails
+    article.threat_actors = []
+    article.ttps = []
+    article.iocs = []
+
+def _process_article(article: Article, doc=None) -> None:
+    with metrics.article(article.url, "extract_entities"):
+        try:
+            if doc is None:
+                doc = get_nlp()(article_text(article))
+            process_doc(article, doc)
         except Exception as e:
             logger.error(f"Error processing article {article.url}: {str(e)}")
-            # Initialize empty lists if processing fails
-            article.threat_actors = []
-            article.ttps = []
-            article.iocs = []
+            _clear_entities(article)
+
+def _pipe_articles(articles: List[Article], batch_size: int, n_process: int) -> None:
+    # One pipe call over every text, so nlp.pipe fills its own batches and keeps all n_process workers busy
+    done = 0
+    try:
+        docs = get_nlp().pipe((article_text(article) for article in articles), batch_size=batch_size, n_process=n_process)
+        for article, doc in zip(articles, docs):
+            _process_article(article, doc)
+            done += 1
+    except Exception as e:
+        # A failing document aborts the pipe call itself; process the rest one by one so only it is lost
+        logger.warning(f"Batched entity extraction failed, falling back to per-article processing: {str(e)}")
+        for article in articles[done:]:
+            _process_article(article)
+
+def extract_entities(articles: List[Article], batch_size: Optional[int] = SPACY_BATCH_SIZE, n_process: int = SPACY_N_PROCESS) -> List[Article]:
+    """
+    Annotate articles with threat actors, TTPs and IOCs.
+
+    With `batch_size` set, all texts go through a single `nlp.pipe` call with
+    that batch size (using `n_process` worker processes); otherwise each
+    article is processed individually. Both paths produce identical entities.
+    """
+    logger.info("START: Entity Extraction")
+    start = time.perf_counter()
+    if batch_size:
+        _pipe_articles(articles, batch_size, n_process)
+    else:
+        for article in articles:
+            _process_article(article)
+    metrics.incr("spacy_docs", len(articles))
+    metrics.incr("spacy_seconds", time.perf_counter() - start)
 
     logger.info("END: Entity Extraction completed successfully.")
-    return articles
\ No newline at end of file
+    return articles
@@ -0,0 +1,81 @@
+import re
+from typing import Iterator, List, Tuple
+
+# Scans raw article text for indicators of compromise with plain compiled
+# regular expressions, so it works on any text without loading spaCy.
+
+# Common defanging notations and their refanged form
+_DEFANG_REPLACEMENTS = {
+    "[.]": ".", "(.)": ".", "{.}": ".", "[dot]": ".", "(dot)": ".", "{dot}": ".",
+    "[:]": ":", "[://]": "://",
+    "[@]": "@", "(@)": "@", "[at]": "@", "(at)": "@",
+    "hxxp": "http", "hxxps": "https", "fxp": "ftp",
+}
+# Short bracketed tokens are looked up in the table above; anything else is left as is
+_DEFANG_RE = re.compile(r"[\[({][.:/@a-z]{1,3}[\])}]|\b(?:hxxps?|fxp)(?=\[?:)", re.IGNORECASE)
+
+# Extensions that look like TLDs but are almost always file names in reports
+_FILE_EXTENSIONS = {
+    "exe", "dll", "sys", "bat", "cmd", "ps1", "vbs", "js", "jar", "zip", "rar", "7z", "gz",
+    "tar", "doc", "docx", "docm", "xls", "xlsx", "xlsm", "ppt", "pptx", "pdf", "rtf", "txt",
+    "lnk", "iso", "img", "msi", "hta", "py", "sh", "php", "html", "htm", "png", "jpg", "gif",
+    "dat", "tmp", "log", "bin", "elf", "so", "apk", "ini", "cfg", "json", "xml", "csv",
+}
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_LABEL = r"[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?"
+
+# One alternation, tried left to right at each position: URLs and emails
+# before bare domains, longer hashes before shorter ones. The leading
+# lookbehind rejects positions inside a word before any alternative runs,
+# which keeps the scan close to a single cheap pass over the text.
+_IOC_RE = re.compile(
+    rf"""
+    (?<![\w.%+-])
+    (?:
+    (?P<URL>\b(?:https?|ftp)://[^\s<>"'`]+)
+    |(?P<Email>\b[a-z0-9._%+-]+@(?:{_LABEL}\.)+[a-z]{{2,24}}\b)
+    |(?P<CVE>\bCVE-\d{{4}}-\d{{4,7}}\b)
+    |(?P<SHA256_HASH>\b[a-f0-9]{{64}}\b)
+    |(?P<SHA1_HASH>\b[a-f0-9]{{40}}\b)
+    |(?P<MD5_HASH>\b[a-f0-9]{{32}}\b)
+    |(?P<IP_ADDRESS>(?<![\d.]){_OCTET}(?:\.{_OCTET}){{3}}(?![\d]|\.\d))
+    |(?P<DOMAIN>\b(?:{_LABEL}\.)+(?P<tld>[a-z]{{2,24}})\b(?!@))
+    )
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+IOC_TYPES = ("URL", "Email", "CVE", "SHA256_HASH", "SHA1_HASH", "MD5_HASH", "IP_ADDRESS", "DOMAIN")
+
+
+def refang(text: str) -> str:
+    """Undo common defanging such as `1.2.3[.]4`, `hxxp://` or `user[at]example[.]com`."""
+    return _DEFANG_RE.sub(lambda m: _DEFANG_REPLACEMENTS.get(m.group(0).lower(), m.group(0)), text)
+
+
+def _normalize(ioc_type: str, value: str) -> str:
+    if ioc_type == "URL":
+        return value.rstrip(".,;:!?)]}'\"")
+    if ioc_type == "CVE":
+        return value.upper()
+    return value.lower()
+
+
+def iter_iocs(text: str) -> Iterator[Tuple[str, str]]:
+    """Yield `(type, value)` for every indicator in `text`, in order of appearance."""
+    for match in _IOC_RE.finditer(refang(text)):
+        ioc_type = match.lastgroup
+        if ioc_type == "DOMAIN" and match.group("tld").lower() in _FILE_EXTENSIONS:
+            continue
+        yield ioc_type, _normalize(ioc_type, match.group(ioc_type))
+
+
+def scan_iocs(text: str, unique: bool = False) -> List[Tuple[str, str]]:
+    """
+    Extract IPs, hashes, CVEs, domains, URLs and emails from raw text.
+    With `unique`, each `(type, value)` pair is returned once.
+    """
+    if not unique:
+        return list(iter_iocs(text))
+    return list(dict.fromkeys(iter_iocs(text)))
@@ -0,0 +1,165 @@
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import (
+    NON_THREAT_KEYWORDS,
+    RELEVANCE_FILTER,
+    RELEVANCE_MODEL_PATH,
+    RELEVANCE_THRESHOLD,
+    RELEVANCE_WEIGHTS,
+    THREAT_KEYWORDS,
+)
+from ..models.data_models import Article, RelevanceDecision
+from ..utils.logging_config import logger
+from ..utils.metrics import metrics
+from ..utils.text_store import article_text
+
+# Technical indicators that marketing pages rarely contain (domains and URLs are everywhere)
+STRONG_IOC_TYPES = ("SHA256_HASH", "SHA1_HASH", "MD5_HASH", "IP_ADDRESS")
+
+FEATURES = [name for name in RELEVANCE_WEIGHTS if name != "bias"]
+
+
+def _keyword_re(keywords: List[str]) -> "re.Pattern":
+    # Matched against lowercased text, which is much faster than re.IGNORECASE;
+    # longest first so "threat actors" wins over "threat actor"
+    alternatives = "|".join(re.escape(keyword.lower()) for keyword in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b")
+
+
+_THREAT_RE = _keyword_re(THREAT_KEYWORDS)
+_NON_THREAT_RE = _keyword_re(NON_THREAT_KEYWORDS)
+
+
+def article_features(article: Article) -> Dict[str, float]:
+    """
+    Features of `article` for the relevance score: keyword and indicator
+    densities from the text, plus counts of the entities extract_entities
+    found. Densities are per 1000 words and log-scaled, like the counts.
+    """
+    text = article_text(article).lower()
+    words = max(1, len(text.split())) / 1000
+    strong_iocs = sum(1 for ioc in article.iocs if ioc.type in STRONG_IOC_TYPES)
+    cves = {ioc.value for ioc in article.iocs if ioc.type == "CVE"}
+    return {
+        "keyword_density": math.log1p(len(_THREAT_RE.findall(text)) / words),
+        "marketing_density": math.log1p(len(_NON_THREAT_RE.findall(text)) / words),
+        "ioc_density": math.log1p(strong_iocs / words),
+        "cves": math.log1p(len(cves)),
+        "ttps": math.log1p(len(article.ttps)),
+        "actors": math.log1p(len(article.threat_actors)),
+        "title_keyword": 1.0 if _THREAT_RE.search(article.title.lower()) else 0.0,
+    }
+
+
+@lru_cache(maxsize=None)
+def load_weights(path: Optional[str] = RELEVANCE_MODEL_PATH) -> Dict[str, float]:
+    """Weights trained with `fit` from `path`, or the configured RELEVANCE_WEIGHTS."""
+    if not path:
+        return dict(RELEVANCE_WEIGHTS)
+    with open(path) as f:
+        weights = json.load(f)["weights"]
+    logger.info(f"Loaded relevance model from {path}")
+    return weights
+
+
+def relevance_score(features: Dict[str, float], weights: Dict[str, float]) -> float:
+    z = weights.get("bias", 0.0) + sum(weights.get(name, 0.0) * value for name, value in features.items())
+    return 1 / (1 + math.exp(-max(-60.0, min(60.0, z))))
+
+
+def score_article(article: Article, threshold: float = RELEVANCE_THRESHOLD, weights: Optional[Dict[str, float]] = None) -> RelevanceDecision:
+    features = article_features(article)
+    score = relevance_score(features, weights or load_weights())
+    return RelevanceDecision(
+        score=round(score, 4),
+        relevant=score >= threshold,
+        features={name: round(value, 4) for name, value in features.items()},
+    )
+
+
+def is_relevant(article: Article) -> bool:
+    return article.relevance is None or article.relevance.relevant
+
+
+def triage_articles(articles: List[Article], threshold: float = RELEVANCE_THRESHOLD) -> List[Article]:
+    """
+    Score each article and record the decision on it (`article.relevance`),
+    returning the articles worth sending to the LLM. Skipped articles stay in
+    the report with their decision but get no analysis.
+    """
+    if not RELEVANCE_FILTER:
+        return articles
+    weights = load_weights()
+    relevant = []
+    for article in articles:
+        article.relevance = score_article(article, threshold, weights)
+        if article.relevance.relevant:
+            relevant.append(article)
+        else:
+            logger.info(f"Skipping analysis of {article.url}: relevance {article.relevance.score:.2f} < {threshold}")
+    skipped = len(articles) - len(relevant)
+    metrics.incr("articles_relevant", len(relevant))
+    metrics.incr("articles_skipped_irrelevant", skipped)
+    if skipped:
+        logger.info(f"Relevance filter kept {len(relevant)} of {len(articles)} articles")
+    return relevant
+
+
+def fit(samples: List[Tuple[Dict[str, float], bool]], epochs: int = 500, learning_rate: float = 0.5, l2: float = 0.001) -> Dict[str, float]:
+    """Fit logistic regression weights to `(features, relevant)` samples by batch gradient descent."""
+    weights = {"bias": 0.0, **{name: 0.0 for name in FEATURES}}
+    for _ in range(epochs):
+        gradient = dict.fromkeys(weights, 0.0)
+        for features, label in samples:
+            error = relevance_score(features, weights) - (1.0 if label else 0.0)
+            gradient["bias"] += error
+            for name in FEATURES:
+                gradient[name] += error * features.get(name, 0.0)
+        for name in weights:
+            penalty = l2 * weights[name] if name != "bias" else 0.0
+            weights[name] -= learning_rate * (gradient[name] / len(samples) + penalty)
+    return weights
+
+
+def _read_records(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score articles for relevance or train the relevance model.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    score_parser = commands.add_parser(
+        "score", help="Score articles in an NDJSON file, e.g. a run's validate_data checkpoint"
+    )
+    score_parser.add_argument("articles")
+    score_parser.add_argument("--threshold", type=float, default=RELEVANCE_THRESHOLD)
+    fit_parser = commands.add_parser(
+        "fit", help="Train weights from NDJSON article records labelled with a boolean 'relevant' field"
+    )
+    fit_parser.add_argument("articles")
+    fit_parser.add_argument("--output", required=True, help="Where to write the model (use as RELEVANCE_MODEL_PATH)")
+    args = parser.parse_args()
+
+    if args.command == "score":
+        for record in _read_records(args.articles):
+            decision = score_article(Article.model_validate(record), args.threshold)
+            print(f"{decision.score:.3f} {'keep' if decision.relevant else 'skip'} {record['url']}")
+    else:
+        samples = [
+            (article_features(Article.model_validate(record)), bool(record["relevant"]))
+            for record in _read_records(args.articles)
+        ]
+        trained = fit(samples)
+        accuracy = sum((relevance_score(f, trained) >= 0.5) == label for f, label in samples) / max(1, len(samples))
+        with open(args.output, "w") as f:
+            json.dump({"weights": trained, "samples": len(samples), "training_accuracy": accuracy}, f, indent=2)
+        print(f"Trained on {len(samples)} articles, training accuracy {accuracy:.0%}; wrote {args.output}")
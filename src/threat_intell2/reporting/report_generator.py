@@ -1,7 +1,10 @@
+import uuid
+from datetime import datetime
 from typing import List, Dict, Any
-from threat_intell2.models.data_models import Analysis, ThreatItem, RecommendationItem
+from threat_intell2.models.data_models import Analysis, Article, ThreatIntelligenceReport, ThreatItem, RecommendationItem
+from threat_intell2.reporting.report_writer import write_report
 
-def generate_report(analyzed_data: List[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
+def build_analysis(analyzed_data: List[Dict[str, Any]]) -> Analysis:
     executive_summary = " ".join(
         [item["analysis"]["Executive_Summary"] for item in analyzed_data if "analysis" in item]
     )
@@ -24,7 +27,7 @@ def generate_report(analyzed_data: List[Dict[str, Any]], timestamp: str) -> Dict
     recommendations = list({rec.description: rec for rec in recommendations}.values())
     global_impact = global_impact.strip()
 
-    analysis = Analysis(
+    return Analysis(
         executive_summary=executive_summary,
         threat_landscape=threat_landscape,
         emerging_threats=emerging_threats,
@@ -32,8 +35,25 @@ def generate_report(analyzed_data: List[Dict[str, Any]], timestamp: str) -> Dict
         recommendations=recommendations
     )
 
+def generate_report(analyzed_data: List[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
+    analysis = build_analysis(analyzed_data)
+
     report = {
         "threat_intelligence": analysis.dict()
     }
 
-    return report
\ No newline at end of file
+    return report
+
+def build_threat_report(articles: List[Article], analyzed_data: List[Dict[str, Any]]) -> ThreatIntelligenceReport:
+    return ThreatIntelligenceReport(
+        id=str(uuid.uuid4()),  # Generate a unique UUID
+        timestamp=datetime.now(),
+        articles=articles,
+        analysis=build_analysis(analyzed_data),
+        version="0.1.0",
+        generated_by="threat-intell2"
+    )
+
+def save_report(threat_report: ThreatIntelligenceReport, report_path: str) -> str:
+    # Streams the report to disk; the returned path carries the format/compression extension
+    return write_report(threat_report, report_path)
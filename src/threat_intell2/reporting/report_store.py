@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models.data_models import Article, ThreatIntelligenceReport
+from ..utils.logging_config import logger
+from ..utils.text_store import article_text
+
+ACTOR = "actor"
+IOC = "ioc"
+TTP = "ttp"
+CVE = "cve"
+ENTITY_KINDS = (ACTOR, IOC, TTP, CVE)
+
+_CVE_RE = re.compile(r"\bCVE-\d{4}-\d{4,7}\b", re.IGNORECASE)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS reports ("
+    "id TEXT PRIMARY KEY, timestamp REAL NOT NULL, version TEXT, generated_by TEXT, "
+    "executive_summary TEXT, ingested_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports(timestamp)",
+    "CREATE TABLE IF NOT EXISTS articles ("
+    "id INTEGER PRIMARY KEY, report_id TEXT NOT NULL REFERENCES reports(id), "
+    "url TEXT NOT NULL, title TEXT, source TEXT, published REAL)",
+    "CREATE INDEX IF NOT EXISTS idx_articles_report ON articles(report_id)",
+    "CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)",
+    # One row per (article, entity); `value` is normalised for lookups, `display` keeps the original form
+    "CREATE TABLE IF NOT EXISTS entities ("
+    "kind TEXT NOT NULL, value TEXT NOT NULL, display TEXT NOT NULL, detail TEXT, "
+    "article_id INTEGER NOT NULL REFERENCES articles(id), report_id TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_entities_lookup ON entities(kind, value)",
+    "CREATE INDEX IF NOT EXISTS idx_entities_report ON entities(report_id)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    "title, text, entities, content='', tokenize='unicode61')",
+)
+
+
+def normalize_value(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+def _timestamp(value) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+def _article_entities(article: Article) -> List[Tuple[str, str, Optional[str]]]:
+    """(kind, display value, detail) for every actor name/alias, IOC, TTP and CVE in `article`."""
+    entities = set()
+    for actor in article.threat_actors:
+        for name in actor.names + actor.aliases:
+            entities.add((ACTOR, name, None))
+    for ioc in article.iocs:
+        entities.add((IOC, ioc.value, ioc.type))
+        if ioc.type == "CVE":
+            entities.add((CVE, ioc.value.upper(), None))
+    for ttp in article.ttps:
+        entities.add((TTP, ttp.technique, ttp.mitre_id))
+    # CVEs mentioned in the text but not picked up as IOCs
+    for match in _CVE_RE.finditer(article_text(article)):
+        entities.add((CVE, match.group(0).upper(), None))
+    return [entity for entity in entities if entity[1].strip()]
+
+
+class ReportStore:
+    """
+    SQLite index over every generated ThreatIntelligenceReport.
+
+    Reports are ingested incrementally (re-ingesting a report id is a no-op).
+    Actor names and aliases, IOC values, TTPs and CVEs are indexed per
+    article for exact lookups, and article titles and text go into an FTS5
+    index for free-text search. Lookups can be restricted to reports
+    generated after a given time.
+    """
+
+    def __init__(self, path: str, index_text: bool = True):
+        self.path = path
+        self.index_text = index_text
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.commit()
+        return self._conn
+
+    def ingest(self, report: ThreatIntelligenceReport) -> bool:
+        """Index `report`, returning False if it was already stored."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO reports "
+                    "(id, timestamp, version, generated_by, executive_summary, ingested_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        report.id, report.timestamp.timestamp(), report.version, report.generated_by,
+                        report.analysis.executive_summary, time.time(),
+                    ),
+                ).rowcount
+                if not inserted:
+                    return False
+                for article in report.articles:
+                    self._ingest_article(conn, report.id, article)
+        logger.info(f"Report store ingested report {report.id} ({len(report.articles)} articles)")
+        return True
+
+    def _ingest_article(self, conn: sqlite3.Connection, report_id: str, article: Article) -> None:
+        article_id = conn.execute(
+            "INSERT INTO articles (report_id, url, title, source, published) VALUES (?, ?, ?, ?, ?)",
+            (report_id, str(article.url), article.title, article.source, _timestamp(article.published_date)),
+        ).lastrowid
+        entities = _article_entities(article)
+        conn.executemany(
+            "INSERT INTO entities (kind, value, display, detail, article_id, report_id) VALUES (?, ?, ?, ?, ?, ?)",
+            [(kind, normalize_value(display), display, detail, article_id, report_id) for kind, display, detail in entities],
+        )
+        conn.execute(
+            "INSERT INTO articles_fts (rowid, title, text, entities) VALUES (?, ?, ?, ?)",
+            (
+                article_id, article.title, article_text(article) if self.index_text else "",
+                " ".join(display for _, display, _ in entities),
+            ),
+        )
+
+    def ingest_file(self, path: str) -> bool:
+        from .report_writer import load_report
+
+        return self.ingest(load_report(path))
+
+    def _query(self, sql: str, params: Iterable[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._connection().execute(sql, tuple(params))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def lookup(self, kind: str, value: str, since: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Articles mentioning the actor/IOC/TTP/CVE `value` (case-insensitive,
+        exact match), newest report first. `since` is a Unix timestamp.
+        """
+        if kind not in ENTITY_KINDS:
+            raise ValueError(f"Unknown entity kind: {kind}")
+        return self._query(
+            "SELECT r.id AS report_id, r.timestamp, a.url, a.title, e.display AS value, e.detail "
+            "FROM entities e JOIN articles a ON a.id = e.article_id JOIN reports r ON r.id = e.report_id "
+            "WHERE e.kind = ? AND e.value = ? AND r.timestamp >= ? "
+            "ORDER BY r.timestamp DESC LIMIT ?",
+            (kind, normalize_value(value), since or 0.0, limit),
+        )
+
+    def search(self, query: str, since: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Full-text search over article titles, text and entities using FTS5 query syntax."""
+        return self._query(
+            "SELECT r.id AS report_id, r.timestamp, a.url, a.title "
+            "FROM articles_fts f JOIN articles a ON a.id = f.rowid JOIN reports r ON r.id = a.report_id "
+            "WHERE articles_fts MATCH ? AND r.timestamp >= ? "
+            "ORDER BY f.rank LIMIT ?",
+            (query, since or 0.0, limit),
+        )
+
+    def top(self, kind: str, since: Optional[float] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most frequently mentioned entities of `kind`, by number of articles."""
+        return self._query(
+            "SELECT MIN(e.display) AS value, COUNT(DISTINCT e.article_id) AS articles, "
+            "COUNT(DISTINCT e.report_id) AS reports, MAX(r.timestamp) AS last_seen "
+            "FROM entities e JOIN reports r ON r.id = e.report_id "
+            "WHERE e.kind = ? AND r.timestamp >= ? GROUP BY e.value ORDER BY articles DESC LIMIT ?",
+            (kind, since or 0.0, limit),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            counts = {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("reports", "articles", "entities")
+            }
+            counts.update(conn.execute("SELECT kind, COUNT(*) FROM entities GROUP BY kind").fetchall())
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..config import REPORT_STORE_PATH
+
+    parser = argparse.ArgumentParser(description="Query the historical threat intelligence report store.")
+    parser.add_argument("--db", default=REPORT_STORE_PATH, help="Path of the report store database")
+    parser.add_argument("--days", type=float, help="Only consider reports from the last N days")
+    parser.add_argument("--limit", type=int, default=100)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="Index report files (.json/.ndjson, optionally .gz/.zst)")
+    ingest_parser.add_argument("paths", nargs="+")
+    for kind in ENTITY_KINDS:
+        commands.add_parser(kind, help=f"Articles mentioning a {kind}").add_argument("value")
+    commands.add_parser("search", help="Full-text search (FTS5 syntax)").add_argument("query")
+    commands.add_parser("top", help="Most mentioned entities").add_argument("kind", choices=ENTITY_KINDS)
+    commands.add_parser("stats", help="Row counts")
+    args = parser.parse_args()
+
+    store = ReportStore(args.db)
+    since = time.time() - args.days * 86400 if args.days else None
+    if args.command == "ingest":
+        added = sum(store.ingest_file(path) for path in args.paths)
+        result = {"ingested": added, "skipped": len(args.paths) - added}
+    elif args.command in ENTITY_KINDS:
+        result = store.lookup(args.command, args.value, since=since, limit=args.limit)
+    elif args.command == "search":
+        result = store.search(args.query, since=since, limit=args.limit)
+    elif args.command == "top":
+        result = store.top(args.kind, since=since, limit=args.limit)
+    else:
+        result = store.stats()
+    print(json.dumps(result, indent=2))
+    store.close()
@@ -0,0 +1,137 @@
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from ..config import REPORT_COMPRESSION, REPORT_FORMAT, REPORT_INCLUDE_TEXT
+from ..models.data_models import Article, ThreatIntelligenceReport
+from ..utils import json_codec
+from ..utils.logging_config import logger
+from ..utils.text_store import article_text
+
+_EXTENSIONS = {"json": ".json", "ndjson": ".ndjson"}
+_COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _open_input(path: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        import zstandard
+
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+@contextmanager
+def _open_output(path: str, compression: Optional[str]) -> Iterator[BinaryIO]:
+    if compression == "gzip":
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            yield f
+    elif compression == "zstd":
+        import zstandard
+
+        with open(path, "wb") as raw, zstandard.ZstdCompressor(level=3).stream_writer(raw) as f:
+            yield f
+    else:
+        with open(path, "wb") as f:
+            yield f
+
+
+def _resolve_compression(compression: Optional[str]) -> Optional[str]:
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.warning("zstandard is not installed; writing the report with gzip instead")
+            return "gzip"
+    if compression not in _COMPRESSION_EXTENSIONS:
+        raise ValueError(f"Unsupported report compression: {compression}")
+    return compression
+
+
+def report_path_for(base_path: str, fmt: str, compression: Optional[str]) -> str:
+    root, _ = os.path.splitext(base_path)
+    return root + _EXTENSIONS[fmt] + _COMPRESSION_EXTENSIONS[compression]
+
+
+def _article_serializer(include_text: bool) -> Callable[[Article], dict]:
+    if not include_text:
+        return lambda article: article.model_dump(mode="json", exclude={"text"})
+
+    def serialize(article: Article) -> dict:
+        # Spilled texts are loaded one article at a time as the report is streamed out
+        data = article.model_dump(mode="json")
+        data["text"] = article_text(article)
+        return data
+
+    return serialize
+
+
+def write_report(
+    report: ThreatIntelligenceReport,
+    base_path: str,
+    fmt: str = REPORT_FORMAT,
+    compression: Optional[str] = REPORT_COMPRESSION,
+    include_text: bool = REPORT_INCLUDE_TEXT,
+) -> str:
+    """
+    Serialize `report` one article at a time instead of building a full dict
+    first, so memory used while writing does not grow with the report.
+
+    `fmt` is "json" (a single document with the same keys as before) or
+    "ndjson" (a header line followed by one line per article). Output can be
+    gzip- or zstd-compressed, and raw article text can be left out. Returns
+    the path written, whose extension reflects format and compression.
+    """
+    if fmt not in _EXTENSIONS:
+        raise ValueError(f"Unsupported report format: {fmt}")
+    compression = _resolve_compression(compression)
+    path = report_path_for(base_path, fmt, compression)
+    serialize_article = _article_serializer(include_text)
+    header = report.model_dump(mode="json", exclude={"articles"})
+
+    with _open_output(path, compression) as f:
+        if fmt == "ndjson":
+            f.write(json_codec.dumps({"type": "report", **header, "article_count": len(report.articles)}))
+            f.write(b"\n")
+            for article in report.articles:
+                f.write(json_codec.dumps({"type": "article", **serialize_article(article)}))
+                f.write(b"\n")
+        else:
+            # Header fields first, then the articles array streamed element by element
+            f.write(json_codec.dumps(header)[:-1])
+            f.write(b',"articles":[')
+            for index, article in enumerate(report.articles):
+                if index:
+                    f.write(b",")
+                f.write(json_codec.dumps(serialize_article(article)))
+            f.write(b"]}")
+    return path
+
+
+def load_report(path: str) -> ThreatIntelligenceReport:
+    """
+    Read a report written by `write_report` in any format or compression.
+    Reports written without article text load with empty `text` fields.
+    """
+    with _open_input(path) as f:
+        if ".ndjson" in os.path.basename(path):
+            header, articles = None, []
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json_codec.loads(line)
+                if record.pop("type", None) == "report":
+                    record.pop("article_count", None)
+                    header = record
+                else:
+                    articles.append(record)
+            data = {**(header or {}), "articles": articles}
+        else:
+            data = json_codec.loads(f.read())
+    for article in data.get("articles", []):
+        article.setdefault("text", "")
+    return ThreatIntelligenceReport.model_validate(data)
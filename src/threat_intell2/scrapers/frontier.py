@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+LISTING = "listing"
+ARTICLE = "article"
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+
+class FrontierItem(NamedTuple):
+    url: str
+    kind: str
+    source: int
+    depth: int
+    ordinal: int
+
+
+class SourceLimits(NamedTuple):
+    priority: int = 0
+    max_articles: int = 5
+    max_depth: int = 0
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+class CrawlFrontier:
+    """
+    Persistent crawl frontier: a priority queue of listing pages and articles.
+
+    - Each source has an article quota and a pagination depth limit; listing
+      pages beyond the limit and articles beyond the quota are not queued.
+    - Items for a host are only handed out while it has fewer than
+      `per_host_concurrency` items in flight and `host_delay` seconds have
+      passed since its last one, so a slow or throttled host never ties up
+      every worker.
+    - State lives in SQLite (in memory unless `path` is given). A crawl that
+      stops before the frontier is drained resumes from the remaining items
+      when started again with the same sources within `resume_max_age`
+      seconds of being seeded, and articles finished before the interruption
+      are kept. Older crawls are discarded and started afresh.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        host_delay: float = 0.0,
+        per_host_concurrency: int = 2,
+        resume_max_age: Optional[float] = None,
+    ):
+        self.persistent = bool(path)
+        self.resume_max_age = resume_max_age
+        self.host_delay = host_delay
+        self.per_host_concurrency = per_host_concurrency
+        self._in_flight: Counter = Counter()
+        self._host_ready_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "max_articles INTEGER NOT NULL, max_depth INTEGER NOT NULL, articles_queued INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, host TEXT NOT NULL, "
+            "kind TEXT NOT NULL, source INTEGER NOT NULL, depth INTEGER NOT NULL, ordinal INTEGER NOT NULL, "
+            "priority INTEGER NOT NULL, state TEXT NOT NULL, result TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_items_pending ON items(state, priority DESC, seq)")
+        self._conn.commit()
+
+    def start(self, sources: List[Tuple[str, SourceLimits]]) -> bool:
+        """
+        Seed the frontier with one listing page per source. Returns True when
+        an unfinished crawl of the same sources, seeded less than
+        `resume_max_age` seconds ago, was found and is resumed instead.
+        """
+        seed = hashlib.sha256(json.dumps(sources).encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock, self._conn:
+            meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+            unfinished = self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE state != ?", (DONE,)
+            ).fetchone()[0]
+            if meta.get("seed") == seed and unfinished:
+                # Frontiers written before seeding was timed count as stale
+                age = now - float(meta.get("seeded_at", 0))
+                if self.resume_max_age is None or age <= self.resume_max_age:
+                    self._conn.execute("UPDATE items SET state = ? WHERE state = ?", (PENDING, IN_PROGRESS))
+                    return True
+            self._conn.execute("DELETE FROM items")
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seed', ?)", (seed,))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded_at', ?)", (str(now),))
+            for index, (url, limits) in enumerate(sources):
+                self._conn.execute(
+                    "INSERT INTO sources (id, url, priority, max_articles, max_depth) VALUES (?, ?, ?, ?, ?)",
+                    (index, url, limits.priority, limits.max_articles, limits.max_depth),
+                )
+                self._insert(url, LISTING, index, 0, 0, self._priority(limits.priority, LISTING, 0))
+        return False
+
+    @staticmethod
+    def _priority(source_priority: int, kind: str, depth: int) -> int:
+        # Higher runs first: a page's articles come before the next page of the same source
+        return source_priority * 100 - depth * 2 + (1 if kind == ARTICLE else 0)
+
+    def _insert(self, url: str, kind: str, source: int, depth: int, ordinal: int, priority: int) -> bool:
+        return bool(self._conn.execute(
+            "INSERT OR IGNORE INTO items (url, host, kind, source, depth, ordinal, priority, state) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, _host(url), kind, source, depth, ordinal, priority, PENDING),
+        ).rowcount)
+
+    def _source(self, source: int) -> Tuple[int, int, int, int]:
+        return self._conn.execute(
+            "SELECT priority, max_articles, max_depth, articles_queued FROM sources WHERE id = ?", (source,)
+        ).fetchone()
+
+    def push_articles(self, page: FrontierItem, links: List[str]) -> int:
+        """Queue article links found on `page` up to the source's quota, returning how many were added."""
+        with self._lock, self._conn:
+            priority, max_articles, _, queued = self._source(page.source)
+            added = 0
+            for link in links:
+                if queued + added >= max_articles:
+                    break
+                if self._insert(link, ARTICLE, page.source, page.depth, queued + added,
+                                self._priority(priority, ARTICLE, page.depth)):
+                    added += 1
+            self._conn.execute(
+                "UPDATE sources SET articles_queued = articles_queued + ? WHERE id = ?", (added, page.source)
+            )
+        return added
+
+    def push_next_page(self, page: FrontierItem, next_pages: List[str]) -> bool:
+        """Queue the first new next page of `page` if the source is under quota and depth allows."""
+        with self._lock, self._conn:
+            priority, max_articles, max_depth, queued = self._source(page.source)
+            if queued >= max_articles or page.depth >= max_depth:
+                return False
+            for url in next_pages:
+                if self._insert(url, LISTING, page.source, page.depth + 1, 0,
+                                self._priority(priority, LISTING, page.depth + 1)):
+                    return True
+        return False
+
+    def _blocked_hosts(self, now: float) -> List[str]:
+        return [
+            host for host in set(self._in_flight) | set(self._host_ready_at)
+            if self._in_flight[host] >= self.per_host_concurrency or self._host_ready_at.get(host, 0.0) > now
+        ]
+
+    def pop(self) -> Tuple[Optional[FrontierItem], Optional[float]]:
+        """
+        Claim the highest-priority item whose host may be contacted now.
+
+        Returns `(item, None)`, or `(None, wait)` where `wait` is how long until
+        a delayed host becomes available (None if only in-flight work remains).
+        """
+        now = time.monotonic()
+        with self._lock, self._conn:
+            blocked = self._blocked_hosts(now)
+            placeholders = ",".join("?" * len(blocked))
+            row = self._conn.execute(
+                "SELECT seq, url, host, kind, source, depth, ordinal FROM items "
+                f"WHERE state = ? AND host NOT IN ({placeholders}) ORDER BY priority DESC, seq LIMIT 1",
+                (PENDING, *blocked),
+            ).fetchone()
+            if row is None:
+                waits = [
+                    ready_at - now for host, ready_at in self._host_ready_at.items()
+                    if ready_at > now and self._in_flight[host] < self.per_host_concurrency
+                ]
+                return None, min(waits) if waits else None
+            seq, url, host, kind, source, depth, ordinal = row
+            self._conn.execute("UPDATE items SET state = ? WHERE seq = ?", (IN_PROGRESS, seq))
+            self._in_flight[host] += 1
+            self._host_ready_at[host] = now + self.host_delay
+        return FrontierItem(url, kind, source, depth, ordinal), None
+
+    def complete(self, item: FrontierItem, result: Optional[dict] = None) -> None:
+        """Mark `item` done, keeping `result` (a scraped article) for resumed runs."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE items SET state = ?, result = ? WHERE url = ?",
+                (DONE, json.dumps(result) if result is not None else None, item.url),
+            )
+            host = _host(item.url)
+            self._in_flight[host] -= 1
+            if self._in_flight[host] <= 0:
+                del self._in_flight[host]
+            # Forget hosts whose delay has passed so the blocked list stays short
+            now = time.monotonic()
+            self._host_ready_at = {h: t for h, t in self._host_ready_at.items() if t > now or h in self._in_flight}
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE state = ?", (PENDING,)).fetchone()[0]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(self._in_flight.values())
+
+    def results(self) -> Iterator[Tuple[Tuple[int, int], dict]]:
+        """Articles completed so far as `((source, ordinal), article fields)`, in crawl order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, ordinal, result FROM items WHERE kind = ? AND state = ? AND result IS NOT NULL "
+                "ORDER BY source, ordinal",
+                (ARTICLE, DONE),
+            ).fetchall()
+        for source, ordinal, result in rows:
+            yield (source, ordinal), json.loads(result)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
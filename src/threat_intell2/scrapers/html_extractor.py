@@ -0,0 +1,34 @@
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from ..config import EXTRACTION_EXECUTOR, EXTRACTION_WORKERS
+
+# One long-lived Goose instance per worker thread (and therefore per worker process)
+_local = threading.local()
+
+
+def _get_goose():
+    goose = getattr(_local, "goose", None)
+    if goose is None:
+        from goose3 import Goose
+
+        goose = _local.goose = Goose()
+    return goose
+
+
+def extract_article(html: str) -> Tuple[Optional[str], str]:
+    """Run Goose on raw HTML and return `(title, cleaned_text)`."""
+    extracted = _get_goose().extract(raw_html=html)
+    return extracted.title, extracted.cleaned_text
+
+
+def create_extraction_executor(kind: str = EXTRACTION_EXECUTOR, workers: int = EXTRACTION_WORKERS) -> Executor:
+    """
+    Build the pool used for HTML-to-text extraction. Goose parsing is CPU-bound,
+    so a process pool gives real parallelism; a thread pool avoids pickling the
+    HTML and is enough when only a handful of pages are extracted.
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers, initializer=_get_goose)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="goose", initializer=_get_goose)
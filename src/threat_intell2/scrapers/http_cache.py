@@ -0,0 +1,190 @@
+import fnmatch
+import os
+import pickle
+import shutil
+import sqlite3
+import zlib
+from typing import Any, Tuple
+
+from aiohttp_client_cache import CacheBackend, FileBackend, SQLiteBackend
+
+from ..config import (
+    HTTP_CACHE_BACKEND,
+    HTTP_CACHE_COMPRESSION,
+    HTTP_CACHE_EXPIRE_AFTER,
+    HTTP_CACHE_LISTING_EXPIRE_AFTER,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_PATH,
+    HTTP_CACHE_URLS_EXPIRE_AFTER,
+)
+from ..utils.logging_config import logger
+from ..utils.metrics import metrics
+
+BACKENDS = ("sqlite", "filesystem", "memory")
+EVICT_TO = 0.9  # Eviction frees space down to this share of the limit, so it does not run on every write
+_ZLIB_HEADER = b"\x78"  # Pickles start with b"\x80"
+
+
+class ResponseSerializer:
+    """
+    Pickle cached responses, zlib-compressing them when `compress` is set.
+    Either form is read back, so toggling compression keeps existing entries.
+    """
+
+    def __init__(self, compress: bool = HTTP_CACHE_COMPRESSION, level: int = 6):
+        self.compress = compress
+        self.level = level
+
+    def dumps(self, obj: Any) -> bytes:
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return zlib.compress(data, self.level) if self.compress else data
+
+    def loads(self, data: bytes) -> Any:
+        data = bytes(data)
+        if data[:1] == _ZLIB_HEADER:
+            data = zlib.decompress(data)
+        return pickle.loads(data)
+
+
+def create_cache_backend(backend: str = HTTP_CACHE_BACKEND, path: str = HTTP_CACHE_PATH) -> CacheBackend:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported HTTP cache backend: {backend}")
+    options = {"expire_after": HTTP_CACHE_EXPIRE_AFTER, "allowed_codes": (200,), "allowed_methods": ("GET",)}
+    if backend == "memory":
+        return CacheBackend(**options)
+    directory = path if backend == "filesystem" else os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    backend_class = SQLiteBackend if backend == "sqlite" else FileBackend
+    return backend_class(cache_name=path, serializer=ResponseSerializer(), **options)
+
+
+def expire_after_for(url: str, listing: bool = False) -> int:
+    """
+    Seconds a response for `url` stays cached: the first matching
+    HTTP_CACHE_URLS_EXPIRE_AFTER pattern, else the default for its kind of page.
+    """
+    for pattern, expire_after in HTTP_CACHE_URLS_EXPIRE_AFTER.items():
+        if fnmatch.fnmatchcase(url, pattern):
+            return expire_after
+    return HTTP_CACHE_LISTING_EXPIRE_AFTER if listing else HTTP_CACHE_EXPIRE_AFTER
+
+
+def _cache_files(path: str):
+    # The filesystem backend keeps redirects in a SQLite file next to the responses
+    return [entry for entry in os.scandir(path) if entry.is_file() and not entry.name.startswith("redirects.sqlite")]
+
+
+def cache_usage(backend: str = HTTP_CACHE_BACKEND, path: str = HTTP_CACHE_PATH) -> Tuple[int, int]:
+    """`(responses, bytes)` held by a persistent cache."""
+    if backend == "sqlite" and os.path.exists(path):
+        conn = sqlite3.connect(path, timeout=30)
+        try:
+            return conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM responses").fetchone()
+        except sqlite3.OperationalError:
+            # No response cached yet
+            return 0, 0
+        finally:
+            conn.close()
+    if backend == "filesystem" and os.path.isdir(path):
+        files = _cache_files(path)
+        return len(files), sum(entry.stat().st_size for entry in files)
+    return 0, 0
+
+
+def _evict_sqlite(path: str, target: int) -> int:
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        # INSERT OR REPLACE gives a rewritten response a new rowid, so rowid order is write order
+        rows = conn.execute("SELECT key, LENGTH(value) FROM responses ORDER BY rowid").fetchall()
+        keys, freed = [], 0
+        for key, size in rows:
+            if freed >= target:
+                break
+            keys.append((key,))
+            freed += size or 0
+        conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+        conn.commit()
+        conn.execute("VACUUM")
+        return len(keys)
+    finally:
+        conn.close()
+
+
+def _evict_files(path: str, target: int) -> int:
+    removed, freed = 0, 0
+    for entry in sorted(_cache_files(path), key=lambda entry: entry.stat().st_mtime):
+        if freed >= target:
+            break
+        try:
+            size = entry.stat().st_size
+            os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+    return removed
+
+
+def evict(max_bytes: int = HTTP_CACHE_MAX_BYTES, backend: str = HTTP_CACHE_BACKEND, path: str = HTTP_CACHE_PATH) -> int:
+    """
+    Remove the oldest cached responses once the cache holds more than
+    `max_bytes`, down to EVICT_TO of the limit. Returns how many were removed.
+    """
+    if max_bytes <= 0 or backend == "memory":
+        return 0
+    _, size = cache_usage(backend, path)
+    if size <= max_bytes:
+        return 0
+    target = size - int(max_bytes * EVICT_TO)
+    removed = _evict_sqlite(path, target) if backend == "sqlite" else _evict_files(path, target)
+    logger.info(f"Evicted {removed} responses from the HTTP cache ({size} bytes, limit {max_bytes})")
+    return removed
+
+
+def maintain_http_cache() -> None:
+    """Enforce the cache size limit after a crawl and record cache statistics in the run metrics."""
+    try:
+        metrics.incr("http_cache_evicted", evict())
+        entries, size = cache_usage()
+    except (OSError, sqlite3.Error) as e:
+        # A busy or unreadable cache must not fail the crawl that used it
+        logger.warning(f"HTTP cache maintenance failed: {str(e)}")
+        return
+    metrics.set_counter("http_cache_entries", entries)
+    metrics.set_counter("http_cache_bytes", size)
+    hits = metrics.counters.get("http_cache_hits", 0)
+    requests = hits + metrics.counters.get("http_cache_misses", 0)
+    if requests:
+        logger.info(
+            f"HTTP cache: {hits:.0f}/{requests:.0f} responses from cache ({hits / requests:.0%}), "
+            f"{entries} responses, {size / 1024 / 1024:.1f} MiB"
+        )
+
+
+def clear(backend: str = HTTP_CACHE_BACKEND, path: str = HTTP_CACHE_PATH) -> None:
+    if backend == "sqlite" and os.path.exists(path):
+        os.remove(path)
+    elif backend == "filesystem" and os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or trim the scraper's HTTP response cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show the number and size of cached responses")
+    evict_parser = commands.add_parser("evict", help="Remove the oldest responses beyond a size limit")
+    evict_parser.add_argument("--max-bytes", type=int, default=HTTP_CACHE_MAX_BYTES)
+    commands.add_parser("clear", help="Delete the whole cache")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        count, total = cache_usage()
+        print(f"{HTTP_CACHE_BACKEND} cache at {HTTP_CACHE_PATH}: {count} responses, {total / 1024 / 1024:.1f} MiB")
+    elif args.command == "evict":
+        print(f"Evicted {evict(args.max_bytes)} responses")
+    else:
+        clear()
+        print(f"Cleared {HTTP_CACHE_PATH}")
@@ -0,0 +1,256 @@
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html import unescape
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+FEED_CONTENT_TYPES = ("application/rss+xml", "application/atom+xml")
+_FEED_CHUNK = 64 * 1024
+
+
+class LinkRules(NamedTuple):
+    """How article links are discovered and filtered for one source."""
+    feeds: Tuple[str, ...] = ()
+    sitemaps: Tuple[str, ...] = ()
+    include: Tuple[Pattern, ...] = ()
+    exclude: Tuple[Pattern, ...] = ()
+    same_host: bool = True
+
+    def accepts(self, link: str, source_url: str) -> bool:
+        if not link.startswith(("http://", "https://")):
+            return False
+        if self.same_host and _host(link) != _host(source_url):
+            return False
+        # Listing pages usually link to themselves; they are never articles
+        if link.rstrip("/") == source_url.rstrip("/"):
+            return False
+        if self.include and not any(pattern.search(link) for pattern in self.include):
+            return False
+        return not any(pattern.search(link) for pattern in self.exclude)
+
+
+def _host(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def build_rules(source_url: str, source_rules: Dict[str, dict], default_rules: dict) -> LinkRules:
+    """Merge the per-source entry of `source_rules` over `default_rules`."""
+    rules = {**default_rules, **source_rules.get(source_url, {})}
+    return LinkRules(
+        feeds=tuple(rules.get("feeds", ())),
+        sitemaps=tuple(rules.get("sitemaps", ())),
+        include=tuple(re.compile(pattern) for pattern in rules.get("include", ())),
+        exclude=tuple(re.compile(pattern) for pattern in rules.get("exclude", ())),
+        same_host=rules.get("same_host", True),
+    )
+
+
+# Only <a>, <link> and <base> start tags matter; comments and script/style bodies are skipped whole.
+# Quoted attribute values are matched whole, so a ">" inside one does not end the tag.
+_TAG_RE = re.compile(
+    r"""<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(a|link|base)\s((?:=\s*"[^"]*"|=\s*'[^']*'|[^>])*)>""",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
+def _attributes(raw: str) -> Dict[str, str]:
+    return {
+        match.group(1).lower(): unescape(match.group(2) or match.group(3) or match.group(4) or "").strip()
+        for match in _ATTR_RE.finditer(raw)
+    }
+
+
+def _absolute(base_url: str, origin: str, href: str) -> str:
+    # Fast paths for the common absolute and root-relative hrefs; urljoin handles the rest
+    if href.startswith(("http://", "https://")):
+        link = href
+    elif href.startswith("/") and not href.startswith("//"):
+        link = origin + href
+    else:
+        link = urljoin(base_url, href)
+    return link.split("#", 1)[0] if "#" in link else link
+
+
+class PageLinks(NamedTuple):
+    links: List[str]
+    feeds: List[str]
+    next_pages: List[str]
+
+
+def parse_anchors(html: str, base_url: str) -> PageLinks:
+    """
+    Return the absolute anchor links, advertised feed URLs and rel="next"
+    pagination links found in `html`.
+
+    A single regex pass over the start tags of interest replaces building a
+    DOM for the whole listing page.
+    """
+    links: List[str] = []
+    feeds: List[str] = []
+    next_pages: List[str] = []
+    origin = urljoin(base_url, "/").rstrip("/")
+    for match in _TAG_RE.finditer(html):
+        tag = match.group(2)
+        if tag is None:
+            continue
+        attributes = _attributes(match.group(3))
+        href = attributes.get("href")
+        if not href:
+            continue
+        tag = tag.lower()
+        rel = attributes.get("rel", "").lower().split()
+        if tag == "base":
+            base_url = urljoin(base_url, href)
+            origin = urljoin(base_url, "/").rstrip("/")
+            continue
+        if "next" in rel:
+            next_pages.append(_absolute(base_url, origin, href))
+        if tag == "a":
+            links.append(_absolute(base_url, origin, href))
+        elif "alternate" in rel and attributes.get("type") in FEED_CONTENT_TYPES:
+            feeds.append(urljoin(base_url, href))
+    return PageLinks(links, feeds, next_pages)
+
+
+def find_next_pages(page: PageLinks, page_url: str, pagination: Pattern) -> List[str]:
+    """
+    Pagination links of a listing page: rel="next" links first, then
+    same-host anchors matching `pagination` (whose first group is the page
+    number) in ascending page order.
+    """
+    candidates = list(page.next_pages)
+    numbered = []
+    for link in page.links:
+        match = pagination.search(link)
+        if match and _host(link) == _host(page_url):
+            numbered.append((int(match.group(1)), link))
+    candidates += [link for _, link in sorted(numbered)]
+    seen, pages = {page_url}, []
+    for link in candidates:
+        if link not in seen:
+            seen.add(link)
+            pages.append(link)
+    return pages
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _child_text(element: ET.Element, names: Iterable[str]) -> Optional[str]:
+    for child in element:
+        if _local(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def _entry_link(element: ET.Element) -> Optional[str]:
+    # Atom: <link rel="alternate" href=...>; RSS: <link>url</link>, else a permalink <guid>
+    for child in element:
+        if _local(child.tag) == "link":
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                return href.strip()
+            if not href and child.text and child.text.strip():
+                return child.text.strip()
+    guid = _child_text(element, ("guid",))
+    if guid and guid.startswith(("http://", "https://")):
+        return guid
+    return None
+
+
+class FeedEntry(NamedTuple):
+    link: str
+    date: Optional[datetime]
+
+
+def parse_feed_entries(document: str, base_url: str) -> Tuple[List[FeedEntry], List[FeedEntry]]:
+    """
+    Parse an RSS, Atom or sitemap document.
+
+    Returns (article entries, nested sitemap entries) in document order, each
+    with its date if the document has one. Elements are cleared as soon as
+    they are read, so large sitemaps are parsed without keeping the whole tree.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    entries: List[FeedEntry] = []
+    sitemaps: List[FeedEntry] = []
+
+    def read_events() -> None:
+        for _, element in parser.read_events():
+            name = _local(element.tag)
+            if name in ("item", "entry"):
+                link = _entry_link(element)
+                date = _child_text(element, ("pubDate", "published", "updated", "date"))
+            elif name == "url":
+                link = _child_text(element, ("loc",))
+                date = _child_text(element, ("lastmod",))
+            elif name == "sitemap":
+                loc = _child_text(element, ("loc",))
+                if loc:
+                    sitemaps.append(FeedEntry(urljoin(base_url, loc), _parse_date(_child_text(element, ("lastmod",)))))
+                element.clear()
+                continue
+            else:
+                continue
+            if link:
+                entries.append(FeedEntry(urldefrag(urljoin(base_url, link))[0], _parse_date(date)))
+            element.clear()
+
+    for start in range(0, len(document), _FEED_CHUNK):
+        parser.feed(document[start:start + _FEED_CHUNK])
+        read_events()
+    parser.close()
+    read_events()
+    return entries, sitemaps
+
+
+def newest_first(entries: Iterable[FeedEntry]) -> List[str]:
+    """Links of `entries`: dated ones newest first, then undated ones in their given order."""
+    ordered = sorted(entries, key=lambda entry: (entry.date is None, -entry.date.timestamp() if entry.date else 0.0))
+    return [entry.link for entry in ordered]
+
+
+def parse_feed(document: str, base_url: str) -> Tuple[List[str], List[str]]:
+    """
+    Parse an RSS, Atom or sitemap document into (article links, nested
+    sitemap URLs), both newest first when the document carries dates.
+    """
+    entries, sitemaps = parse_feed_entries(document, base_url)
+    return newest_first(entries), newest_first(sitemaps)
+
+
+def looks_like_feed(document: str) -> bool:
+    head = document.lstrip()[:512].lower()
+    return head.startswith("<?xml") or any(tag in head for tag in ("<rss", "<feed", "<urlset", "<sitemapindex"))
+
+
+def select_links(links: Iterable[str], rules: LinkRules, source_url: str, limit: int) -> List[str]:
+    """Apply `rules` and drop duplicates, keeping at most `limit` links in order."""
+    selected, seen = [], set()
+    for link in links:
+        if link in seen or not rules.accepts(link, source_url):
+            continue
+        seen.add(link)
+        selected.append(link)
+        if len(selected) >= limit:
+            break
+    return selected
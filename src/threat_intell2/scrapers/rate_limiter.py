@@ -0,0 +1,82 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every request for `seconds`, e.g. after a Retry-After response."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class HostRateLimiter:
+    """
+    Combines a global concurrency cap with a per-host token bucket and a
+    per-host concurrency cap, so a slow or throttling host only delays its
+    own requests.
+    """
+
+    def __init__(self, rate: float, burst: float, per_host_concurrency: int, total_concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.per_host_concurrency = per_host_concurrency
+        self._total = asyncio.Semaphore(total_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = self.host(url)
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = self.host(url)
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    @asynccontextmanager
+    async def limit(self, url: str) -> AsyncIterator[None]:
+        # Take the host slot and token first so waiting on a busy host does not hold a global slot
+        async with self._host_semaphore(url):
+            await self.bucket(url).acquire()
+            async with self._total:
+                yield
+
+    def back_off(self, url: str, seconds: float) -> None:
+        self.bucket(url).block_for(seconds)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from ..utils.logging_config import logger
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+# Deferred article records not committed within this many seconds are dropped
+PENDING_MAX_AGE = 30 * 24 * 3600
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8", "replace")).hexdigest()
+
+
+class SeenArticleStore:
+    """
+    SQLite record of previously fetched pages, used for incremental crawls.
+
+    For every URL it keeps the validators needed for conditional requests
+    (ETag, Last-Modified), a hash of the last body and, for listing pages,
+    the article links found on it. Counters track how many articles were
+    new, changed or unchanged during the current run.
+
+    Scraped articles are only deferred (`defer`) and become seen once the
+    report covering them is written (`commit_pending`), so an article whose
+    analysis failed or whose run crashed is fetched again next time. The
+    deferred records live in the database, so they survive `--resume` and
+    are shared by worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, "
+                "links TEXT, first_seen REAL NOT NULL, last_seen REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending ("
+                "article_url TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "content_hash TEXT, deferred_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _row(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT etag, last_modified, content_hash, links FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        row = self._row(url)
+        headers = {}
+        if row:
+            if row[0]:
+                headers["If-None-Match"] = row[0]
+            if row[1]:
+                headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def classify(self, url: str, body_hash: str) -> str:
+        row = self._row(url)
+        if row is None:
+            return NEW
+        return UNCHANGED if row[2] == body_hash else CHANGED
+
+    def stored_links(self, url: str) -> Optional[List[str]]:
+        row = self._row(url)
+        return json.loads(row[3]) if row and row[3] else None
+
+    def record(
+        self,
+        url: str,
+        body_hash: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        links: Optional[List[str]] = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO pages (url, etag, last_modified, content_hash, links, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "etag = COALESCE(excluded.etag, etag), "
+                "last_modified = COALESCE(excluded.last_modified, last_modified), "
+                "content_hash = COALESCE(excluded.content_hash, content_hash), "
+                "links = COALESCE(excluded.links, links), "
+                "last_seen = excluded.last_seen",
+                (url, etag, last_modified, body_hash, json.dumps(links) if links is not None else None, now, now),
+            )
+            conn.commit()
+
+    def defer(
+        self,
+        url: str,
+        article_url: str,
+        body_hash: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Hold the record of the page `url`, scraped as the article `article_url`, until `commit_pending`."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pending (article_url, url, etag, last_modified, content_hash, deferred_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (article_url, url, etag, last_modified, body_hash, time.time()),
+            )
+            conn.commit()
+
+    def commit_pending(self, article_urls: Iterable[str]) -> int:
+        """Record the deferred pages of `article_urls` as seen, returning how many were committed."""
+        with self._lock:
+            conn = self._connection()
+            rows = []
+            for article_url in article_urls:
+                row = conn.execute(
+                    "SELECT url, content_hash, etag, last_modified FROM pending WHERE article_url = ?", (article_url,)
+                ).fetchone()
+                if row:
+                    rows.append((article_url, row))
+            conn.execute("DELETE FROM pending WHERE deferred_at < ?", (time.time() - PENDING_MAX_AGE,))
+            conn.commit()
+        for article_url, (url, body_hash, etag, last_modified) in rows:
+            self.record(url, body_hash, etag, last_modified)
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("DELETE FROM pending WHERE article_url = ?", [(article_url,) for article_url, _ in rows])
+            conn.commit()
+        return len(rows)
+
+    def count(self, status: str) -> None:
+        self.counts[status] += 1
+
+    def log_summary(self) -> None:
+        logger.info(
+            f"Incremental crawl: {self.counts[NEW]} new, {self.counts[CHANGED]} changed, "
+            f"{self.counts[UNCHANGED]} unchanged articles"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,116 +1,556 @@
 import asyncio
-from typing import List, Optional
-from urllib.parse import urljoin
+import math
+import re
+from concurrent.futures import Executor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Tuple
 
 import aiohttp
 from aiohttp_client_cache import CachedSession
-from bs4 import BeautifulSoup
-from goose3 import Goose
 
 from threat_intell2.config import (
     HEADERS,
     WEBSITES,
     SEMAPHORE_LIMIT,
+    RATE_LIMIT,
+    RATE_LIMIT_BURST,
+    PER_HOST_CONCURRENCY,
+    KEEPALIVE_TIMEOUT,
+    REQUEST_TIMEOUT,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    MAX_RETRY_AFTER,
+    INCREMENTAL_CRAWL,
+    SEEN_STORE_PATH,
+    LINK_DISCOVERY,
+    SITEMAP_MAX_CHILDREN,
+    DEFAULT_LINK_RULES,
+    SOURCE_LINK_RULES,
+    CRAWL_WORKERS,
+    CRAWL_MAX_DEPTH,
+    CRAWL_HOST_DELAY,
+    CRAWL_PERSIST,
+    CRAWL_RESUME_MAX_AGE,
+    CRAWL_FRONTIER_PATH,
+    PAGINATION_PATTERN,
     ARTICLES_PER_WEBSITE  # Import the new configuration
 )
 from threat_intell2.utils.logging_config import logger
+from threat_intell2.utils.metrics import metrics
+from threat_intell2.utils.text_store import spill_text
 from ..models.data_models import Article
+from .http_cache import create_cache_backend, expire_after_for, maintain_http_cache
+from .html_extractor import create_extraction_executor, extract_article
+from .frontier import LISTING, CrawlFrontier, FrontierItem, SourceLimits
+from .link_discovery import (
+    FeedEntry,
+    LinkRules,
+    build_rules,
+    find_next_pages,
+    looks_like_feed,
+    newest_first,
+    parse_anchors,
+    parse_feed_entries,
+    select_links,
+)
+from .seen_store import SeenArticleStore, UNCHANGED, content_hash
+from .rate_limiter import HostRateLimiter
 
-async def fetch_article_links(
-    session: CachedSession, url: str, semaphore: asyncio.Semaphore
-) -> List[str]:
-    async with semaphore:
+# Responses worth retrying after a delay
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_PAGINATION_RE = re.compile(PAGINATION_PATTERN)
+
+
+class FetchResult(NamedTuple):
+    status: int
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def create_session() -> CachedSession:
+    connector = aiohttp.TCPConnector(
+        limit=SEMAPHORE_LIMIT,
+        limit_per_host=PER_HOST_CONCURRENCY,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=300,
+    )
+    return CachedSession(
+        cache=create_cache_backend(),
+        headers=HEADERS,
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
+
+
+def create_rate_limiter() -> HostRateLimiter:
+    return HostRateLimiter(RATE_LIMIT, RATE_LIMIT_BURST, PER_HOST_CONCURRENCY, SEMAPHORE_LIMIT)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Return the delay in seconds requested by a Retry-After header (seconds or
+    HTTP date), or None when it is missing or not a finite delay.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+async def fetch_page(
+    session: CachedSession,
+    url: str,
+    limiter: HostRateLimiter,
+    headers: Optional[dict] = None,
+    listing: bool = False,
+) -> FetchResult:
+    """
+    GET `url` within the per-host limits. Throttling and server errors are
+    retried up to MAX_RETRIES times, waiting as long as Retry-After asks
+    (or exponentially from RETRY_DELAY) and holding back the whole host
+    meanwhile. A Retry-After longer than MAX_RETRY_AFTER fails the request
+    instead, so one host cannot stall the crawl. Listing pages and feeds (`listing`) are cached for less
+    time than articles.
+    """
+    expire_after = expire_after_for(url, listing)
+    for attempt in range(MAX_RETRIES + 1):
         try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Extract absolute links
-                absolute_links = [
-                    urljoin(url, link.get('href'))
-                    for link in soup.find_all('a')
-                    if link.get('href')
-                ]
-                
-                # Filter links that likely point to articles
-                article_links = [
-                    link for link in absolute_links
-                    if '/blog/' in link or '/research/' in link
-                ]
-                
-                # Limit the number of articles per website
-                limited_article_links = article_links[:ARTICLES_PER_WEBSITE]
-                
-                logger.info(
-                    f"Fetched {len(limited_article_links)} article links from {url}"
-                )
-                return limited_article_links
-        except Exception as e:
-            logger.error(f"Failed to fetch links from {url}: {e}")
+            async with limiter.limit(url):
+                async with session.get(url, headers=headers, expire_after=expire_after) as response:
+                    metrics.incr("http_responses", labels={"status": response.status})
+                    metrics.incr("http_cache_hits" if getattr(response, "from_cache", False) else "http_cache_misses")
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = parse_retry_after(response.headers.get('Retry-After'))
+                        if delay is None:
+                            delay = RETRY_DELAY * 2 ** attempt
+                        elif delay > MAX_RETRY_AFTER:
+                            logger.warning(
+                                f"HTTP {response.status} from {url} asks to retry in {delay:.0f}s "
+                                f"(more than {MAX_RETRY_AFTER}s), giving up"
+                            )
+                            metrics.incr("http_retry_after_exceeded")
+                            response.raise_for_status()
+                        logger.warning(f"HTTP {response.status} from {url}, retrying in {delay:.1f}s")
+                        metrics.incr("http_retries")
+                        limiter.back_off(url, delay)
+                        continue
+                    if response.status == 304:
+                        return FetchResult(304, "", etag, last_modified)
+                    response.raise_for_status()
+                    body = await response.read()
+                    metrics.incr("http_bytes", len(body))
+                    return FetchResult(response.status, await response.text(), etag, last_modified)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            metrics.incr("http_errors")
+            if attempt >= MAX_RETRIES:
+                raise
+            metrics.incr("http_retries")
+            delay = RETRY_DELAY * 2 ** attempt
+            logger.warning(f"Request to {url} failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def open_seen_store() -> Optional[SeenArticleStore]:
+    return SeenArticleStore(SEEN_STORE_PATH) if INCREMENTAL_CRAWL else None
+
+
+def close_seen_store(seen_store: Optional[SeenArticleStore]) -> None:
+    if seen_store:
+        seen_store.log_summary()
+        seen_store.close()
+
+
+def record_seen_articles(article_urls: List[str]) -> None:
+    """Mark the scraped articles `article_urls` as seen once the report of their run is written."""
+    seen_store = open_seen_store()
+    if seen_store is None:
+        return
+    try:
+        committed = seen_store.commit_pending(article_urls)
+        logger.info(f"Incremental crawl: recorded {committed} scraped articles as seen")
+    finally:
+        seen_store.close()
+
+
+@lru_cache(maxsize=None)
+def source_rules(url: str) -> LinkRules:
+    return build_rules(url, SOURCE_LINK_RULES, DEFAULT_LINK_RULES)
+
+
+def extract_article_links(html: str, url: str) -> List[str]:
+    return select_links(parse_anchors(html, url).links, source_rules(url), url, ARTICLES_PER_WEBSITE)
+
+
+async def _fetch_document(
+    session: CachedSession, url: str, limiter: HostRateLimiter, seen_store: Optional[SeenArticleStore]
+) -> Tuple[Optional[FetchResult], Optional[List[str]]]:
+    """Fetch a listing page or feed, returning `(None, links)` when it is unchanged and links are on record."""
+    headers = seen_store.conditional_headers(url) if seen_store else None
+    page = await fetch_page(session, url, limiter, headers, listing=True)
+    if page.status == 304:
+        stored_links = seen_store.stored_links(url) if seen_store else None
+        if stored_links is not None:
+            return None, stored_links
+        # No links on record: fall back to an unconditional request
+        page = await fetch_page(session, url, limiter, listing=True)
+    return page, None
+
+
+async def _sitemap_entries(session: CachedSession, sitemap_url: str, limiter: HostRateLimiter) -> List[FeedEntry]:
+    """Dated article entries of a sitemap nested in a sitemap index; its own nested sitemaps are not followed."""
+    try:
+        page = await fetch_page(session, sitemap_url, limiter, listing=True)
+        if not looks_like_feed(page.text):
+            logger.warning(f"Not a sitemap: {sitemap_url}")
             return []
+        entries, _ = parse_feed_entries(page.text, sitemap_url)
+        return entries
+    except Exception as e:
+        logger.warning(f"Failed to read sitemap {sitemap_url}: {e}")
+        return []
+
+
+async def _links_from_feed(
+    session: CachedSession,
+    feed_url: str,
+    source_url: str,
+    rules: LinkRules,
+    limiter: HostRateLimiter,
+    seen_store: Optional[SeenArticleStore],
+    limit: int,
+) -> List[str]:
+    """
+    Article links from an RSS/Atom feed or sitemap, newest first. For a
+    sitemap index, the SITEMAP_MAX_CHILDREN most recently modified nested
+    sitemaps are read and their entries merged before links are selected.
+    """
+    try:
+        page, stored_links = await _fetch_document(session, feed_url, limiter, seen_store)
+        if stored_links is not None:
+            return stored_links
+        if not looks_like_feed(page.text):
+            logger.warning(f"Not a feed or sitemap: {feed_url}")
+            return []
+        entries, sitemaps = parse_feed_entries(page.text, feed_url)
+        for sitemap_url in newest_first(sitemaps)[:SITEMAP_MAX_CHILDREN]:
+            entries += await _sitemap_entries(session, sitemap_url, limiter)
+        selected = select_links(newest_first(entries), rules, source_url, limit)
+        if seen_store:
+            seen_store.record(feed_url, content_hash(page.text), page.etag, page.last_modified, links=selected)
+        return selected
+    except Exception as e:
+        logger.warning(f"Failed to read feed {feed_url}: {e}")
+        return []
+
+
+async def discover_links(
+    session: CachedSession,
+    page_url: str,
+    limiter: HostRateLimiter,
+    seen_store: Optional[SeenArticleStore] = None,
+    source_url: Optional[str] = None,
+    limit: int = ARTICLES_PER_WEBSITE,
+) -> Tuple[List[str], List[str]]:
+    """
+    Discover up to `limit` article links on the listing page `page_url`,
+    which is `source_url` itself or one of its pagination pages. Returns
+    `(article links, next pages)`.
+
+    With LINK_DISCOVERY="auto", feeds and sitemaps configured for the source
+    are tried first, then feeds advertised by the listing page; anchors on
+    the listing page are the fallback. Feed entries are articles by
+    definition, so only the exclude rules apply to them, and feeds are not
+    paginated.
+    """
+    source_url = source_url or page_url
+    first_page = page_url == source_url
+    try:
+        rules = source_rules(source_url)
+        feed_rules = rules._replace(include=(), same_host=False)
+        if LINK_DISCOVERY == "auto" and first_page:
+            candidates = [(feed_url, feed_rules) for feed_url in rules.feeds]
+            candidates += [(sitemap_url, rules) for sitemap_url in rules.sitemaps]
+            for feed_url, candidate_rules in candidates:
+                links = await _links_from_feed(
+                    session, feed_url, source_url, candidate_rules, limiter, seen_store, limit
+                )
+                if links:
+                    return _discovered(links, page_url, "feed"), []
+
+        page, stored_links = await _fetch_document(session, page_url, limiter, seen_store)
+        if stored_links is not None:
+            logger.info(f"Listing page unchanged, reusing {len(stored_links)} article links from {page_url}")
+            return stored_links, []
+
+        page_links = parse_anchors(page.text, page_url)
+        links, next_pages, method = [], [], "html"
+        if LINK_DISCOVERY == "auto" and first_page:
+            for feed_url in page_links.feeds[:2]:
+                links = await _links_from_feed(session, feed_url, source_url, feed_rules, limiter, seen_store, limit)
+                if links:
+                    method = "feed"
+                    break
+        if not links:
+            links = select_links(page_links.links, rules, source_url, limit)
+            next_pages = find_next_pages(page_links, page_url, _PAGINATION_RE)
+        if seen_store:
+            seen_store.record(page_url, content_hash(page.text), page.etag, page.last_modified, links=links)
+        return _discovered(links, page_url, method), next_pages
+    except Exception as e:
+        logger.error(f"Failed to fetch links from {page_url}: {e}")
+        return [], []
+
+
+async def fetch_article_links(
+    session: CachedSession, url: str, limiter: HostRateLimiter, seen_store: Optional[SeenArticleStore] = None
+) -> List[str]:
+    """Up to ARTICLES_PER_WEBSITE article links from the first listing page of `url`."""
+    links, _ = await discover_links(session, url, limiter, seen_store)
+    return links
+
+
+def _discovered(links: List[str], url: str, method: str) -> List[str]:
+    metrics.incr(f"links_discovered_{method}", len(links))
+    logger.info(f"Fetched {len(links)} article links from {url} ({method})")
+    return links
 
 
 async def scrape_article(
-    session: CachedSession, url: str, semaphore: asyncio.Semaphore
+    session: CachedSession,
+    url: str,
+    limiter: HostRateLimiter,
+    executor: Optional[Executor] = None,
+    seen_store: Optional[SeenArticleStore] = None,
 ) -> Optional[Article]:
-    async with semaphore:
-        try:
-            async with session.get(url) as response:
-                response.raise_for_status()
-                html = await response.text()
-                g = Goose()
-                extracted = g.extract(raw_html=html)
-                
-                if not extracted.cleaned_text:
-                    logger.warning(f"No text extracted from {url}")
-                    return None
-                
-                article = Article(
-                    title=extracted.title,
-                    text=extracted.cleaned_text,
-                    url=url
-                )
-                logger.info(f"Scraped article: {article.title}")
-                return article
-        except Exception as e:
-            logger.error(f"Failed to scrape article from {url}: {e}")
+    with metrics.article(url, "scrape", cpu=False):
+        return await _scrape_article(session, url, limiter, executor, seen_store)
+
+
+async def _scrape_article(
+    session: CachedSession,
+    url: str,
+    limiter: HostRateLimiter,
+    executor: Optional[Executor],
+    seen_store: Optional[SeenArticleStore],
+) -> Optional[Article]:
+    try:
+        # Only the download is rate limited; extraction runs in the pool so parsing overlaps with I/O
+        headers = seen_store.conditional_headers(url) if seen_store else None
+        page = await fetch_page(session, url, limiter, headers)
+        html = page.text
+        if page.status == 304 and seen_store:
+            seen_store.count(UNCHANGED)
+            seen_store.record(url)
+            logger.debug(f"Article not modified, skipped: {url}")
             return None
 
+        if seen_store:
+            body_hash = content_hash(html)
+            status = seen_store.classify(url, body_hash)
+            seen_store.count(status)
+            if status == UNCHANGED:
+                seen_store.record(url, body_hash, page.etag, page.last_modified)
+                logger.debug(f"Article content unchanged, skipped: {url}")
+                return None
+
+        loop = asyncio.get_running_loop()
+        title, cleaned_text = await loop.run_in_executor(executor, extract_article, html)
+
+        if not cleaned_text:
+            logger.warning(f"No text extracted from {url}")
+            if seen_store:
+                # Nothing to report: record it now so an unchanged empty page is not extracted again
+                seen_store.record(url, body_hash, page.etag, page.last_modified)
+            return None
+
+        article = Article(
+            title=title,
+            text=cleaned_text,
+            url=url
+        )
+        spill_text(article)
+        if seen_store:
+            # Committed by record_seen_articles once the run's report is written
+            seen_store.defer(url, str(article.url), body_hash, page.etag, page.last_modified)
+        logger.info(f"Scraped article: {article.title}")
+        return article
+    except Exception as e:
+        logger.error(f"Failed to scrape article from {url}: {e}")
+        return None
+
 
 async def scrape_articles(
-    session: CachedSession, links: List[str], semaphore: asyncio.Semaphore
+    session: CachedSession,
+    links: List[str],
+    limiter: HostRateLimiter,
+    executor: Optional[Executor] = None,
+    seen_store: Optional[SeenArticleStore] = None,
 ) -> List[dict]:
-    tasks = [scrape_article(session, link, semaphore) for link in links]
+    tasks = [scrape_article(session, link, limiter, executor, seen_store) for link in links]
     results = await asyncio.gather(*tasks)
     scraped_articles = [article for article in results if article]
     logger.info(f"Scraped {len(scraped_articles)} articles.")
     return scraped_articles
 
 
-async def web_scraping(urls: List[str]) -> List[Article]:
+def source_limits(url: str) -> SourceLimits:
+    settings = SOURCE_LINK_RULES.get(url, {})
+    return SourceLimits(
+        priority=settings.get("priority", 0),
+        max_articles=settings.get("max_articles", ARTICLES_PER_WEBSITE),
+        max_depth=settings.get("max_depth", CRAWL_MAX_DEPTH),
+    )
+
+
+def open_frontier(persist: bool = CRAWL_PERSIST) -> CrawlFrontier:
+    return CrawlFrontier(
+        CRAWL_FRONTIER_PATH if persist else None, CRAWL_HOST_DELAY, PER_HOST_CONCURRENCY, CRAWL_RESUME_MAX_AGE
+    )
+
+
+ArticleCallback = Callable[[Tuple[int, int], Article], Awaitable[None]]
+
+
+async def crawl(
+    urls: List[str],
+    session: CachedSession,
+    limiter: HostRateLimiter,
+    frontier: CrawlFrontier,
+    on_article: ArticleCallback,
+    executor: Optional[Executor] = None,
+    seen_store: Optional[SeenArticleStore] = None,
+    workers: int = CRAWL_WORKERS,
+) -> None:
+    """
+    Crawl the listing pages `urls` through `frontier` with `workers` tasks.
+
+    Listing pages yield article links and, while a source is under its
+    quota, the next pagination page. `on_article((source_index, ordinal),
+    article)` is awaited for every scraped article, including articles
+    finished by an interrupted earlier crawl that is being resumed.
+    """
+    if frontier.start([(url, source_limits(url)) for url in urls]):
+        logger.info(f"Resuming interrupted crawl: {frontier.stats()}")
+        for position, fields in frontier.results():
+            await on_article(position, Article(**fields))
+    wake = asyncio.Event()
+
+    async def process(item: FrontierItem) -> Optional[dict]:
+        source_url = urls[item.source]
+        if item.kind == LISTING:
+            limit = source_limits(source_url).max_articles
+            links, next_pages = await discover_links(session, item.url, limiter, seen_store, source_url, limit)
+            metrics.incr("frontier_listing_pages")
+            frontier.push_articles(item, links)
+            frontier.push_next_page(item, next_pages)
+            return None
+        article = await scrape_article(session, item.url, limiter, executor, seen_store)
+        if article is None:
+            return None
+        await on_article((item.source, item.ordinal), article)
+        # Kept only when the frontier is on disk, for a resumed crawl to return
+        fields = {"title": article.title, "text": article.text, "text_ref": article.text_ref, "url": str(article.url)}
+        return fields if frontier.persistent else None
+
+    async def worker() -> None:
+        while True:
+            item, wait = frontier.pop()
+            if item is None:
+                if wait is None and frontier.in_flight() == 0:
+                    wake.set()  # Frontier drained: let idle workers finish too
+                    return
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            result = None
+            try:
+                result = await process(item)
+            except Exception as e:
+                logger.error(f"Failed to crawl {item.url}: {e}")
+            finally:
+                frontier.complete(item, result)
+                wake.set()
+
+    await asyncio.gather(*[worker() for _ in range(workers)])
+    logger.info(f"Crawl finished: {frontier.stats()}")
+
+
+async def web_scraping(urls: List[str], persist_frontier: bool = CRAWL_PERSIST) -> List[Article]:
     logger.info("START: Web Scraping")
+    seen_store = open_seen_store()
+    frontier = open_frontier(persist_frontier)
     try:
-        all_articles = []
-        async with CachedSession(headers=HEADERS) as session:
-            semaphore = asyncio.Semaphore(SEMAPHORE_LIMIT)
-            
-            # Fetch article links with limits
-            fetch_tasks = [
-                fetch_article_links(session, url, semaphore) for url in urls
-            ]
-            links_lists = await asyncio.gather(*fetch_tasks)
-            
-            # Flatten the list of lists
-            all_links = [link for sublist in links_lists for link in sublist]
-            logger.info(f"Total article links fetched: {len(all_links)}")
-            
-            # Scrape the articles
-            scraped_articles = await scrape_articles(session, all_links, semaphore)
-            all_articles.extend(scraped_articles)
-        
+        scraped: List[Tuple[Tuple[int, int], Article]] = []
+
+        async def collect(position: Tuple[int, int], article: Article) -> None:
+            scraped.append((position, article))
+
+        with create_extraction_executor() as executor:
+            async with create_session() as session:
+                await crawl(urls, session, create_rate_limiter(), frontier, collect, executor, seen_store)
+        maintain_http_cache()
+
+        scraped.sort(key=lambda entry: entry[0])
+        logger.info(f"Scraped {len(scraped)} articles.")
         logger.info("END: Web Scraping completed successfully.")
-        return all_articles
+        return [article for _, article in scraped]
     except Exception as e:
         logger.error(f"ERROR: Web Scraping failed - {e}")
         return []
+    finally:
+        frontier.close()
+        close_seen_store(seen_store)
+
+
+async def web_scraping_stream(
+    urls: List[str], queue: asyncio.Queue, persist_frontier: bool = CRAWL_PERSIST
+) -> None:
+    """
+    Scrape articles and put `(position, article)` on `queue` as soon as each
+    one is ready, followed by a final `None`. `position` is a
+    `(source_index, ordinal)` tuple that sorts in the same order as the
+    list returned by `web_scraping`.
+
+    A crawl worker waits while the queue is full, so a slow consumer
+    throttles the downloads. `persist_frontier=False` keeps the frontier in
+    memory, e.g. for workers crawling separate sources in parallel.
+    """
+    logger.info("START: Web Scraping (streaming)")
+    seen_store = open_seen_store()
+    frontier = open_frontier(persist_frontier)
+    try:
+        async def enqueue(position: Tuple[int, int], article: Article) -> None:
+            await queue.put((position, article))
+
+        with create_extraction_executor() as executor:
+            async with create_session() as session:
+                await crawl(urls, session, create_rate_limiter(), frontier, enqueue, executor, seen_store)
+        maintain_http_cache()
+        logger.info("END: Web Scraping completed successfully.")
+    except Exception as e:
+        logger.error(f"ERROR: Web Scraping failed - {e}")
+    finally:
+        frontier.close()
+        close_seen_store(seen_store)
+    # Skipped when cancelled: the consumers are gone and the queue may be full
+    await queue.put(None)
@@ -0,0 +1,154 @@
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class RunMetrics:
+    """
+    Collects timings, counters and latency samples for one pipeline run.
+
+    - `stage()` records wall and process CPU time of a pipeline stage
+    - `article()` records wall time of one article in a stage, plus thread
+      CPU time for synchronous stages
+    - `incr()` adds to a counter, optionally labelled, `observe()` records
+      a sample (e.g. latency)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.articles: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+            self.counters: Dict[str, float] = defaultdict(float)
+            self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "calls": 0})
+                entry["wall_seconds"] += time.perf_counter() - wall
+                entry["cpu_seconds"] += time.process_time() - cpu
+                entry["calls"] += 1
+
+    @contextmanager
+    def article(self, key: str, stage: str, cpu: bool = True) -> Iterator[None]:
+        # Thread CPU time, since concurrent articles share the process. Pass cpu=False around awaits:
+        # the event loop thread also runs every other coroutine in between, so its CPU time says nothing
+        wall, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            entry = {"wall_seconds": time.perf_counter() - wall}
+            if cpu:
+                entry["cpu_seconds"] = time.thread_time() - cpu_start
+            with self._lock:
+                self.articles[str(key)][stage] = entry
+
+    def incr(self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None) -> None:
+        # Labelled counters are kept as one series per label set, named like `name{label="value"}`
+        if labels:
+            name += "{" + ",".join(f'{label}="{labels[label]}"' for label in sorted(labels)) + "}"
+        with self._lock:
+            self.counters[name] += value
+
+    def set_counter(self, name: str, value: float) -> None:
+        with self._lock:
+            self.counters[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self.samples[name].append(value)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            derived = {}
+            if counters.get("spacy_seconds"):
+                derived["spacy_docs_per_second"] = counters.get("spacy_docs", 0) / counters["spacy_seconds"]
+            return {
+                "started_at": self.started_at,
+                "duration_seconds": time.time() - self.started_at,
+                "stages": {name: dict(values) for name, values in self.stages.items()},
+                "counters": counters,
+                "derived": derived,
+                "latencies": {
+                    name: {
+                        "count": len(values),
+                        "mean": sum(values) / len(values) if values else 0.0,
+                        "p50": percentile(values, 0.5),
+                        "p90": percentile(values, 0.9),
+                        "p99": percentile(values, 0.99),
+                        "max": max(values) if values else 0.0,
+                    }
+                    for name, values in self.samples.items()
+                },
+                "articles": {key: dict(stages) for key, stages in self.articles.items()},
+            }
+
+    def write_summary(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self, prefix: str = "threat_intell2") -> str:
+        summary = self.summary()
+        lines = []
+
+        def metric_name(name: str) -> str:
+            return f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+        for field in ("wall_seconds", "cpu_seconds"):
+            name = metric_name(f"stage_{field}")
+            lines.append(f"# TYPE {name} gauge")
+            for stage, values in summary["stages"].items():
+                lines.append(f'{name}{{stage="{stage}"}} {values[field]}')
+        declared = set()
+        for series, value in sorted(summary["counters"].items()):
+            counter, _, labels = series.partition("{")
+            name = metric_name(counter)
+            if not name.endswith("_total"):
+                name += "_total"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{{{labels} {value}" if labels else f"{name} {value}")
+        for derived, value in sorted(summary["derived"].items()):
+            name = metric_name(derived)
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for sample, stats in sorted(summary["latencies"].items()):
+            name = metric_name(sample)
+            lines.append(f"# TYPE {name} summary")
+            for key, quantile in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99")):
+                lines.append(f'{name}{{quantile="{quantile}"}} {stats[key]}')
+            lines.append(f"{name}_count {stats['count']}")
+            lines.append(f"{name}_sum {stats['mean'] * stats['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+
+metrics = RunMetrics()
@@ -1,24 +1,187 @@
-import tiktoken
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Sequence
 
-def chunk_text(text: str, max_tokens: int = 7000) -> list[str]:
-    """
-    Split the input text into chunks, each containing at most max_tokens.
-    """
-    encoding = tiktoken.encoding_for_model("gpt-4")
-    tokens = encoding.encode(text)
+from ..config import CHUNK_BOUNDARY, CHUNK_OVERLAP_TOKENS, MAX_TOKENS_PER_CHUNK
+
+# Cut points keep the whitespace after a sentence or paragraph with the next
+# segment, which tokenizes it the same way it does in the full text, so
+# segment token counts add up to (at most a few tokens off) the chunk's.
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*(?=\s)")
+# Blank lines; a paragraph ends at the last non-space character before one
+_BLANK_LINE_RE = re.compile(r"\n[ \t]*\r?\n")
+
+BOUNDARIES = ("token", "sentence", "paragraph")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4"):
+    # Imported lazily: tiktoken loads its BPE ranks on first use
+    import tiktoken
+
+    return tiktoken.encoding_for_model(model)
+
+
+def _threads(items: int) -> int:
+    return min(8, os.cpu_count() or 1, items)
+
+
+def _encode_batch(encoding, texts: Sequence[str]) -> List[List[int]]:
+    # Plain-text encoding: special-token markers in scraped text are not treated as special.
+    # tiktoken's batch call runs one pool task per text, which only pays off with several cores
+    if _threads(len(texts)) <= 1:
+        return [encoding.encode_ordinary(text) for text in texts]
+    return encoding.encode_ordinary_batch(list(texts), num_threads=_threads(len(texts)))
+
+
+def _encode_segments(encoding, segmented: Sequence[List[str]]) -> List[List[List[int]]]:
+    # Segments are short and numerous, so each pool task encodes all segments of one text
+    def encode_all(segments: List[str]) -> List[List[int]]:
+        return [encoding.encode_ordinary(segment) for segment in segments]
+
+    threads = _threads(len(segmented))
+    if threads <= 1:
+        return [encode_all(segments) for segments in segmented]
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(encode_all, segmented))
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    return len(get_encoding(model).encode_ordinary(text))
+
+
+def count_tokens_batch(texts: Sequence[str], model: str = "gpt-4") -> List[int]:
+    return [len(tokens) for tokens in _encode_batch(get_encoding(model), texts)]
+
+
+def _sentence_ends(text: str) -> List[int]:
+    return [match.end() for match in _SENTENCE_END_RE.finditer(text)]
+
+
+def _paragraph_ends(text: str) -> List[int]:
+    # Scanning for the newlines and stepping back is far cheaper than a lookbehind tried at every position
+    ends = []
+    for match in _BLANK_LINE_RE.finditer(text):
+        end = match.start()
+        if end and text[end - 1] == "\r":
+            end -= 1
+        while end and text[end - 1] in " \t":
+            end -= 1
+        if end and not text[end - 1].isspace():
+            ends.append(end)
+    return ends
+
+
+def _cut(text: str, find_ends: Callable[[str], List[int]]) -> List[str]:
+    cuts = find_ends(text)
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)]) if start < end]
+
+
+def _slices(encoding, tokens: List[int], max_tokens: int, overlap: int) -> List[str]:
     chunks = []
-    current_chunk = []
-    current_chunk_tokens = 0
+    for start in range(0, len(tokens), max(1, max_tokens - overlap)):
+        chunks.append(encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
 
-    for token in tokens:
-        if current_chunk_tokens + 1 > max_tokens:
-            chunks.append(encoding.decode(current_chunk))
-            current_chunk = []
-            current_chunk_tokens = 0
-        current_chunk.append(token)
-        current_chunk_tokens += 1
 
-    if current_chunk:
-        chunks.append(encoding.decode(current_chunk))
+def _pack(segments: List[str], sizes: List[int], max_tokens: int, overlap: int) -> List[str]:
+    """Join consecutive segments into chunks of at most `max_tokens`, repeating up to `overlap` tokens of trailing segments."""
+    chunks: List[str] = []
+    current: List[int] = []
+    size = 0
+    for index, tokens in enumerate(sizes):
+        if size + tokens > max_tokens and current:
+            chunks.append("".join(segments[i] for i in current))
+            carried: List[int] = []
+            carried_size = 0
+            for i in reversed(current):
+                if carried_size + sizes[i] > overlap:
+                    break
+                carried.insert(0, i)
+                carried_size += sizes[i]
+            current, size = carried, carried_size
+            while current and size + tokens > max_tokens:
+                size -= sizes[current.pop(0)]
+        current.append(index)
+        size += tokens
+    if current:
+        chunks.append("".join(segments[i] for i in current))
+    return chunks
+
 
+def _chunk_segments(
+    encoding, segments: List[str], tokens: List[List[int]], max_tokens: int, boundary: str, overlap: int
+) -> List[str]:
+    # Segments that do not fit on their own are split finer: paragraphs into sentences, sentences by tokens
+    pieces: List[str] = []
+    sizes: List[int] = []
+    chunks: List[str] = []
+    for segment, segment_tokens in zip(segments, tokens):
+        if len(segment_tokens) <= max_tokens:
+            pieces.append(segment)
+            sizes.append(len(segment_tokens))
+            continue
+        chunks.extend(_pack(pieces, sizes, max_tokens, overlap))
+        pieces, sizes = [], []
+        if boundary == "paragraph":
+            sentences = _cut(segment, _sentence_ends)
+            chunks.extend(_chunk_segments(
+                encoding, sentences, _encode_segments(encoding, [sentences])[0], max_tokens, "sentence", overlap
+            ))
+        else:
+            chunks.extend(_slices(encoding, segment_tokens, max_tokens, overlap))
+    chunks.extend(_pack(pieces, sizes, max_tokens, overlap))
     return chunks
+
+
+def chunk_texts(
+    texts: Sequence[str],
+    max_tokens: int = MAX_TOKENS_PER_CHUNK,
+    boundary: str = CHUNK_BOUNDARY,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    model: str = "gpt-4",
+) -> List[List[str]]:
+    """
+    Split each of `texts` into chunks of at most `max_tokens`, encoding the
+    texts (or their segments) on up to 8 threads when several cores are
+    available.
+
+    `boundary` is "token" (cut anywhere), "sentence" or "paragraph" (cut
+    between sentences or paragraphs, falling back to finer cuts for a
+    segment longer than `max_tokens`). Consecutive chunks share up to
+    `overlap` tokens: whole trailing segments when aligned to boundaries.
+    Text that fits in one chunk is returned unchanged.
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unsupported chunk boundary: {boundary}")
+    overlap = max(0, min(overlap, max_tokens // 2))
+    encoding = get_encoding(model)
+    if boundary == "token":
+        return [
+            ([text] if text else []) if len(tokens) <= max_tokens else _slices(encoding, tokens, max_tokens, overlap)
+            for text, tokens in zip(texts, _encode_batch(encoding, texts))
+        ]
+    find_ends = _paragraph_ends if boundary == "paragraph" else _sentence_ends
+    segmented = [_cut(text, find_ends) for text in texts]
+    results = []
+    for text, segments, tokens in zip(texts, segmented, _encode_segments(encoding, segmented)):
+        if sum(len(segment_tokens) for segment_tokens in tokens) <= max_tokens:
+            results.append([text] if text else [])
+        else:
+            results.append(_chunk_segments(encoding, segments, tokens, max_tokens, boundary, overlap))
+    return results
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = MAX_TOKENS_PER_CHUNK,
+    boundary: str = CHUNK_BOUNDARY,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    model: str = "gpt-4",
+) -> List[str]:
+    """Split `text` into chunks of at most `max_tokens`; see `chunk_texts`."""
+    return chunk_texts([text], max_tokens, boundary, overlap, model)[0]
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import time
+import uuid
+from typing import Dict
+
+from ..config import TEXT_STORE_DIR, TEXT_STORE_ENABLED, TEXT_STORE_MAX_AGE
+from .logging_config import logger
+from .metrics import metrics
+
+
+class TextStore:
+    """
+    Content-addressed store of article bodies on disk, one UTF-8 file per
+    SHA-256 digest under `<root>/<first two hex digits>/`. Identical texts
+    are stored once. Files are written to a temporary name and renamed, so
+    threads and worker processes sharing the directory never read a
+    partial file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            # Refresh the timestamp so texts still in use survive pruning
+            os.utime(path)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        metrics.incr("text_store_bytes_written", len(data))
+        return digest
+
+    def get(self, digest: str) -> str:
+        with open(self._path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+    def prune(self, max_age: float = TEXT_STORE_MAX_AGE) -> int:
+        """Delete texts not written or reused for `max_age` seconds, returning how many were removed."""
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.info(f"Pruned {removed} texts from the article text store")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        files = size = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                files += 1
+                size += os.path.getsize(os.path.join(directory, name))
+        return {"texts": files, "bytes": size}
+
+
+text_store = TextStore(TEXT_STORE_DIR)
+
+
+def spill_text(article):
+    """
+    With the text store enabled, move `article.text` to disk and keep only
+    its digest in `article.text_ref`; otherwise leave the article as is.
+    """
+    if TEXT_STORE_ENABLED and article.text:
+        article.text_ref = text_store.put(article.text)
+        article.text = ""
+    return article
+
+
+def article_text(article) -> str:
+    """The article's text, loaded from the text store if it was spilled."""
+    if article.text or not article.text_ref:
+        return article.text
+    try:
+        return text_store.get(article.text_ref)
+    except FileNotFoundError:
+        # Pruned, or written by a worker not sharing TEXT_STORE_DIR
+        logger.warning(f"Text of {article.url} is missing from the article text store")
+        return ""
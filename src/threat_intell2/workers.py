@@ -0,0 +1,228 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import (
+    JOB_QUEUE_PATH,
+    NEAR_DUPLICATE_DETECTION,
+    OUTPUTS_DIR,
+    WORKER_LEASE_SECONDS,
+    WORKER_MAX_ATTEMPTS,
+    WORKER_PROCESSES,
+)
+from .job_queue import DONE, Job, JobQueue
+from .models.data_models import Article
+from .pipeline import run_streaming_pipeline
+from .processors.deduplicator import NearDuplicateIndex, canonicalize_url, minhash_signature
+from .utils.logging_config import logger
+from .utils.metrics import metrics
+from .utils.text_store import article_text
+
+
+def open_job_queue(path: str = JOB_QUEUE_PATH) -> JobQueue:
+    return JobQueue(path, lease=WORKER_LEASE_SECONDS, max_attempts=WORKER_MAX_ATTEMPTS)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+async def _keep_lease(queue: JobQueue, job: Job, worker: str) -> None:
+    while True:
+        await asyncio.sleep(queue.lease / 3)
+        if not queue.heartbeat(job, worker):
+            logger.warning(f"Lost the lease on job {job.id} ({job.url})")
+            return
+
+
+async def run_job(queue: JobQueue, job: Job, worker: str) -> bool:
+    """Scrape, extract and analyze one source, storing the results with the job."""
+    lease = asyncio.create_task(_keep_lease(queue, job, worker))
+    try:
+        # Each job gets its own in-memory frontier; workers never share crawl state
+        articles, analyzed_data, scraped_urls = await run_streaming_pipeline([job.url], persist_frontier=False)
+    except Exception as e:
+        logger.error(f"Job {job.id} ({job.url}) failed: {e}")
+        queue.fail(job, worker, str(e))
+        return False
+    finally:
+        lease.cancel()
+    results = {
+        "article": [article.model_dump(mode="json") for article in articles],
+        "analysis": analyzed_data,
+        "scraped": scraped_urls,
+    }
+    if not queue.complete(job, worker, results):
+        logger.warning(f"Job {job.id} was taken over by another worker; results discarded")
+        return False
+    return True
+
+
+async def work(run_id: str, queue_path: str = JOB_QUEUE_PATH, worker: Optional[str] = None) -> int:
+    """Claim and run jobs of `run_id` until none are left, returning how many completed."""
+    worker = worker or worker_name()
+    queue = open_job_queue(queue_path)
+    completed = 0
+    try:
+        while True:
+            job = queue.claim(run_id, worker)
+            if job is None:
+                break
+            logger.info(f"Worker {worker} claimed job {job.id}: {job.url} (attempt {job.attempts})")
+            with metrics.stage("worker_job"):
+                completed += await run_job(queue, job, worker)
+    finally:
+        queue.close()
+    logger.info(f"Worker {worker} finished {completed} jobs of run {run_id}")
+    return completed
+
+
+def _worker_process(run_id: str, queue_path: str, index: int) -> None:
+    metrics.reset()
+    try:
+        asyncio.run(work(run_id, queue_path))
+    finally:
+        metrics.write_summary(os.path.join(OUTPUTS_DIR, f"worker_summary_{run_id}_{index}.json"))
+
+
+def run_workers(run_id: str, processes: int = WORKER_PROCESSES, queue_path: str = JOB_QUEUE_PATH) -> None:
+    """Run `processes` local worker processes on `run_id` and wait for them to drain it."""
+    # Spawned rather than forked: workers start without the parent's event loop and threads
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_worker_process, args=(run_id, queue_path, index), name=f"worker-{index}")
+        for index in range(max(1, processes))
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        if process.exitcode:
+            logger.error(f"{process.name} exited with code {process.exitcode}")
+
+
+def _drop_near_duplicates(articles: List[Article]) -> List[Article]:
+    # Each job only compared its own articles; copies syndicated across sources are caught here
+    duplicate_index = NearDuplicateIndex()
+    try:
+        kept = []
+        for article in articles:
+            signature = minhash_signature(article_text(article))
+            if signature is not None:
+                original_url = duplicate_index.find_duplicate(signature, str(article.url))
+                if original_url:
+                    logger.info(f"Near-duplicate of {original_url} skipped: {article.url}")
+                    continue
+                duplicate_index.add(str(article.url), signature)
+            kept.append(article)
+        return kept
+    finally:
+        duplicate_index.close()
+
+
+def merge_results(
+    run_id: str, queue_path: str = JOB_QUEUE_PATH
+) -> Tuple[List[Article], List[Dict[str, Any]], List[str]]:
+    """
+    Collect the validated articles and analyses of every finished job of
+    `run_id` in source order, dropping articles several sources linked to
+    and, with near-duplicate detection enabled, near-copies of an earlier
+    source's article, together with their analyses. Also returns the URLs
+    of every article the jobs scraped.
+    """
+    queue = open_job_queue(queue_path)
+    try:
+        status = queue.status(run_id)
+        missing = sum(count for state, count in status.items() if state != DONE)
+        if missing:
+            logger.warning(f"Run {run_id}: {missing} jobs did not finish and are missing from the report ({status})")
+        articles, seen_articles = [], set()
+        for _, fields in queue.results(run_id, "article"):
+            key = canonicalize_url(fields["url"])
+            if key not in seen_articles:
+                seen_articles.add(key)
+                articles.append(Article.model_validate(fields))
+        if NEAR_DUPLICATE_DETECTION:
+            articles = _drop_near_duplicates(articles)
+            kept_articles = {canonicalize_url(str(article.url)) for article in articles}
+        else:
+            kept_articles = seen_articles
+        analyzed_data, seen_analyses = [], set()
+        for _, analysis in queue.results(run_id, "analysis"):
+            key = canonicalize_url(str(analysis["url"]))
+            if key in kept_articles and key not in seen_analyses:
+                seen_analyses.add(key)
+                analyzed_data.append(analysis)
+        scraped_urls = [url for _, url in queue.results(run_id, "scraped")]
+    finally:
+        queue.close()
+    logger.info(f"Merged run {run_id}: {len(articles)} articles, {len(analyzed_data)} analyses ({status})")
+    return articles, analyzed_data, scraped_urls
+
+
+async def run_sharded_pipeline(
+    urls: List[str], processes: int = WORKER_PROCESSES, queue_path: str = JOB_QUEUE_PATH
+) -> Tuple[List[Article], List[Dict[str, Any]], List[str]]:
+    """
+    Queue one job per source, let `processes` worker processes run them and
+    merge the results. Returns `(validated_articles, analyzed_data,
+    scraped_urls)` like the other pipelines.
+    """
+    queue = open_job_queue(queue_path)
+    try:
+        run_id = queue.create_run(urls)
+    finally:
+        queue.close()
+    logger.info(f"START: Worker pipeline, run {run_id} with {len(urls)} jobs on {processes} processes")
+    await asyncio.get_running_loop().run_in_executor(None, run_workers, run_id, processes, queue_path)
+    return merge_results(run_id, queue_path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from datetime import datetime
+
+    from .config import WEBSITES
+
+    parser = argparse.ArgumentParser(description="Run the pipeline as jobs on a shared queue.")
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH, help="Path of the job queue database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Queue WEBSITES, run local workers and write the report")
+    run_parser.add_argument("--processes", type=int, default=WORKER_PROCESSES)
+    commands.add_parser("enqueue", help="Queue WEBSITES as a new run and print its id")
+    for name, text in (("work", "Run jobs in this process"), ("merge", "Write the report"), ("status", "Job counts")):
+        commands.add_parser(name, help=text).add_argument("--run", help="Run id (default: the latest run)")
+    args = parser.parse_args()
+
+    def write_report(run_id: str) -> None:
+        from .main import write_outputs
+
+        articles, analyzed_data, scraped_urls = merge_results(run_id, args.queue)
+        print(write_outputs(articles, analyzed_data, datetime.now().strftime("%Y%m%d_%H%M%S"), scraped_urls))
+
+    if args.command == "enqueue":
+        job_queue = open_job_queue(args.queue)
+        print(job_queue.create_run(WEBSITES))
+        job_queue.close()
+    elif args.command == "run":
+        job_queue = open_job_queue(args.queue)
+        run_id = job_queue.create_run(WEBSITES)
+        job_queue.close()
+        run_workers(run_id, args.processes, args.queue)
+        write_report(run_id)
+    else:
+        job_queue = open_job_queue(args.queue)
+        run_id = args.run or job_queue.latest_run()
+        status = job_queue.status(run_id) if run_id else {}
+        job_queue.close()
+        if run_id is None:
+            parser.error("no runs in the queue")
+        if args.command == "work":
+            asyncio.run(work(run_id, args.queue))
+        elif args.command == "merge":
+            write_report(run_id)
+        else:
+            print(json.dumps({"run": run_id, "jobs": status}, indent=2))